@@ -0,0 +1,46 @@
+"""Добавил поиск по адресу
+
+Revision ID: 0ab828648c1b
+Revises: ec2303fe20e3
+Create Date: 2026-10-19 15:21:40.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0ab828648c1b'
+down_revision: Union[str, Sequence[str], None] = 'ec2303fe20e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Слова адреса в нижнем регистре и с ё -> е. Конфигурация simple не отбрасывает стоп-слова и не приводит
+    # слова к основе, поэтому номера домов и сокращения (ул, д, корп) остаются в индексе как есть
+    op.add_column(
+        'buildings',
+        sa.Column(
+            'address_search',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', translate(lower(address), 'ё', 'е'))", persisted=True),
+        ),
+    )
+    op.create_index(
+        'ix_buildings_address_search',
+        'buildings',
+        ['address_search'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_buildings_address_search', table_name='buildings', postgresql_using='gin')
+    op.drop_column('buildings', 'address_search')
@@ -0,0 +1,44 @@
+"""Добавил индексы для запросов сервисов
+
+Revision ID: 4ddc9bb8fe34
+Revises: 0ab828648c1b
+Create Date: 2026-10-19 17:42:08.913526
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4ddc9bb8fe34'
+down_revision: Union[str, Sequence[str], None] = '0ab828648c1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Организации здания и телефоны организаций загружаются по внешнему ключу (selectinload, building_id = ANY),
+    # без индексов каждый такой запрос читает таблицу целиком
+    op.create_index(op.f('ix_organisations_building_id'), 'organisations', ['building_id'], unique=False)
+    op.create_index(
+        op.f('ix_organisation_phones_organisation_id'), 'organisation_phones', ['organisation_id'], unique=False
+    )
+    # Поиск по радиусу, прямоугольнику, многоугольнику и маршруту отбирает здания по диапазонам широты и долготы
+    op.create_index('ix_buildings_latitude_longitude', 'buildings', ['latitude', 'longitude'], unique=False)
+
+    # Поиск по названию - ILIKE '%...%', его поддерживает только триграммный индекс. pg_trgm - доверенное
+    # расширение (PostgreSQL 13+), его создает владелец базы без прав суперпользователя. Если расширения
+    # в сборке PostgreSQL нет, миграция завершается ошибкой: без индекса поиск читает organisations целиком
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX ix_organisations_name_trgm ON organisations USING gin (name gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX ix_organisations_name_trgm")
+    op.drop_index('ix_buildings_latitude_longitude', table_name='buildings')
+    op.drop_index(op.f('ix_organisation_phones_organisation_id'), table_name='organisation_phones')
+    op.drop_index(op.f('ix_organisations_building_id'), table_name='organisations')
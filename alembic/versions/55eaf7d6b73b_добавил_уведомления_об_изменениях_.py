@@ -0,0 +1,106 @@
+"""Добавил уведомления об изменениях справочников
+
+Revision ID: 55eaf7d6b73b
+Revises: 8b0fa65e5705
+Create Date: 2026-10-19 11:37:54.173786
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '55eaf7d6b73b'
+down_revision: Union[str, Sequence[str], None] = '8b0fa65e5705'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Таблица -> первичный ключ и колонки со связанными ID, которые попадают в уведомление
+_TRACKED_TABLES = {
+    'buildings': ('id',),
+    'activities': ('id', 'parent'),
+    'organisations': ('id', 'building_id'),
+    'organisation_phones': ('phone_id', 'organisation_id'),
+    'organisation_actvities': ('link_id', 'organisation_id', 'activity_id'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Уведомление: {"table", "op", "pk", "refs": {колонка: [значения до и после изменения]}}.
+    # Внутри транзакции с app.suppress_notify = on (массовый импорт) построчные уведомления не отправляются
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_catalog_change() RETURNS trigger AS $$
+        DECLARE
+            new_row jsonb;
+            old_row jsonb;
+            refs jsonb := '{}'::jsonb;
+            ref_column text;
+        BEGIN
+            IF current_setting('app.suppress_notify', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_LEVEL = 'STATEMENT' THEN
+                PERFORM pg_notify(
+                    'catalog_changes',
+                    jsonb_build_object('table', TG_TABLE_NAME, 'op', TG_OP)::text
+                );
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP <> 'DELETE' THEN
+                new_row := to_jsonb(NEW);
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                old_row := to_jsonb(OLD);
+            END IF;
+
+            FOREACH ref_column IN ARRAY TG_ARGV[1:] LOOP
+                refs := refs || jsonb_build_object(
+                    ref_column,
+                    (
+                        SELECT coalesce(jsonb_agg(DISTINCT value), '[]'::jsonb)
+                        FROM unnest(ARRAY[new_row -> ref_column, old_row -> ref_column]) AS value
+                        WHERE value IS NOT NULL AND value <> 'null'::jsonb
+                    )
+                );
+            END LOOP;
+
+            PERFORM pg_notify(
+                'catalog_changes',
+                jsonb_build_object(
+                    'table', TG_TABLE_NAME,
+                    'op', TG_OP,
+                    'pk', coalesce(new_row, old_row) -> TG_ARGV[0],
+                    'refs', refs
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, columns in _TRACKED_TABLES.items():
+        arguments = ", ".join(f"'{column}'" for column in columns)
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_catalog_change({arguments})
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_truncate
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_truncate ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_catalog_change()")
@@ -0,0 +1,45 @@
+"""Добавил поле depth у Activity
+
+Revision ID: 8b0fa65e5705
+Revises: d69770f123ac
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b0fa65e5705'
+down_revision: Union[str, Sequence[str], None] = 'd69770f123ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('activities', sa.Column('depth', sa.Integer(), server_default='1', nullable=False))
+
+    # Заполняем уровень вложенности для уже существующего каталога
+    op.execute("""
+        WITH RECURSIVE activity_tree AS (
+            SELECT id, 1 AS depth FROM activities WHERE parent IS NULL
+            UNION ALL
+            SELECT child.id, activity_tree.depth + 1
+            FROM activities AS child
+            JOIN activity_tree ON child.parent = activity_tree.id
+        )
+        UPDATE activities SET depth = activity_tree.depth
+        FROM activity_tree
+        WHERE activities.id = activity_tree.id
+    """)
+
+    op.create_check_constraint('ck_activities_depth', 'activities', 'depth BETWEEN 1 AND 3')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_activities_depth', 'activities', type_='check')
+    op.drop_column('activities', 'depth')
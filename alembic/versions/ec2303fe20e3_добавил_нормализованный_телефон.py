@@ -0,0 +1,80 @@
+"""Добавил нормализованный телефон
+
+Revision ID: ec2303fe20e3
+Revises: 55eaf7d6b73b
+Create Date: 2026-10-19 14:05:12.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ec2303fe20e3'
+down_revision: Union[str, Sequence[str], None] = '55eaf7d6b73b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Приведение номера к виду E.164 (+<код страны><номер>). Номера без кода страны считаются российскими:
+    # 8XXXXXXXXXX и XXXXXXXXXX -> +7XXXXXXXXXX, префикс 00 заменяется на +. Номер без цифр -> NULL.
+    # Та же функция нормализует номера в запросах поиска, поэтому правила заданы в одном месте
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION normalize_phone(phone text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE RETURNS NULL ON NULL INPUT AS $$
+            SELECT CASE
+                WHEN digits = '' THEN NULL
+                WHEN btrim(phone) LIKE '+%' THEN '+' || digits
+                WHEN digits LIKE '00%' THEN '+' || substr(digits, 3)
+                WHEN length(digits) = 11 AND digits LIKE '8%' THEN '+7' || substr(digits, 2)
+                WHEN length(digits) = 10 THEN '+7' || digits
+                ELSE '+' || digits
+            END
+            FROM (SELECT regexp_replace(phone, '\D', '', 'g') AS digits) AS cleaned
+        $$
+    """)
+
+    # Один и тот же номер мог быть записан в разных форматах. Уникальный индекс на такие данные не создать,
+    # а какую из записей оставить, миграция решить не может
+    op.execute("""
+        DO $$
+        DECLARE
+            duplicates text;
+        BEGIN
+            SELECT string_agg(normalized, ', ') INTO duplicates
+            FROM (
+                SELECT normalize_phone(phone) AS normalized
+                FROM organisation_phones
+                GROUP BY 1 HAVING count(*) > 1
+                LIMIT 20
+            ) AS duplicated;
+            IF duplicates IS NOT NULL THEN
+                RAISE EXCEPTION 'Телефоны совпадают после нормализации, удалите дубликаты перед миграцией: %', duplicates;
+            END IF;
+        END
+        $$
+    """)
+
+    # Генерируемая колонка заполняется для существующих строк при добавлении и пересчитывается при каждой записи,
+    # в том числе при массовом импорте
+    op.add_column(
+        'organisation_phones',
+        sa.Column('phone_normalized', sa.String(), sa.Computed('normalize_phone(phone)', persisted=True)),
+    )
+    op.create_index(
+        op.f('ix_organisation_phones_phone_normalized'),
+        'organisation_phones',
+        ['phone_normalized'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_organisation_phones_phone_normalized'), table_name='organisation_phones')
+    op.drop_column('organisation_phones', 'phone_normalized')
+    op.execute("DROP FUNCTION IF EXISTS normalize_phone(text)")
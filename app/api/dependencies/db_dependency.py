@@ -1,16 +1,105 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from ...core.settings import app_settings
 
-_engine = create_async_engine(app_settings.SQLALCHEMY_DB_URI, pool_pre_ping=True)
+# SQLSTATE query_canceled: запрос прерван по statement_timeout
+QUERY_CANCELED_SQLSTATE = "57014"
+STATEMENT_TIMEOUT_DETAIL = "Запрос к базе данных выполнялся слишком долго"
+
+
+# Меньше двух соединений на воркер: один долгий запрос останавливает все остальные запросы воркера
+MIN_CONNECTIONS_PER_WORKER = 2
+
+
+def pool_limits(max_connections: int, workers: int, dedicated_per_worker: int = 0) -> Tuple[int, int]:
+    """
+    Делит бюджет соединений между воркерами: половина доли воркера держится в пуле постоянно,
+    остальное открывается при пиковой нагрузке
+
+    Args:
+        max_connections (int): Общий бюджет соединений на все воркеры
+        workers (int): Количество воркеров
+        dedicated_per_worker (int): Сколько соединений каждый воркер держит вне пула (например, для LISTEN),
+            они вычитаются из доли воркера
+
+    Returns:
+        limits (Tuple[int, int]): pool_size и max_overflow пула одного воркера
+
+    Raises:
+        ValueError: Если бюджета не хватает на MIN_CONNECTIONS_PER_WORKER соединений каждому воркеру. Приложение
+            не запускается, а не превышает бюджет незаметно
+    """
+    workers = max(workers, 1)
+    per_worker = max_connections // workers - dedicated_per_worker
+    if per_worker < MIN_CONNECTIONS_PER_WORKER:
+        raise ValueError(
+            f"DB_MAX_CONNECTIONS={max_connections} не хватает на {workers} воркеров: каждому нужно не меньше "
+            f"{MIN_CONNECTIONS_PER_WORKER + dedicated_per_worker} соединений. "
+            "Увеличьте DB_MAX_CONNECTIONS или уменьшите WEB_WORKERS"
+        )
+    pool_size = per_worker // 2
+    return pool_size, per_worker - pool_size
+
+
+# Слушатель уведомлений об изменениях держит в каждом воркере отдельное соединение вне пула
+_pool_size, _max_overflow = pool_limits(
+    app_settings.DB_MAX_CONNECTIONS,
+    app_settings.WEB_WORKERS,
+    dedicated_per_worker=1 if app_settings.CHANGE_NOTIFICATIONS_ENABLED else 0,
+)
+_engine = create_async_engine(
+    app_settings.SQLALCHEMY_DB_URI,
+    pool_pre_ping=True,
+    pool_size=_pool_size,
+    max_overflow=_max_overflow,
+)
 AsyncSessionLocal = async_sessionmaker(bind=_engine, expire_on_commit=False)
 
-async def provide_session() -> AsyncGenerator[AsyncSession, None]:
+
+def statement_timeout_for(route_path: Optional[str]) -> int:
+    """
+    Возвращает statement_timeout маршрута в миллисекундах: из STATEMENT_TIMEOUTS_MS или STATEMENT_TIMEOUT_MS
+    """
+    return app_settings.STATEMENT_TIMEOUTS_MS.get(route_path, app_settings.STATEMENT_TIMEOUT_MS)
+
+
+def apply_statement_timeout(session: AsyncSession, timeout_ms: int):
+    """
+    Устанавливает statement_timeout в начале каждой транзакции сессии. Значение локально для транзакции
+    (set_config(..., true)), поэтому не остается на соединении после его возврата в пул
+
+    Args:
+        session (AsyncSession): Сессия
+        timeout_ms (int): Ограничение времени одного запроса в миллисекундах, 0 - ограничение сервера
+    """
+    if timeout_ms <= 0:
+        return
+    statement = f"SELECT set_config('statement_timeout', '{int(timeout_ms)}', true)"
+
+    def set_timeout(sync_session, transaction, connection):
+        connection.exec_driver_sql(statement)
+
+    event.listen(session.sync_session, "after_begin", set_timeout)
+
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """
+    Проверяет, что ошибка базы данных вызвана превышением statement_timeout
+    """
+    return isinstance(error, DBAPIError) and getattr(error.orig, "sqlstate", None) == QUERY_CANCELED_SQLSTATE
+
+
+async def provide_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Возвращает асинхронную сессию для работы
+    Возвращает асинхронную сессию для работы с statement_timeout маршрута запроса
 
     Yields:
         async_session (AsyncSession): Асинхронная сессия для работы с базой данных
     """
+    route = request.scope.get("route")
     async with AsyncSessionLocal() as session:
+        apply_statement_timeout(session, statement_timeout_for(getattr(route, "path", None)))
         yield session
@@ -0,0 +1,36 @@
+from typing import FrozenSet, Optional
+from fastapi import HTTPException, Query, status
+from app.api.models.organisation import ORGANIZATION_FIELDS
+
+
+def organization_fields(
+    fields: Optional[str] = Query(
+        default=None,
+        description=f"Поля организации через запятую ({', '.join(sorted(ORGANIZATION_FIELDS))}). По умолчанию - все поля",
+        examples=["id,name"],
+    ),
+) -> Optional[FrozenSet[str]]:
+    """
+    Разбирает параметр fields со списком запрашиваемых полей организации
+
+    Returns:
+        fields (Optional[FrozenSet[str]]): Запрошенные поля или None, если нужны все поля
+
+    Raises:
+        HTTPException: Если список пуст или содержит неизвестные поля
+    """
+    if fields is None:
+        return None
+
+    requested = frozenset(field.strip() for field in fields.split(",") if field.strip())
+    if not requested:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Не указано ни одного поля")
+
+    unknown = requested - ORGANIZATION_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные поля: {', '.join(sorted(unknown))}",
+        )
+
+    return None if requested == ORGANIZATION_FIELDS else requested
@@ -0,0 +1,32 @@
+from typing import Annotated
+from fastapi import Depends, HTTPException, status
+from .auth_dependency import require_bearer_auth
+from app.core.admission import TokenBucketLimiter
+from app.core.metrics import Counter, metrics_registry
+from app.core.settings import app_settings
+from app.db.models.user_model import User
+
+rate_limited_total = metrics_registry.register(
+    Counter("rate_limited_requests_total", "Количество запросов, отклоненных ограничением частоты пользователя")
+)
+
+rate_limiter = TokenBucketLimiter(app_settings.RATE_LIMIT_PER_SECOND, app_settings.RATE_LIMIT_BURST)
+
+
+async def enforce_rate_limit(user: Annotated[User, Depends(require_bearer_auth)]):
+    """
+    Ограничивает частоту запросов пользователя, если задан RATE_LIMIT_PER_SECOND
+
+    Raises:
+        HTTPException: 429 с заголовком Retry-After, если пользователь превысил ограничение
+    """
+    if not rate_limiter.enabled:
+        return
+    retry_after = rate_limiter.acquire(user.id)
+    if retry_after is not None:
+        rate_limited_total.inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много запросов, повторите позже",
+            headers={"Retry-After": str(retry_after)},
+        )
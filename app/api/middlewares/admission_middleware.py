@@ -0,0 +1,158 @@
+import json
+from time import perf_counter
+from typing import Dict, Mapping, Optional, Sequence
+from starlette.routing import Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.api.middlewares.route_resolver import UNMATCHED_ROUTE, RouteResolver
+from app.core.admission import ConcurrencyLimiter
+from app.core.metrics import Counter, Gauge, Histogram, metrics_registry
+
+admission_rejected_total = metrics_registry.register(
+    Counter(
+        "admission_rejected_total",
+        "Количество запросов, отклоненных контролем нагрузки",
+        ("route", "reason"),
+    )
+)
+admission_queue_wait = metrics_registry.register(
+    Histogram(
+        "admission_queue_wait_seconds",
+        "Время ожидания запроса в очереди маршрута",
+        ("route",),
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+
+OVERLOADED_DETAIL = "Сервер перегружен, повторите запрос позже"
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware, который ограничивает количество одновременно обрабатываемых запросов воркера размером пула
+    соединений: все маршруты занимают места одного общего ограничения, поэтому вместе не берут из пула больше
+    соединений, чем в нем есть. Для отдельных маршрутов можно задать более строгие ограничения, они действуют
+    внутри общего. Запросы сверх ограничения ждут в очереди не дольше queue_timeout на все ожидания,
+    при заполненной очереди или истекшем ожидании сразу возвращается 503 с заголовком Retry-After. Стоит перед
+    авторизацией и обращением к пулу соединений, поэтому отклоненный запрос не занимает соединение с базой
+
+    Attributes:
+        app (ASGIApp): Оборачиваемое приложение
+        routes (RouteResolver): Определяет шаблон маршрута по роутеру приложения
+        limiter (ConcurrencyLimiter): Общее ограничение воркера, по числу соединений пула
+        route_limits (Mapping[str, int]): Более строгие ограничения для отдельных маршрутов по шаблону пути
+        route_weights (Mapping[str, int]): Сколько мест ограничений занимает один запрос маршрута, по умолчанию 1.
+            Нужен маршрутам, которые держат несколько соединений с базой одновременно (пакетный запрос)
+        queue_size (int): Размер общей очереди и очереди каждого маршрута с отдельным ограничением
+        queue_timeout (float): Бюджет ожидания в очередях в секундах
+        retry_after (int): Значение заголовка Retry-After в секундах
+        exempt_prefixes (Sequence[str]): Пути, которые не ограничиваются (healthcheck, метрики, документация)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        router: Router,
+        concurrency: int,
+        route_limits: Optional[Mapping[str, int]] = None,
+        route_weights: Optional[Mapping[str, int]] = None,
+        queue_size: int = 32,
+        queue_timeout: float = 0.5,
+        retry_after: int = 1,
+        exempt_prefixes: Sequence[str] = ("/healthcheck", "/metrics", "/docs", "/redoc", "/openapi.json"),
+    ):
+        self.app = app
+        self.routes = RouteResolver(router)
+        self.limiter = ConcurrencyLimiter(concurrency, queue_size, queue_timeout)
+        self.route_limits = dict(route_limits or {})
+        self.route_weights = dict(route_weights or {})
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self.route_limiters: Dict[str, ConcurrencyLimiter] = {}
+        self._queued: Dict[str, int] = {}
+        metrics_registry.register(
+            Gauge(
+                "admission_queue_depth",
+                "Количество запросов в очереди маршрута",
+                ("route",),
+                callback=lambda: {(route,): queued for route, queued in self._queued.items()},
+            )
+        )
+
+    def _route_limiter(self, route: str) -> Optional[ConcurrencyLimiter]:
+        limit = self.route_limits.get(route)
+        if limit is None:
+            return None
+        limiter = self.route_limiters.get(route)
+        if limiter is None:
+            limiter = self.route_limiters[route] = ConcurrencyLimiter(limit, self.queue_size, self.queue_timeout)
+        return limiter
+
+    async def _acquire(self, route: str, weight: int) -> Optional[str]:
+        """
+        Занимает места в ограничении маршрута (если оно задано), затем в общем ограничении. Оба ожидания
+        укладываются в один бюджет queue_timeout
+
+        Returns:
+            rejection (Optional[str]): None, если места получены, иначе причина отказа
+        """
+        started = perf_counter()
+        route_limiter = self._route_limiter(route)
+        if route_limiter is not None:
+            rejection = await route_limiter.acquire(weight)
+            if rejection is not None:
+                return rejection
+        try:
+            rejection = await self.limiter.acquire(weight, self.queue_timeout - (perf_counter() - started))
+        except BaseException:
+            if route_limiter is not None:
+                route_limiter.release(weight)
+            raise
+        if rejection is not None and route_limiter is not None:
+            route_limiter.release(weight)
+        return rejection
+
+    def _release(self, route: str, weight: int):
+        self.limiter.release(weight)
+        route_limiter = self.route_limiters.get(route)
+        if route_limiter is not None:
+            route_limiter.release(weight)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            return await self.app(scope, receive, send)
+        route = self.routes.resolve(scope)
+        if route == UNMATCHED_ROUTE:
+            return await self.app(scope, receive, send)
+
+        weight = self.route_weights.get(route, 1)
+        started = perf_counter()
+        self._queued[route] = self._queued.get(route, 0) + 1
+        try:
+            rejection = await self._acquire(route, weight)
+        finally:
+            self._queued[route] -= 1
+        admission_queue_wait.observe(perf_counter() - started, (route,))
+        if rejection is not None:
+            admission_rejected_total.inc((route, rejection))
+            return await self._reject(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release(route, weight)
+
+    async def _reject(self, send: Send):
+        body = json.dumps({"detail": OVERLOADED_DETAIL}, ensure_ascii=False).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,125 @@
+from typing import List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.compression import CompressedVariants, available_compressors, negotiate_encoding
+from app.core.metrics import Counter, Histogram, metrics_registry
+
+# Типы содержимого, которые имеет смысл сжимать
+_COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"image/svg+xml")
+# Ключ в request.state, под которым обработчик может передать ключ кэша сжатых вариантов ответа
+COMPRESSION_KEY_STATE = "compression_key"
+# Тела больше этого размера сжимаются в пуле потоков, чтобы не блокировать event loop
+_THREADPOOL_THRESHOLD = 256 * 1024
+
+http_compressed_responses_total = metrics_registry.register(
+    Counter(
+        "http_compressed_responses_total",
+        "Количество сжатых ответов",
+        ("encoding",),
+    )
+)
+http_compression_bytes_saved_total = metrics_registry.register(
+    Counter(
+        "http_compression_bytes_saved_total",
+        "Сколько байт сэкономлено сжатием ответов",
+        ("encoding",),
+    )
+)
+http_compression_ratio = metrics_registry.register(
+    Histogram(
+        "http_compression_ratio",
+        "Отношение размера сжатого ответа к исходному",
+        ("encoding",),
+        buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0),
+    )
+)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware, который сжимает ответы gzip, brotli или zstd по заголовку Accept-Encoding клиента.
+    Сжимаются только ответы одним сообщением (не потоковые) текстового типа размером от minimum_size байт.
+    Сжатые варианты кэшируются, поэтому повторяющиеся ответы сжимаются один раз: обработчик, который отдает
+    ответ из своего кэша, может передать ключ записи в request.state.compression_key, тогда сжатые варианты
+    хранятся под этим ключом, иначе ключом служит хэш тела
+
+    Attributes:
+        app (ASGIApp): Оборачиваемое приложение
+        minimum_size (int): Минимальный размер тела ответа в байтах, начиная с которого он сжимается
+        variants (CompressedVariants): Алгоритмы сжатия и кэш сжатых вариантов
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, cache_bytes: int = 0):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.variants = CompressedVariants(available_compressors(), cache_bytes)
+        if self.variants.cache is not None:
+            metrics_registry.register_cache("compression", self.variants.cache.stats)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        encoding = None
+        if accept_encoding:
+            encoding = negotiate_encoding(accept_encoding.decode("latin-1"), self.variants.compressors)
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                return await send(message)
+
+            passthrough = True
+            headers = list(start_message.get("headers", []))
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or _header(headers, b"content-encoding") is not None
+                or not (_header(headers, b"content-type") or b"").startswith(_COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                return await send(message)
+
+            vary = _header(headers, b"vary")
+            headers = [(key, value) for key, value in headers if key.lower() != b"vary"]
+            headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            if encoding is not None:
+                key = scope.get("state", {}).get(COMPRESSION_KEY_STATE)
+                if len(body) >= _THREADPOOL_THRESHOLD:
+                    # В пул потоков уходит только сжатие: кэш вариантов не потокобезопасен и используется
+                    # только из потока event loop
+                    cache_key = self.variants.cache_key(body, encoding, key)
+                    compressed = self.variants.cached(cache_key)
+                    if compressed is None:
+                        compressed = await run_in_threadpool(self.variants.compressors[encoding], body)
+                        self.variants.store(cache_key, compressed)
+                else:
+                    compressed = self.variants.compress(body, encoding, key)
+                http_compressed_responses_total.inc((encoding,))
+                http_compression_bytes_saved_total.inc((encoding,), len(body) - len(compressed))
+                http_compression_ratio.observe(len(compressed) / len(body), (encoding,))
+                body = compressed
+                headers = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"content-length", str(len(body)).encode()))
+
+            await send({**start_message, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
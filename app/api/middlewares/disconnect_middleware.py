@@ -0,0 +1,70 @@
+import asyncio
+from starlette.routing import Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.api.middlewares.route_resolver import RouteResolver
+from app.core.metrics import Counter, metrics_registry
+
+client_disconnects_total = metrics_registry.register(
+    Counter(
+        "http_client_disconnects_total",
+        "Количество запросов, обработка которых прервана из-за отключения клиента",
+        ("route",),
+    )
+)
+
+
+class DisconnectMiddleware:
+    """
+    ASGI middleware, который прерывает обработку запроса, если клиент отключился до получения ответа.
+    Приложение выполняется в отдельной задаче, а receive читается параллельно с ним: при http.disconnect задача
+    отменяется, asyncpg отправляет серверу отмену выполняемого запроса, и соединение сразу возвращается в пул,
+    не дожидаясь результата, который уже некому отдать
+
+    Attributes:
+        app (ASGIApp): Оборачиваемое приложение
+        routes (RouteResolver): Определяет шаблон маршрута по роутеру приложения
+    """
+
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.routes = RouteResolver(router)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        response_complete = False
+        disconnected = False
+
+        async def send_tracking(message: Message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Флаг ставится до отправки: отключение во время отправки последней части уже не прерывает ответ
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.create_task(self.app(scope, messages.get, send_tracking))
+
+        async def listen_for_disconnect():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        disconnected = True
+                        handler.cancel()
+                    return
+
+        listener = asyncio.create_task(listen_for_disconnect())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if not disconnected or (current is not None and current.cancelling()):
+                raise
+            client_disconnects_total.inc((self.routes.resolve(scope),))
+        finally:
+            handler.cancel()
+            listener.cancel()
@@ -0,0 +1,54 @@
+from time import perf_counter
+from starlette.routing import Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.api.middlewares.route_resolver import RouteResolver
+from app.core.metrics import (
+    http_request_duration,
+    http_requests_in_progress,
+    http_requests_total,
+)
+
+# Статус nginx для запросов, которые клиент закрыл до получения ответа
+CLIENT_CLOSED_REQUEST = 499
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware, который собирает гистограмму времени ответа, количество ответов по статусам
+    и количество запросов в обработке по каждому маршруту
+
+    Attributes:
+        app (ASGIApp): Оборачиваемое приложение
+        routes (RouteResolver): Определяет шаблон маршрута по роутеру приложения
+    """
+
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.routes = RouteResolver(router)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        labels = (scope["method"], self.routes.resolve(scope))
+        status_code = 500
+        response_started = False
+
+        async def send_with_status(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            await send(message)
+
+        http_requests_in_progress.inc(labels)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+            if not response_started:
+                # Приложение завершилось без ответа: обработка прервана из-за отключения клиента
+                status_code = CLIENT_CLOSED_REQUEST
+        finally:
+            http_request_duration.observe(perf_counter() - started, labels)
+            http_requests_total.inc(labels + (str(status_code),))
+            http_requests_in_progress.dec(labels)
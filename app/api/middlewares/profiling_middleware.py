@@ -0,0 +1,153 @@
+import asyncio
+import hmac
+import importlib.util
+import logging
+import random
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from uuid import uuid4
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_OUTPUT_HEADER = b"x-profile-output"
+_UNSAFE_PATH_CHARACTERS = re.compile(r"[^A-Za-z0-9]+")
+
+
+def profiler_available() -> bool:
+    """
+    Проверяет, установлен ли pyinstrument (группа зависимостей profiling), без его импорта
+    """
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware, который по запросу профилирует обработку HTTP-запроса целиком: ожидания в event loop,
+    выполнение запросов к базе, гидрацию ORM, маппер и сериализацию ответа. Профиль сохраняется в формате
+    speedscope (открывается на https://www.speedscope.app как flamegraph) или возвращается вместо ответа.
+
+    Профилирование включается заголовком X-Profile с администраторским токеном (с X-Profile-Output: inline
+    вместо ответа возвращается сам профиль) или случайно для доли запросов sample_rate. Одновременно
+    профилируется не больше одного запроса, чтобы время CPU в профиле относилось к нему
+
+    Attributes:
+        app (ASGIApp): Оборачиваемое приложение
+        token (Optional[str]): Токен для заголовка X-Profile. Если не задан, профилирование по заголовку выключено
+        sample_rate (float): Доля запросов, которые профилируются без заголовка
+        output_dir (Path): Каталог для сохранения профилей
+        interval (float): Интервал сэмплирования стека в секундах
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        output_dir: str = "profiles",
+        interval_ms: float = 1.0,
+    ):
+        try:
+            from pyinstrument import Profiler
+            from pyinstrument.renderers import SpeedscopeRenderer
+        except ImportError as error:
+            raise RuntimeError(
+                "Для профилирования запросов нужен пакет pyinstrument (uv sync --group profiling)"
+            ) from error
+
+        self.app = app
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.interval = interval_ms / 1000
+        self._profiler_class = Profiler
+        self._renderer_class = SpeedscopeRenderer
+        self._active = False
+
+    def _requested_output(self, scope: Scope) -> Optional[str]:
+        """
+        Returns:
+            output (Optional[str]): "inline", "file" или None, если запрос не нужно профилировать
+        """
+        if self.token is not None:
+            headers = dict(scope["headers"])
+            provided = headers.get(PROFILE_HEADER)
+            if provided is not None and hmac.compare_digest(provided, self.token):
+                return "inline" if headers.get(PROFILE_OUTPUT_HEADER) == b"inline" else "file"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "file"
+        return None
+
+    def _profile_name(self, scope: Scope) -> str:
+        path = _UNSAFE_PATH_CHARACTERS.sub("_", scope["path"]).strip("_") or "root"
+        return (
+            f"{datetime.now():%Y%m%dT%H%M%S}-{scope['method'].lower()}-{path}"
+            f"-{uuid4().hex[:8]}.speedscope.json"
+        )
+
+    def _save(self, name: str, profile: str):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        (self.output_dir / name).write_text(profile, encoding="utf-8")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self._active:
+            return await self.app(scope, receive, send)
+
+        output = self._requested_output(scope)
+        if output is None:
+            return await self.app(scope, receive, send)
+
+        name = self._profile_name(scope)
+
+        async def send_with_profile_name(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-file", name.encode())
+                ]
+            await send(message)
+
+        async def discard_response(message: Message):
+            pass
+
+        self._active = True
+        profiler = self._profiler_class(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(
+                scope,
+                receive,
+                discard_response if output == "inline" else send_with_profile_name,
+            )
+        finally:
+            session = profiler.stop()
+            self._active = False
+
+        profile = await asyncio.to_thread(profiler.output, self._renderer_class())
+
+        if output == "inline":
+            body = profile.encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profile-wall-ms", f"{session.duration * 1000:.1f}".encode()),
+                    (b"x-profile-cpu-ms", f"{session.cpu_time * 1000:.1f}".encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        await asyncio.to_thread(self._save, name, profile)
+        logger.info(
+            "Профиль %s %s сохранен в %s (%.1f мс, CPU %.1f мс)",
+            scope["method"],
+            scope["path"],
+            self.output_dir / name,
+            session.duration * 1000,
+            session.cpu_time * 1000,
+        )
@@ -0,0 +1,37 @@
+from typing import Dict
+from starlette.routing import Match, Router
+from starlette.types import Scope
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RouteResolver:
+    """
+    Определяет шаблон маршрута, которым будет обработан запрос, до его обработки роутером
+
+    Attributes:
+        router (Router): Роутер приложения
+    """
+
+    def __init__(self, router: Router):
+        self.router = router
+        self._routes_by_path: Dict[str, str] = {}
+
+    def resolve(self, scope: Scope) -> str:
+        """
+        Возвращает шаблон маршрута или UNMATCHED_ROUTE. Кэшируются только статические пути,
+        поэтому произвольные URL не раздувают ни кэш, ни количество временных рядов метрик
+        """
+        path = scope["path"]
+        route = self._routes_by_path.get(path)
+        if route is not None:
+            return route
+
+        for candidate in self.router.routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = getattr(candidate, "path", UNMATCHED_ROUTE)
+                if route == path:
+                    self._routes_by_path[path] = route
+                return route
+        return UNMATCHED_ROUTE
@@ -0,0 +1,70 @@
+import logging
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.metrics import Histogram, metrics_registry
+from app.db.events.sql_tracer import start_request_trace
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = b"x-db-query-count"
+QUERY_TIME_HEADER = b"x-db-time-ms"
+
+http_request_db_queries = metrics_registry.register(
+    Histogram(
+        "http_request_db_queries",
+        "Количество SQL-запросов на HTTP-запрос",
+        ("route",),
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+    )
+)
+http_request_db_seconds = metrics_registry.register(
+    Histogram(
+        "http_request_db_seconds",
+        "Суммарное время SQL-запросов на HTTP-запрос",
+        ("route",),
+    )
+)
+
+
+class SQLTracingMiddleware:
+    """
+    ASGI middleware, который собирает SQL-статистику каждого HTTP-запроса. В режиме отладки количество
+    запросов и время в базе добавляются в заголовки ответа, повторяющиеся однотипные запросы попадают в лог как вероятный N+1
+
+    Attributes:
+        app (ASGIApp): Оборачиваемое приложение
+        expose_headers (bool): Добавлять ли заголовки X-DB-Query-Count и X-DB-Time-Ms
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = False):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = start_request_trace()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (QUERY_COUNT_HEADER, str(stats.count).encode()),
+                    (QUERY_TIME_HEADER, f"{stats.total_time * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        send_message = send_with_headers if self.expose_headers else send
+        try:
+            await self.app(scope, receive, send_message)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_db_queries.observe(stats.count, (route,))
+            http_request_db_seconds.observe(stats.total_time, (route,))
+            if stats.repeated:
+                logger.warning(
+                    "Вероятный N+1 в %s %s (%d запросов): %s",
+                    scope["method"],
+                    scope["path"],
+                    stats.count,
+                    "; ".join(f"{stats.shapes[shape]}x {shape}" for shape in stats.repeated),
+                )
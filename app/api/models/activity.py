@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class ActivityModel(BaseModel):
@@ -10,4 +11,22 @@ class ActivityModel(BaseModel):
     """
 
     id: int
-    name: str
\ No newline at end of file
+    name: str
+
+class ActivityFacet(BaseModel):
+    """
+    Количество организаций с видом деятельности
+
+    Attributes:
+        id (int): ID вида деятельности
+        name (str): Название вида деятельности
+        parent (Optional[int]): ID родительского вида деятельности
+        depth (int): Уровень вложенности вида деятельности
+        organizations (int): Количество организаций с этим видом деятельности (при агрегации - с ним или его подвидами)
+    """
+
+    id: int
+    name: str
+    parent: Optional[int] = None
+    depth: int
+    organizations: int
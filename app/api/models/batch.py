@@ -0,0 +1,102 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class BatchOperation(str, Enum):
+    """
+    Операции OrganizationService и LocationService, доступные в пакетном запросе
+    """
+
+    GET_ORGANIZATION_BY_ID = "get_organization_by_id"
+    GET_ORGANIZATIONS_FROM_SPECIFIC_BUILDING = "get_organizations_from_specific_building"
+    GET_ORGANIZATIONS_BY_ACTIVITY_ID = "get_organizations_by_activity_id"
+    SEARCH_ORGANIZATION_BY_NAME = "search_organization_by_name"
+    SEARCH_ORGANIZATIONS_WITH_ACTIVITIES = "search_organizations_with_activities"
+    GET_ORGANIZATIONS_IN_RADIUS = "get_organizations_in_radius"
+    GET_ORGANIZATIONS_IN_SQUARE = "get_organizations_in_square"
+
+
+class OrganizationByIdParams(BaseModel):
+    organization_id: int
+
+
+class BuildingParams(BaseModel):
+    building_id: int
+
+
+class ActivityParams(BaseModel):
+    activity_id: int
+
+
+class NameParams(BaseModel):
+    name: str
+
+
+class RadiusParams(BaseModel):
+    center_latitude: float
+    center_longitude: float
+    radius_km: float
+
+
+class SquareParams(BaseModel):
+    ne_lat: float
+    ne_lon: float
+    sw_lat: float
+    sw_lon: float
+
+
+class BatchSubRequest(BaseModel):
+    """
+    Один запрос из пакета
+
+    Attributes:
+        id (Optional[str]): Идентификатор запроса на стороне клиента, возвращается в результате
+        operation (BatchOperation): Вызываемая операция сервиса
+        params (Dict[str, Any]): Аргументы операции, названия совпадают с аргументами метода сервиса
+        fields (Optional[str]): Поля организаций через запятую, как в параметре fields эндпоинтов
+    """
+
+    id: Optional[str] = None
+    operation: BatchOperation
+    params: Dict[str, Any] = Field(default_factory=dict)
+    fields: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    """
+    Пакет запросов, выполняемых одним HTTP-запросом
+
+    Attributes:
+        requests (List[BatchSubRequest]): Запросы в пакете
+    """
+
+    requests: List[BatchSubRequest] = Field(min_length=1)
+
+
+class BatchItemResult(BaseModel):
+    """
+    Результат одного запроса из пакета
+
+    Attributes:
+        id (Optional[str]): Идентификатор запроса на стороне клиента
+        status (int): HTTP-статус, который вернул бы соответствующий эндпоинт
+        result (Any): Результат операции, если она выполнена успешно
+        detail (Any): Описание ошибки, если операция завершилась ошибкой
+    """
+
+    id: Optional[str] = None
+    status: int
+    result: Any = None
+    detail: Any = None
+
+
+class BatchResponse(BaseModel):
+    """
+    Результаты пакета в порядке запросов
+
+    Attributes:
+        results (List[BatchItemResult]): Результаты запросов
+    """
+
+    results: List[BatchItemResult]
@@ -1,3 +1,5 @@
+from enum import Enum
+from typing import Optional
 from pydantic import BaseModel
 
 class BuildingModel(BaseModel):
@@ -14,4 +16,28 @@ class BuildingModel(BaseModel):
     id: int
     address: str
     latitude: float
-    longitude: float
\ No newline at end of file
+    longitude: float
+
+
+class AddressSearchMode(str, Enum):
+    """
+    Режим поиска зданий по адресу
+
+    Attributes:
+        PREFIX: В адресе есть все слова запроса, каждое слово запроса - начало слова адреса (подсказки при вводе)
+        FUZZY: В адресе есть хотя бы одно слово запроса, выше в выдаче адреса с большим числом совпавших слов
+    """
+
+    PREFIX = "prefix"
+    FUZZY = "fuzzy"
+
+
+class BuildingSearchResult(BuildingModel):
+    """
+    Здание, найденное по адресу
+
+    Attributes:
+        organizations (Optional[int]): Количество организаций в здании, если оно запрошено
+    """
+
+    organizations: Optional[int] = None
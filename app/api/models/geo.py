@@ -0,0 +1,35 @@
+from typing import List, Tuple
+from pydantic import BaseModel, Field
+
+# Ограничения на количество вершин и ширину коридора, чтобы один запрос не занимал воркер надолго
+MAX_POLYGON_VERTICES = 10_000
+MAX_ROUTE_POINTS = 5_000
+MAX_ROUTE_BUFFER_KM = 50.0
+
+Point = Tuple[float, float]
+
+
+class PolygonSearch(BaseModel):
+    """
+    Многоугольник для поиска организаций
+
+    Attributes:
+        polygon (List[Point]): Внешний контур из пар (широта, долгота), замыкать повтором первой вершины не обязательно
+        holes (List[List[Point]]): Контуры дыр, организации в которых в результат не попадают
+    """
+
+    polygon: List[Point] = Field(min_length=3, max_length=MAX_POLYGON_VERTICES)
+    holes: List[List[Point]] = Field(default_factory=list)
+
+
+class CorridorSearch(BaseModel):
+    """
+    Маршрут для поиска организаций вдоль него
+
+    Attributes:
+        route (List[Point]): Вершины маршрута из пар (широта, долгота)
+        buffer_km (float): Максимальное расстояние от маршрута в километрах
+    """
+
+    route: List[Point] = Field(min_length=2, max_length=MAX_ROUTE_POINTS)
+    buffer_km: float = Field(gt=0, le=MAX_ROUTE_BUFFER_KM)
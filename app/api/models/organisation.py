@@ -1,5 +1,5 @@
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional, Union
+from pydantic import BaseModel, Field
 from .activity import ActivityModel
 
 class Organization(BaseModel):
@@ -17,4 +17,52 @@ class Organization(BaseModel):
     name: str
     address: str
     phones: List[str]
-    activities: List[ActivityModel]
\ No newline at end of file
+    activities: List[ActivityModel]
+
+
+ORGANIZATION_FIELDS = frozenset(Organization.model_fields)
+
+
+class PartialOrganization(BaseModel):
+    """
+    Модель организации, в которой заполнены только поля, запрошенные через параметр fields.
+    Отдается с response_model_exclude_unset, поэтому незапрошенные поля в ответ не попадают
+
+    Attributes:
+        id (Optional[int]):  ID организации
+        name (Optional[str]): Название организции
+        address (Optional[str]): Адрес организации
+        phones (Optional[List[str]]): Телефоны организации
+        activities (Optional[List[Activity]]): Виды деятельности организации
+    """
+    id: Optional[int] = None
+    name: Optional[str] = None
+    address: Optional[str] = None
+    phones: Optional[List[str]] = None
+    activities: Optional[List[ActivityModel]] = None
+
+
+# Ограничение на количество номеров в одном запросе поиска по телефонам
+MAX_PHONE_LOOKUPS = 100
+
+
+class PhoneLookupRequest(BaseModel):
+    """
+    Номера телефонов для поиска организаций
+
+    Attributes:
+        phones (List[str]): Номера в любом формате записи
+    """
+    phones: List[str] = Field(min_length=1, max_length=MAX_PHONE_LOOKUPS)
+
+
+class PhoneLookupResult(BaseModel):
+    """
+    Результат поиска организации по одному номеру
+
+    Attributes:
+        phone (str): Номер из запроса
+        organization (Optional[Union[Organization, PartialOrganization]]): Организация с этим номером или None
+    """
+    phone: str
+    organization: Optional[Union[Organization, PartialOrganization]] = None
@@ -62,4 +62,4 @@ async def register_user(
         token = await service.register_user(login, password)
         return TokenResponse(token=token)
     except IncorrectCredentialsError:
-        raise HTTPException(detail="Пользователь с таким логином уже существует")
+        raise HTTPException(status_code=400, detail="Пользователь с таким логином уже существует")
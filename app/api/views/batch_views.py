@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Tuple, Type
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from app.api.dependencies.db_dependency import (
+    STATEMENT_TIMEOUT_DETAIL,
+    AsyncSessionLocal,
+    apply_statement_timeout,
+    is_statement_timeout,
+    statement_timeout_for,
+)
+from app.api.dependencies.fields_dependency import organization_fields
+from app.api.models.batch import (
+    ActivityParams,
+    BatchItemResult,
+    BatchOperation,
+    BatchRequest,
+    BatchResponse,
+    BatchSubRequest,
+    BuildingParams,
+    NameParams,
+    OrganizationByIdParams,
+    RadiusParams,
+    SquareParams,
+)
+from app.core.settings import app_settings
+from app.services.base_service import BaseService
+from app.services.organization_services import LocationService, OrganizationService
+from app.exceptions.service_exceptions import (
+    ActivityNotFoundError,
+    BuildingNotFoundException,
+    BuildingWithNoOrganizationsError,
+    NoBuildingsFoundError,
+    NoOrganizationsFoundError,
+    OrganizationNotFoundError,
+)
+
+logger = logging.getLogger(__name__)
+
+batch_router = APIRouter()
+
+
+@dataclass(frozen=True)
+class _Operation:
+    """
+    Описание операции пакетного запроса
+
+    Attributes:
+        service (Type[BaseService]): Сервис, в котором объявлена операция
+        params (Type[BaseModel]): Модель аргументов операции
+        errors (Dict[Type[Exception], Tuple[int, str]]): Ошибки сервиса и соответствующие им статус и описание,
+            такие же, как у эндпоинта операции
+    """
+
+    service: Type[BaseService]
+    params: Type[BaseModel]
+    errors: Dict[Type[Exception], Tuple[int, str]] = field(default_factory=dict)
+
+    def error_response(self, error: Exception) -> Tuple[int, str]:
+        """
+        Возвращает статус и описание ошибки сервиса. Ищется первый подходящий класс, поэтому наследники
+        объявленных ошибок тоже обрабатываются
+        """
+        return next(response for error_type, response in self.errors.items() if isinstance(error, error_type))
+
+
+_OPERATIONS: Dict[BatchOperation, _Operation] = {
+    BatchOperation.GET_ORGANIZATION_BY_ID: _Operation(
+        OrganizationService,
+        OrganizationByIdParams,
+        {OrganizationNotFoundError: (404, "Организация не найдена")},
+    ),
+    BatchOperation.GET_ORGANIZATIONS_FROM_SPECIFIC_BUILDING: _Operation(
+        OrganizationService,
+        BuildingParams,
+        {
+            BuildingNotFoundException: (404, "Здание не найдено"),
+            BuildingWithNoOrganizationsError: (404, "В здании не найдено организаций"),
+        },
+    ),
+    BatchOperation.GET_ORGANIZATIONS_BY_ACTIVITY_ID: _Operation(
+        OrganizationService,
+        ActivityParams,
+        {
+            NoOrganizationsFoundError: (
+                404,
+                "Не найдено организаций, занимающихся указанным видом деятельности",
+            )
+        },
+    ),
+    BatchOperation.SEARCH_ORGANIZATION_BY_NAME: _Operation(
+        OrganizationService,
+        NameParams,
+        {NoOrganizationsFoundError: (404, "Не найдено подходящих организаций")},
+    ),
+    BatchOperation.SEARCH_ORGANIZATIONS_WITH_ACTIVITIES: _Operation(
+        OrganizationService,
+        ActivityParams,
+        {
+            NoOrganizationsFoundError: (404, "Не найдено организаций, подходящих под условия"),
+            ActivityNotFoundError: (404, "Не найдено указанного вида деятельности"),
+        },
+    ),
+    BatchOperation.GET_ORGANIZATIONS_IN_RADIUS: _Operation(
+        LocationService,
+        RadiusParams,
+        {
+            NoBuildingsFoundError: (404, "Не найдено зданий в указанном радиусе"),
+            NoOrganizationsFoundError: (404, "Не найдено организаций в указанном радиусе"),
+        },
+    ),
+    BatchOperation.GET_ORGANIZATIONS_IN_SQUARE: _Operation(
+        LocationService,
+        SquareParams,
+        {
+            NoBuildingsFoundError: (404, "Не найдено зданий в указанной области"),
+            NoOrganizationsFoundError: (404, "Не найдено организаций в указанной области"),
+        },
+    ),
+}
+
+
+async def _execute(
+    request: BatchSubRequest, semaphore: asyncio.Semaphore, statement_timeout_ms: int
+) -> BatchItemResult:
+    """
+    Выполняет один запрос пакета в отдельной сессии из пула. Ошибки запроса возвращаются в его результате
+    и не влияют на остальные запросы пакета
+    """
+    operation = _OPERATIONS[request.operation]
+    try:
+        params = operation.params.model_validate(request.params)
+        fields = organization_fields(request.fields) if request.fields is not None else None
+    except ValidationError as error:
+        return BatchItemResult(
+            id=request.id,
+            status=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=error.errors(include_url=False, include_context=False),
+        )
+    except HTTPException as error:
+        return BatchItemResult(id=request.id, status=error.status_code, detail=error.detail)
+
+    async with semaphore:
+        async with AsyncSessionLocal() as session:
+            apply_statement_timeout(session, statement_timeout_ms)
+            method = getattr(operation.service(session), request.operation.value)
+            try:
+                result = await method(**params.model_dump(), fields=fields)
+            except tuple(operation.errors) as error:
+                error_status, detail = operation.error_response(error)
+                return BatchItemResult(id=request.id, status=error_status, detail=detail)
+            except Exception as error:
+                if is_statement_timeout(error):
+                    return BatchItemResult(
+                        id=request.id,
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail=STATEMENT_TIMEOUT_DETAIL,
+                    )
+                logger.exception("Ошибка при выполнении %s из пакетного запроса", request.operation.value)
+                return BatchItemResult(
+                    id=request.id,
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Внутренняя ошибка сервера",
+                )
+    return BatchItemResult(id=request.id, status=status.HTTP_200_OK, result=result)
+
+
+@batch_router.post(
+    "",
+    response_model_exclude_unset=True,
+    summary="Пакетный запрос",
+    description=(
+        "Выполняет несколько операций OrganizationService и LocationService одним HTTP-запросом с одной авторизацией. "
+        "Операции выполняются параллельно в отдельных сессиях (не больше BATCH_CONCURRENCY одновременно), результаты "
+        "возвращаются в порядке запросов. Ошибка операции не прерывает пакет: у ее результата будет статус и описание, "
+        "которые вернул бы соответствующий эндпоинт"
+    ),
+    responses={
+        400: {
+            "description": "В пакете слишком много запросов",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": f"Слишком много запросов в пакете (максимум {app_settings.BATCH_MAX_REQUESTS})"
+                    }
+                }
+            },
+        },
+    },
+)
+async def execute_batch(batch: BatchRequest, request: Request) -> BatchResponse:
+    if len(batch.requests) > app_settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много запросов в пакете (максимум {app_settings.BATCH_MAX_REQUESTS})",
+        )
+
+    semaphore = asyncio.Semaphore(app_settings.BATCH_CONCURRENCY)
+    statement_timeout_ms = statement_timeout_for(request.scope["route"].path)
+    results = await asyncio.gather(
+        *(_execute(item, semaphore, statement_timeout_ms) for item in batch.requests)
+    )
+    return BatchResponse(results=list(results))
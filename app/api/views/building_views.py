@@ -1,12 +1,18 @@
-from typing import List, Annotated
+from typing import Annotated, FrozenSet, List, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, Depends, Query, HTTPException
-from ..models.organisation import Organization
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from ..models.building import AddressSearchMode, BuildingSearchResult
+from ..models.organisation import Organization, PartialOrganization
 from ..dependencies.db_dependency import provide_session
+from ..dependencies.fields_dependency import organization_fields
+from ..middlewares.compression_middleware import COMPRESSION_KEY_STATE
+from app.core.payload_cache import building_payload_cache, compression_key
+from app.services.building_service import BuildingService
 from app.services.organization_services import OrganizationService
 from app.exceptions.service_exceptions import (
     BuildingNotFoundException,
     BuildingWithNoOrganizationsError,
+    NoBuildingsFoundError,
 )
 
 building_router = APIRouter()
@@ -14,6 +20,8 @@ building_router = APIRouter()
 
 @building_router.get(
     "/get_organizations_from_building",
+    response_model=List[Union[Organization, PartialOrganization]],
+    response_model_exclude_unset=True,
     summary="Список организаций из здания",
     description="Возвращает список организаций, которые находятся в указанном здании",
     responses={
@@ -30,16 +38,55 @@ building_router = APIRouter()
     }
 )
 async def get_organizations_from_building(
+    request: Request,
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     building_id: int = Query(description="ID здания"),
-) -> List[Organization]:
+) -> Response:
     service = OrganizationService(session)
+    version = building_payload_cache.version(building_id)
     try:
-        organizations = await service.get_organizations_from_specific_building(
-            building_id
-        )
-        return organizations
+        payload = await service.get_organizations_payload_from_building(building_id, fields)
     except BuildingNotFoundException:
         raise HTTPException(status_code=404, detail="Здание не найдено")
     except BuildingWithNoOrganizationsError:
         raise HTTPException(status_code=404, detail="В здании не найдено организаций")
+    # Если здание изменилось во время запроса, ответ мог быть собран из данных другой версии
+    if version is not None and version == building_payload_cache.version(building_id):
+        setattr(request.state, COMPRESSION_KEY_STATE, compression_key(building_id, fields, version))
+    return Response(content=payload, media_type="application/json")
+
+
+@building_router.get(
+    "/search_by_address",
+    response_model_exclude_unset=True,
+    summary="Поиск зданий по адресу",
+    description=(
+        "Ищет здания по словам адреса в любом порядке, каждое слово запроса совпадает с началом слова адреса. "
+        "В режиме prefix в адресе должны быть все слова запроса (подсказки при вводе), в режиме fuzzy - хотя бы одно, "
+        "адреса с большим числом совпавших слов выше в выдаче. С with_counts=true для каждого здания возвращается "
+        "количество организаций в нем"
+    ),
+    responses={
+        404: {
+            "description": "Не найдено зданий по указанному адресу",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Не найдено зданий по указанному адресу"}
+                }
+            },
+        },
+    },
+)
+async def search_buildings_by_address(
+    session: Annotated[AsyncSession, Depends(provide_session)],
+    query: str = Query(min_length=1, max_length=200, description="Адрес или его часть"),
+    mode: AddressSearchMode = Query(AddressSearchMode.PREFIX, description="Режим поиска"),
+    limit: int = Query(20, ge=1, le=100, description="Максимальное количество зданий в ответе"),
+    with_counts: bool = Query(False, description="Вернуть количество организаций в каждом здании"),
+) -> List[BuildingSearchResult]:
+    service = BuildingService(session)
+    try:
+        return await service.search_buildings_by_address(query, mode, limit, with_counts)
+    except NoBuildingsFoundError:
+        raise HTTPException(status_code=404, detail="Не найдено зданий по указанному адресу")
@@ -1,9 +1,18 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Annotated, FrozenSet, List, Optional, Union
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.dependencies.db_dependency import provide_session
+from app.api.dependencies.fields_dependency import organization_fields
+from app.services.activity_service import ActivityService
 from app.services.organization_services import OrganizationService, LocationService
-from app.api.models.organisation import Organization
+from app.api.models.activity import ActivityFacet
+from app.api.models.geo import MAX_POLYGON_VERTICES, CorridorSearch, PolygonSearch
+from app.api.models.organisation import (
+    Organization,
+    PartialOrganization,
+    PhoneLookupRequest,
+    PhoneLookupResult,
+)
 from app.exceptions.service_exceptions import (
     OrganizationNotFoundError,
     NoOrganizationsFoundError,
@@ -16,6 +25,7 @@ organizations_router = APIRouter()
 
 @organizations_router.get(
     "/get_organization_by_activity_id",
+    response_model_exclude_unset=True,
     summary="Список организаций по виду деятельности",
     description="Возвращает список организаций, занимающихся указанным видом деятельности",
     responses={
@@ -33,11 +43,12 @@ organizations_router = APIRouter()
 )
 async def get_organization_by_activity_id(
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     activity_id: int = Query(description="ID вида деятельности"),
-) -> List[Organization]:
+) -> List[Union[Organization, PartialOrganization]]:
     service = OrganizationService(session)
     try:
-        result = await service.get_organizations_by_activity_id(activity_id)
+        result = await service.get_organizations_by_activity_id(activity_id, fields)
         return result
     except NoOrganizationsFoundError:
         raise HTTPException(
@@ -48,6 +59,7 @@ async def get_organization_by_activity_id(
 
 @organizations_router.get(
     "/search_organization_by_name",
+    response_model_exclude_unset=True,
     summary="Поиск организаций по имени",
     description="Ищет список организаций по имени",
     responses={
@@ -63,11 +75,12 @@ async def get_organization_by_activity_id(
 )
 async def search_organizations(
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     name: str = Query(description="Название организации"),
-) -> List[Organization]:
+) -> List[Union[Organization, PartialOrganization]]:
     service = OrganizationService(session)
     try:
-        result = await service.search_organization_by_name(name)
+        result = await service.search_organization_by_name(name, fields)
         return result
     except NoOrganizationsFoundError:
         raise HTTPException(status_code=404, detail="Не найдено подходящих организаций")
@@ -75,6 +88,7 @@ async def search_organizations(
 
 @organizations_router.get(
     "/get_organization_by_id",
+    response_model_exclude_unset=True,
     summary="Получение организации по идентификатору",
     description="Возвращает информацию об организации по ее идентификатору",
     responses={
@@ -88,18 +102,66 @@ async def search_organizations(
 )
 async def get_organization_by_id(
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     organization_id: int = Query(description="Идентификатор организации"),
-) -> Organization:
+) -> Union[Organization, PartialOrganization]:
     service = OrganizationService(session)
     try:
-        result = await service.get_organization_by_id(organization_id)
+        result = await service.get_organization_by_id(organization_id, fields)
         return result
     except OrganizationNotFoundError:
         raise HTTPException(status_code=404, detail="Организация не найдена")
 
 
+@organizations_router.get(
+    "/get_organization_by_phone",
+    response_model_exclude_unset=True,
+    summary="Поиск организации по телефону",
+    description="Возвращает организацию по номеру телефона в любом формате записи (+7 (900) 123-45-67, 89001234567 и т.п.)",
+    responses={
+        404: {
+            "description": "Не найдено организации с указанным телефоном",
+            "content": {
+                "application/json": {"example": {"detail": "Организация с таким телефоном не найдена"}}
+            },
+        },
+    },
+)
+async def get_organization_by_phone(
+    session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
+    phone: str = Query(description="Номер телефона"),
+) -> Union[Organization, PartialOrganization]:
+    service = OrganizationService(session)
+    try:
+        return await service.get_organization_by_phone(phone, fields)
+    except OrganizationNotFoundError:
+        raise HTTPException(status_code=404, detail="Организация с таким телефоном не найдена")
+
+
+@organizations_router.post(
+    "/get_organizations_by_phones",
+    response_model_exclude_unset=True,
+    summary="Поиск организаций по нескольким телефонам",
+    description=(
+        "Ищет организации по списку номеров телефонов в любом формате записи. Результаты возвращаются в порядке "
+        "номеров в запросе, для номеров без организации organization равен null"
+    ),
+)
+async def get_organizations_by_phones(
+    session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
+    lookup: PhoneLookupRequest,
+) -> List[PhoneLookupResult]:
+    service = OrganizationService(session)
+    results = await service.get_organizations_by_phones(lookup.phones, fields)
+    return [PhoneLookupResult(phone=phone, organization=organization) for phone, organization in results]
+
+
 @organizations_router.get(
     "/get_organizations_within_radius",
+    response_model=List[Union[Organization, PartialOrganization]],
+    response_model_exclude_unset=True,
     summary="Поиск организаций в радиусе",
     description="Ищет организации в зданиях, расположенные в указанном радиусе",
     responses={
@@ -117,16 +179,17 @@ async def get_organization_by_id(
 )
 async def get_organizations_within_radius(
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     center_lan: float = Query(description="Широта центральной точки"),
     center_lon: float = Query(description="Долгота центральной точки"),
     radius_km: float = Query(description="Радиус в километрах"),
-) -> List[Organization]:
+) -> Response:
     service = LocationService(session)
     try:
-        result = await service.get_organizations_in_radius(
-            center_lan, center_lon, radius_km
+        payload = await service.get_organizations_payload_in_radius(
+            center_lan, center_lon, radius_km, fields
         )
-        return result
+        return Response(content=payload, media_type="application/json")
     except NoBuildingsFoundError:
         raise HTTPException(
             status_code=404, detail="Не найдено зданий в указанном радиусе"
@@ -139,6 +202,8 @@ async def get_organizations_within_radius(
 
 @organizations_router.get(
     "/get_organizations_within_square",
+    response_model=List[Union[Organization, PartialOrganization]],
+    response_model_exclude_unset=True,
     summary="Получение организаций в прямоугольной области",
     description="Возвращает список организаций в прямоугольной области по координатам",
     responses={
@@ -156,17 +221,18 @@ async def get_organizations_within_radius(
 )
 async def get_organizations_within_square(
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     ne_lat: float = Query(description="Северо-восточная широта"),
     ne_lon: float = Query(description="Северо-восточная долгота"),
     sw_lat: float = Query(description="Юго-западная широта"),
     sw_lon: float = Query(description="Юго-западная долгота"),
-) -> List[Organization]:
+) -> Response:
     service = LocationService(session)
     try:
-        results = await service.get_organizations_in_square(
-            ne_lat, ne_lon, sw_lat, sw_lon
+        payload = await service.get_organizations_payload_in_square(
+            ne_lat, ne_lon, sw_lat, sw_lon, fields
         )
-        return results
+        return Response(content=payload, media_type="application/json")
     except NoBuildingsFoundError:
         raise HTTPException(
             status_code=404, detail="Не найдено зданий в указанной области"
@@ -177,8 +243,95 @@ async def get_organizations_within_square(
         )
 
 
+@organizations_router.post(
+    "/get_organizations_within_polygon",
+    response_model_exclude_unset=True,
+    summary="Получение организаций в многоугольнике",
+    description=(
+        "Возвращает список организаций в зданиях внутри многоугольника (зоны доставки, районы). "
+        "Вершины передаются в теле запроса парами [широта, долгота], можно указать контуры дыр"
+    ),
+    responses={
+        400: {
+            "description": "Слишком много вершин",
+            "content": {
+                "application/json": {"example": {"detail": f"В многоугольнике больше {MAX_POLYGON_VERTICES} вершин"}}
+            },
+        },
+        404: {
+            "description": "Не найдено зданий/организаций в указанном многоугольнике",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Не найдено зданий в указанном многоугольнике / Не найдено организаций в указанном многоугольнике"
+                    }
+                }
+            },
+        },
+    },
+)
+async def get_organizations_within_polygon(
+    session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
+    search: PolygonSearch,
+) -> List[Union[Organization, PartialOrganization]]:
+    if len(search.polygon) + sum(len(hole) for hole in search.holes) > MAX_POLYGON_VERTICES:
+        raise HTTPException(
+            status_code=400, detail=f"В многоугольнике больше {MAX_POLYGON_VERTICES} вершин"
+        )
+    service = LocationService(session)
+    try:
+        return await service.get_organizations_in_polygon(
+            [search.polygon, *search.holes], fields
+        )
+    except NoBuildingsFoundError:
+        raise HTTPException(
+            status_code=404, detail="Не найдено зданий в указанном многоугольнике"
+        )
+    except NoOrganizationsFoundError:
+        raise HTTPException(
+            status_code=404, detail="Не найдено организаций в указанном многоугольнике"
+        )
+
+
+@organizations_router.post(
+    "/get_organizations_along_route",
+    response_model_exclude_unset=True,
+    summary="Поиск организаций вдоль маршрута",
+    description=(
+        "Возвращает организации в зданиях не дальше buffer_km от маршрута (ломаной), без повторов и в порядке "
+        "следования вдоль маршрута. Вершины маршрута передаются в теле запроса парами [широта, долгота]"
+    ),
+    responses={
+        404: {
+            "description": "Не найдено зданий/организаций вдоль маршрута",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Не найдено зданий вдоль маршрута / Не найдено организаций вдоль маршрута"
+                    }
+                }
+            },
+        },
+    },
+)
+async def get_organizations_along_route(
+    session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
+    search: CorridorSearch,
+) -> List[Union[Organization, PartialOrganization]]:
+    service = LocationService(session)
+    try:
+        return await service.get_organizations_along_route(search.route, search.buffer_km, fields)
+    except NoBuildingsFoundError:
+        raise HTTPException(status_code=404, detail="Не найдено зданий вдоль маршрута")
+    except NoOrganizationsFoundError:
+        raise HTTPException(status_code=404, detail="Не найдено организаций вдоль маршрута")
+
+
 @organizations_router.get(
     "/search_organization_with_activities",
+    response_model_exclude_unset=True,
     summary="Поиск организаций по дереву видов деятельности",
     description="Ищет организации, составляя дерево видов деятельности, и возвращая все организации, которые занимаются найденными видами деятельности",
     responses={
@@ -192,13 +345,74 @@ async def get_organizations_within_square(
 )
 async def search_organization_with_activities(
     session: Annotated[AsyncSession, Depends(provide_session)],
+    fields: Annotated[Optional[FrozenSet[str]], Depends(organization_fields)],
     activity_id: int = Query(description="ID вида деятельности"),
-) -> List[Organization]:
+) -> List[Union[Organization, PartialOrganization]]:
     service = OrganizationService(session)
     try:
-        result = await service.search_organizations_with_activities(activity_id)
+        result = await service.search_organizations_with_activities(activity_id, fields)
         return result
     except NoOrganizationsFoundError:
         raise HTTPException(status_code=404, detail="Не найдено организаций, подходящих под условия")
     except ActivityNotFoundError:
         raise HTTPException(status_code=404, detail="Не найдено указанного вида деятельности")
+
+
+@organizations_router.get(
+    "/count_organizations_by_activity",
+    summary="Количество организаций по видам деятельности",
+    description=(
+        "Возвращает количество организаций по каждому виду деятельности в здании, прямоугольной области, радиусе "
+        "и/или поддереве видов деятельности (фильтры объединяются через И, без фильтров - по всему каталогу). "
+        "С rollup=true организации засчитываются также родительским видам деятельности"
+    ),
+    responses={
+        400: {
+            "description": "Указаны не все координаты области или круга",
+            "content": {
+                "application/json": {"example": {"detail": "Для поиска в области нужно указать ne_lat, ne_lon, sw_lat и sw_lon"}}
+            },
+        },
+        404: {
+            "description": "Не найдено указанного вида деятельности",
+            "content": {
+                "application/json": {"example": {"detail": "Не найдено указанного вида деятельности"}}
+            },
+        },
+    },
+)
+async def count_organizations_by_activity(
+    session: Annotated[AsyncSession, Depends(provide_session)],
+    building_id: Optional[int] = Query(default=None, description="ID здания"),
+    ne_lat: Optional[float] = Query(default=None, description="Северо-восточная широта"),
+    ne_lon: Optional[float] = Query(default=None, description="Северо-восточная долгота"),
+    sw_lat: Optional[float] = Query(default=None, description="Юго-западная широта"),
+    sw_lon: Optional[float] = Query(default=None, description="Юго-западная долгота"),
+    center_lan: Optional[float] = Query(default=None, description="Широта центральной точки"),
+    center_lon: Optional[float] = Query(default=None, description="Долгота центральной точки"),
+    radius_km: Optional[float] = Query(default=None, description="Радиус в километрах"),
+    activity_id: Optional[int] = Query(default=None, description="ID вида деятельности, по поддереву которого считать"),
+    rollup: bool = Query(default=False, description="Засчитывать организации родительским видам деятельности"),
+) -> List[ActivityFacet]:
+    square = (ne_lat, ne_lon, sw_lat, sw_lon)
+    if any(value is not None for value in square) and None in square:
+        raise HTTPException(
+            status_code=400, detail="Для поиска в области нужно указать ne_lat, ne_lon, sw_lat и sw_lon"
+        )
+    radius = (center_lan, center_lon, radius_km)
+    if any(value is not None for value in radius) and None in radius:
+        raise HTTPException(
+            status_code=400, detail="Для поиска в радиусе нужно указать center_lan, center_lon и radius_km"
+        )
+
+    service = ActivityService(session)
+    try:
+        return await service.count_organizations_by_activity(
+            building_id=building_id,
+            square=square if ne_lat is not None else None,
+            radius=radius if center_lan is not None else None,
+            activity_id=activity_id,
+            rollup=rollup,
+        )
+    except ActivityNotFoundError:
+        raise HTTPException(status_code=404, detail="Не найдено указанного вида деятельности")
@@ -0,0 +1,81 @@
+"""
+Массовый импорт справочных данных из CSV/JSONL файлов
+
+Пример:
+    uv run python -m app.cli.bulk_import --buildings buildings.csv --activities activities.jsonl \\
+        --organisations organisations.csv --phones phones.csv --organisation-activities links.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator
+from app.api.dependencies.db_dependency import AsyncSessionLocal
+from app.services.import_service import BulkImportService, IMPORT_ORDER
+
+# Аргумент командной строки -> целевая таблица
+_ARGUMENTS = {
+    "buildings": "buildings",
+    "activities": "activities",
+    "organisations": "organisations",
+    "phones": "organisation_phones",
+    "organisation_activities": "organisation_actvities",
+}
+
+
+def iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Построчно читает записи из файла, не загружая его в память целиком
+
+    Args:
+        path (Path): Путь к CSV (с заголовком) или JSONL файлу
+
+    Yields:
+        record (Dict[str, Any]): Запись из файла
+    """
+    with path.open(encoding="utf-8", newline="") as source:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(source)
+
+
+async def run_import(files: Dict[str, Path]):
+    """
+    Импортирует файлы в порядке зависимостей между таблицами
+
+    Args:
+        files (Dict[str, Path]): Целевая таблица -> файл с данными
+    """
+    async with AsyncSessionLocal() as session:
+        service = BulkImportService(session)
+        for entity in IMPORT_ORDER:
+            if entity in files:
+                report = await service.import_records(entity, iter_records(files[entity]))
+                print(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовый импорт зданий, видов деятельности, организаций и телефонов")
+    for argument in _ARGUMENTS:
+        parser.add_argument(
+            f"--{argument.replace('_', '-')}", dest=argument, type=Path, help="CSV или JSONL файл"
+        )
+    args = parser.parse_args()
+
+    files = {
+        entity: getattr(args, argument)
+        for argument, entity in _ARGUMENTS.items()
+        if getattr(args, argument) is not None
+    }
+    if not files:
+        parser.error("Не указано ни одного файла для импорта")
+
+    asyncio.run(run_import(files))
+
+
+if __name__ == "__main__":
+    main()
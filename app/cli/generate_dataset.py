@@ -0,0 +1,310 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования и проверки планов запросов.
+При одинаковых параметрах и seed всегда генерирует один и тот же набор данных
+
+Пример:
+    uv run python -m app.cli.generate_dataset --buildings 100000 --seed 42 --truncate
+"""
+import argparse
+import asyncio
+import math
+import random
+from bisect import bisect
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies.db_dependency import AsyncSessionLocal
+from app.services.import_service import BulkImportService, ImportReport
+
+# Город, координаты центра и население в тысячах (влияет на долю зданий и размер города)
+_CITIES: List[Tuple[str, float, float, int]] = [
+    ("Москва", 55.7558, 37.6173, 13100),
+    ("Санкт-Петербург", 59.9343, 30.3351, 5600),
+    ("Новосибирск", 55.0084, 82.9357, 1630),
+    ("Екатеринбург", 56.8389, 60.6057, 1540),
+    ("Казань", 55.7963, 49.1088, 1310),
+    ("Нижний Новгород", 56.2965, 43.9361, 1200),
+    ("Красноярск", 56.0153, 92.8932, 1200),
+    ("Челябинск", 55.1644, 61.4368, 1180),
+    ("Самара", 53.1959, 50.1002, 1160),
+    ("Уфа", 54.7388, 55.9721, 1160),
+    ("Ростов-на-Дону", 47.2357, 39.7015, 1140),
+    ("Краснодар", 45.0355, 38.9753, 1100),
+    ("Омск", 54.9885, 73.3242, 1110),
+    ("Воронеж", 51.6720, 39.1843, 1050),
+    ("Пермь", 58.0105, 56.2502, 1030),
+    ("Волгоград", 48.7080, 44.5133, 1020),
+]
+
+_STREETS = [
+    "Ленина", "Мира", "Советская", "Гагарина", "Пушкина", "Садовая", "Лесная", "Школьная",
+    "Молодежная", "Центральная", "Победы", "Строителей", "Кирова", "Новая", "Набережная",
+    "Заводская", "Октябрьская", "Комсомольская", "Юбилейная", "Луговая",
+]
+
+_ROOT_ACTIVITIES = [
+    "Еда", "Автомобили", "Строительство", "Медицина", "Образование", "Финансы",
+    "Красота", "Спорт", "Туризм", "Связь", "Недвижимость", "Логистика",
+]
+
+_ORGANISATION_FORMS = ["ООО", "ИП", "АО", "ЗАО", "ПАО"]
+_ORGANISATION_WORDS = [
+    "Рога и Копыта", "Вектор", "Альфа", "Меридиан", "Горизонт", "Сфера", "Импульс",
+    "Прогресс", "Восход", "Надежда", "Север", "Парус", "Гранит", "Лидер", "Ресурс",
+]
+
+_PHONE_FORMATS = [
+    "+7 ({0}) {1}-{2}-{3}",
+    "8-{0}-{1}-{2}-{3}",
+    "8 ({0}) {1}{2}{3}",
+    "+7{0}{1}{2}{3}",
+]
+
+
+@dataclass
+class DatasetConfig:
+    """
+    Параметры синтетического набора данных
+
+    Attributes:
+        buildings (int): Количество зданий
+        organisations_per_building (float): Среднее количество организаций на здание
+        activity_children (int): Количество подвидов у каждого вида деятельности второго и третьего уровня
+        activities_per_organisation (int): Максимальное количество видов деятельности у организации
+        phones_per_organisation (int): Максимальное количество телефонов у организации
+        zipf_exponent (float): Показатель распределения Ципфа для популярности видов деятельности
+        districts_per_city (int): Количество районов-кластеров в каждом городе
+        seed (int): Зерно генератора случайных чисел
+    """
+
+    buildings: int = 10_000
+    organisations_per_building: float = 3.0
+    activity_children: int = 5
+    activities_per_organisation: int = 3
+    phones_per_organisation: int = 3
+    zipf_exponent: float = 1.1
+    districts_per_city: int = 8
+    seed: int = 42
+
+    @property
+    def organisations(self) -> int:
+        return int(self.buildings * self.organisations_per_building)
+
+    @property
+    def activities(self) -> int:
+        roots = len(_ROOT_ACTIVITIES)
+        return roots + roots * self.activity_children + roots * self.activity_children ** 2
+
+
+class DatasetGenerator:
+    """
+    Детерминированный генератор записей для BulkImportService. У каждой сущности свой поток
+    случайных чисел, поэтому изменение одного параметра не меняет остальные таблицы
+    """
+
+    def __init__(self, config: DatasetConfig):
+        self.config = config
+
+    def _random(self, entity: str) -> random.Random:
+        return random.Random(f"{self.config.seed}:{entity}")
+
+    def buildings(self) -> Iterator[Dict[str, Any]]:
+        """
+        Генерирует здания, сгруппированные по городам и районам: доля зданий города пропорциональна населению,
+        внутри города здания распределены нормально вокруг центров районов
+
+        Yields:
+            building (Dict[str, Any]): Запись здания
+        """
+        rnd = self._random("buildings")
+        city_weights = list(accumulate(population for *_, population in _CITIES))
+        districts = []
+        for name, latitude, longitude, population in _CITIES:
+            city_radius_km = 3 * math.sqrt(population / 100)
+            districts.append([
+                (
+                    latitude + rnd.gauss(0, city_radius_km / 3) / 111.32,
+                    longitude + rnd.gauss(0, city_radius_km / 3) / (111.32 * math.cos(math.radians(latitude))),
+                    city_radius_km / 6,
+                )
+                for _ in range(self.config.districts_per_city)
+            ])
+
+        for building_id in range(1, self.config.buildings + 1):
+            city_index = bisect(city_weights, rnd.random() * city_weights[-1])
+            city, city_latitude, _, _ = _CITIES[city_index]
+            center_latitude, center_longitude, sigma_km = rnd.choice(districts[city_index])
+            yield {
+                "id": building_id,
+                "address": f"г. {city}, ул. {rnd.choice(_STREETS)}, д. {rnd.randint(1, 250)}",
+                "latitude": round(center_latitude + rnd.gauss(0, sigma_km) / 111.32, 6),
+                "longitude": round(
+                    center_longitude + rnd.gauss(0, sigma_km) / (111.32 * math.cos(math.radians(city_latitude))),
+                    6,
+                ),
+            }
+
+    def activities(self) -> Iterator[Dict[str, Any]]:
+        """
+        Генерирует трехуровневое дерево видов деятельности. Родители всегда идут раньше потомков
+
+        Yields:
+            activity (Dict[str, Any]): Запись вида деятельности
+        """
+        children = self.config.activity_children
+        activity_id = 0
+        for root_name in _ROOT_ACTIVITIES:
+            activity_id += 1
+            root_id = activity_id
+            yield {"id": root_id, "name": root_name, "parent": None}
+            for child_index in range(1, children + 1):
+                activity_id += 1
+                child_id = activity_id
+                child_name = f"{root_name}: направление {child_index}"
+                yield {"id": child_id, "name": child_name, "parent": root_id}
+                for leaf_index in range(1, children + 1):
+                    activity_id += 1
+                    yield {
+                        "id": activity_id,
+                        "name": f"{child_name}.{leaf_index}",
+                        "parent": child_id,
+                    }
+
+    def organisations(self) -> Iterator[Dict[str, Any]]:
+        """
+        Генерирует организации. Распределение по зданиям неравномерное: в части зданий (торговые и бизнес-центры)
+        организаций заметно больше среднего
+
+        Yields:
+            organisation (Dict[str, Any]): Запись организации
+        """
+        rnd = self._random("organisations")
+        buildings = self.config.buildings
+        for organisation_id in range(1, self.config.organisations + 1):
+            yield {
+                "id": organisation_id,
+                "name": f"{rnd.choice(_ORGANISATION_FORMS)} «{rnd.choice(_ORGANISATION_WORDS)}» №{organisation_id}",
+                "building_id": min(int(buildings * rnd.random() ** 1.5), buildings - 1) + 1,
+            }
+
+    def phones(self) -> Iterator[Dict[str, Any]]:
+        """
+        Генерирует от одного до phones_per_organisation уникальных телефонов на организацию в разных форматах записи
+
+        Yields:
+            phone (Dict[str, Any]): Запись телефона
+        """
+        rnd = self._random("phones")
+        per_organisation = self.config.phones_per_organisation
+        for organisation_id in range(1, self.config.organisations + 1):
+            for index in range(rnd.randint(1, per_organisation)):
+                digits = f"{9_000_000_000 + organisation_id * per_organisation + index:010d}"
+                yield {
+                    "organisation_id": organisation_id,
+                    "phone": rnd.choice(_PHONE_FORMATS).format(
+                        digits[:3], digits[3:6], digits[6:8], digits[8:]
+                    ),
+                }
+
+    def organisation_activities(self) -> Iterator[Dict[str, Any]]:
+        """
+        Назначает организациям виды деятельности по закону Ципфа: небольшое количество видов деятельности
+        встречается у большинства организаций, остальные - редко
+
+        Yields:
+            link (Dict[str, Any]): Связь организации с видом деятельности
+        """
+        rnd = self._random("organisation_activities")
+        ranking = list(range(1, self.config.activities + 1))
+        rnd.shuffle(ranking)
+        cumulative_weights = list(
+            accumulate(1 / rank ** self.config.zipf_exponent for rank in range(1, len(ranking) + 1))
+        )
+
+        for organisation_id in range(1, self.config.organisations + 1):
+            count = rnd.randint(1, self.config.activities_per_organisation)
+            chosen = set(rnd.choices(ranking, cum_weights=cumulative_weights, k=count))
+            for activity_id in sorted(chosen):
+                yield {"organisation_id": organisation_id, "activity_id": activity_id}
+
+    def records(self) -> Dict[str, Iterator[Dict[str, Any]]]:
+        """
+        Returns:
+            records (Dict[str, Iterator[Dict[str, Any]]]): Потоки записей по целевым таблицам в порядке импорта
+        """
+        return {
+            "buildings": self.buildings(),
+            "activities": self.activities(),
+            "organisations": self.organisations(),
+            "organisation_phones": self.phones(),
+            "organisation_actvities": self.organisation_activities(),
+        }
+
+
+async def generate_dataset(
+    session: AsyncSession, config: DatasetConfig, truncate: bool = False
+) -> List[ImportReport]:
+    """
+    Заполняет базу синтетическими данными через массовый импорт
+
+    Args:
+        session (AsyncSession): Сессия для работы с базой
+        config (DatasetConfig): Параметры набора данных
+        truncate (bool): Очистить справочные таблицы перед загрузкой
+
+    Returns:
+        reports (List[ImportReport]): Статистика импорта по таблицам
+    """
+    if truncate:
+        await session.execute(
+            text(
+                "TRUNCATE organisation_actvities, organisation_phones, organisations, "
+                "activities, buildings RESTART IDENTITY"
+            )
+        )
+        await session.commit()
+
+    service = BulkImportService(session)
+    reports = []
+    for entity, records in DatasetGenerator(config).records().items():
+        reports.append(await service.import_records(entity, records))
+    return reports
+
+
+async def _run(config: DatasetConfig, truncate: bool):
+    async with AsyncSessionLocal() as session:
+        for report in await generate_dataset(session, config, truncate):
+            print(report)
+
+
+def main():
+    defaults = DatasetConfig()
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных для нагрузочного тестирования")
+    parser.add_argument("--buildings", type=int, default=defaults.buildings)
+    parser.add_argument("--organisations-per-building", type=float, default=defaults.organisations_per_building)
+    parser.add_argument("--activity-children", type=int, default=defaults.activity_children)
+    parser.add_argument("--activities-per-organisation", type=int, default=defaults.activities_per_organisation)
+    parser.add_argument("--phones-per-organisation", type=int, default=defaults.phones_per_organisation)
+    parser.add_argument("--zipf-exponent", type=float, default=defaults.zipf_exponent)
+    parser.add_argument("--districts-per-city", type=int, default=defaults.districts_per_city)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы перед загрузкой")
+    args = parser.parse_args()
+
+    config = DatasetConfig(
+        buildings=args.buildings,
+        organisations_per_building=args.organisations_per_building,
+        activity_children=args.activity_children,
+        activities_per_organisation=args.activities_per_organisation,
+        phones_per_organisation=args.phones_per_organisation,
+        zipf_exponent=args.zipf_exponent,
+        districts_per_city=args.districts_per_city,
+        seed=args.seed,
+    )
+    asyncio.run(_run(config, args.truncate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import asyncio
+import math
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Hashable, Optional, Tuple
+
+
+class ConcurrencyLimiter:
+    """
+    Ограничение количества одновременно обрабатываемых запросов с ограниченной очередью. Запрос, которому
+    не хватило места в очереди или который прождал в ней дольше бюджета, отклоняется сразу, а не ждет
+    освобождения соединения с базой до таймаута пула. Освободившиеся места передаются ожидающим в порядке очереди.
+
+    Запрос может занимать несколько мест (weight), например пакетный запрос, который держит несколько соединений
+    с базой. Очередь строго упорядочена: пока первому в очереди не хватает мест, следующие тоже ждут, иначе
+    тяжелый запрос никогда бы не дождался своей очереди
+
+    Attributes:
+        limit (int): Сколько мест доступно одновременно
+        queue_size (int): Сколько запросов может ждать в очереди
+        queue_timeout (float): Сколько секунд запрос может ждать в очереди
+        active (int): Количество занятых мест
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, weight: int = 1, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Занимает места для обработки запроса
+
+        Args:
+            weight (int): Сколько мест занимает запрос, больше limit не занимается
+            timeout (Optional[float]): Сколько секунд ждать в очереди, по умолчанию queue_timeout
+
+        Returns:
+            rejection (Optional[str]): None, если места получены, иначе причина отказа: queue_full - очередь
+                заполнена, queue_timeout - истек бюджет ожидания в очереди
+        """
+        weight = min(weight, self.limit)
+        if self.active + weight <= self.limit and not self._waiters:
+            self.active += weight
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (weight, waiter)
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout if timeout is None else max(timeout, 0.0))
+        except (TimeoutError, asyncio.CancelledError) as error:
+            if waiter.done() and not waiter.cancelled():
+                # Места передали одновременно с таймаутом или отменой: передаем их дальше
+                self.release(weight)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                # Ушедший мог быть первым в очереди, которому не хватало мест: следующим их может хватить
+                self._wake()
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            return "queue_timeout"
+        return None
+
+    def release(self, weight: int = 1):
+        """
+        Освобождает места, занятые acquire с тем же weight
+        """
+        self.active -= min(weight, self.limit)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            weight, waiter = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if self.active + weight > self.limit:
+                return
+            self._waiters.popleft()
+            self.active += weight
+            waiter.set_result(None)
+
+
+class TokenBucketLimiter:
+    """
+    Ограничение частоты запросов по ключу (пользователю) алгоритмом token bucket: ключ может сделать до burst
+    запросов подряд, дальше - rate запросов в секунду. Состояние хранится в памяти воркера
+
+    Attributes:
+        rate (float): Сколько запросов в секунду восполняется, 0 - без ограничения
+        burst (int): Максимальное количество запросов подряд
+    """
+
+    # После скольких ключей удалять полностью восполненные корзины
+    _PRUNE_THRESHOLD = 10_000
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Hashable, Tuple[float, float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: Hashable) -> Optional[int]:
+        """
+        Списывает один запрос ключа
+
+        Args:
+            key (Hashable): Ключ ограничения
+
+        Returns:
+            retry_after (Optional[int]): None, если запрос разрешен, иначе через сколько секунд повторить запрос
+        """
+        now = monotonic()
+        tokens, updated = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens < 1.0:
+            self._buckets[key] = (tokens, now)
+            return max(1, math.ceil((1.0 - tokens) / self.rate))
+
+        if key not in self._buckets and len(self._buckets) >= self._PRUNE_THRESHOLD:
+            self._prune(now)
+        self._buckets[key] = (tokens - 1.0, now)
+        return None
+
+    def _prune(self, now: float):
+        full_after = self.burst / self.rate
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if now - updated < full_after
+        }
@@ -0,0 +1,105 @@
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Канал уведомлений PostgreSQL, в который пишут триггеры notify_catalog_change
+CHANGES_CHANNEL = "catalog_changes"
+
+
+class ChangeOperation(str, Enum):
+    """
+    Тип изменения в таблице
+    """
+
+    INSERT = "INSERT"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+    TRUNCATE = "TRUNCATE"
+    # Массовый импорт: построчные уведомления подавлены, изменилась произвольная часть таблицы
+    BULK = "BULK"
+    # Слушатель подписался на уведомления (при старте или после разрыва) и мог пропустить изменения, сбросить нужно все
+    RESYNC = "RESYNC"
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    Событие об изменении данных, полученное из уведомления PostgreSQL
+
+    Attributes:
+        table (Optional[str]): Таблица, в которой произошло изменение (None для RESYNC)
+        operation (ChangeOperation): Тип изменения
+        pk (Optional[int]): Первичный ключ измененной строки (None для изменений всей таблицы)
+        refs (Dict[str, Tuple[int, ...]]): Связанные ID до и после изменения, например building_id организации
+    """
+
+    table: Optional[str]
+    operation: ChangeOperation
+    pk: Optional[int] = None
+    refs: Dict[str, Tuple[int, ...]] = field(default_factory=dict)
+
+    @property
+    def affects_whole_table(self) -> bool:
+        return self.operation in (
+            ChangeOperation.TRUNCATE,
+            ChangeOperation.BULK,
+            ChangeOperation.RESYNC,
+        )
+
+    def related(self, column: str) -> Tuple[int, ...]:
+        return self.refs.get(column, ())
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "ChangeEvent":
+        return cls(
+            table=payload.get("table"),
+            operation=ChangeOperation(payload["op"]),
+            pk=payload.get("pk"),
+            refs={column: tuple(values) for column, values in (payload.get("refs") or {}).items()},
+        )
+
+
+ChangeHandler = Callable[[ChangeEvent], None]
+
+
+class ChangeEventBus:
+    """
+    Шина событий об изменениях внутри процесса. Кэши и индексы подписываются на нужные таблицы
+    и сбрасывают свое состояние при изменениях. Обработчики синхронные и должны быть быстрыми
+    """
+
+    def __init__(self):
+        self._subscribers: List[Tuple[Optional[FrozenSet[str]], ChangeHandler]] = []
+
+    def subscribe(
+        self, handler: ChangeHandler, tables: Optional[Iterable[str]] = None
+    ) -> Callable[[], None]:
+        """
+        Подписывает обработчик на изменения
+
+        Args:
+            handler (ChangeHandler): Обработчик события
+            tables (Optional[Iterable[str]]): Таблицы, изменения которых нужны обработчику. По умолчанию - все.
+                События RESYNC получают все обработчики
+
+        Returns:
+            unsubscribe (Callable[[], None]): Функция для отмены подписки
+        """
+        subscription = (frozenset(tables) if tables is not None else None, handler)
+        self._subscribers.append(subscription)
+        return lambda: self._subscribers.remove(subscription)
+
+    def publish(self, event: ChangeEvent):
+        for tables, handler in list(self._subscribers):
+            if tables is not None and event.table is not None and event.table not in tables:
+                continue
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Ошибка в обработчике события %s", event)
+
+
+change_event_bus = ChangeEventBus()
@@ -0,0 +1,155 @@
+import gzip
+import threading
+from hashlib import blake2b
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+import brotli
+import zstandard
+from app.core.lru_cache import SizedLRUCache
+
+# Уровни подобраны под динамические ответы: дальше степень сжатия JSON почти не растет, а время CPU растет
+# в разы (см. benchmarks/micro/bench_compression.py)
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+# Кодирования, сжатие которыми дороже хэширования тела. zstd сжимает быстрее, чем считается blake2b,
+# поэтому без явного ключа его результат не кэшируется
+_DIGEST_CACHED_ENCODINGS = frozenset(("br", "gzip"))
+
+Compressor = Callable[[bytes], bytes]
+
+
+def _gzip_compressor() -> Compressor:
+    # mtime=0, чтобы одинаковые ответы давали одинаковые байты
+    return lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli_compressor() -> Compressor:
+    return lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def _zstd_compressor() -> Compressor:
+    # ZstdCompressor нельзя использовать из нескольких потоков одновременно, а большие ответы сжимаются
+    # в пуле потоков: у каждого потока свой экземпляр
+    local = threading.local()
+
+    def compress(body: bytes) -> bytes:
+        compressor = getattr(local, "compressor", None)
+        if compressor is None:
+            compressor = local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return compressor.compress(body)
+
+    return compress
+
+
+def available_compressors() -> Dict[str, Compressor]:
+    """
+    Возвращает алгоритмы сжатия в порядке предпочтения сервера
+
+    Returns:
+        compressors (Dict[str, Compressor]): Название кодирования для Content-Encoding -> функция сжатия
+    """
+    return {
+        "zstd": _zstd_compressor(),
+        "br": _brotli_compressor(),
+        "gzip": _gzip_compressor(),
+    }
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """
+    Выбирает кодирование ответа по заголовку Accept-Encoding. Из кодирований с наибольшим весом q
+    выбирается первое в порядке предпочтения сервера
+
+    Args:
+        accept_encoding (str): Значение заголовка Accept-Encoding
+        available (Iterable[str]): Доступные кодирования в порядке предпочтения сервера
+
+    Returns:
+        encoding (Optional[str]): Выбранное кодирование или None, если ответ нужно отдать без сжатия
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        parameter, _, value = parameters.partition("=")
+        if parameter.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best_encoding, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best_encoding, best_weight = encoding, weight
+    return best_encoding
+
+
+class CompressedVariants:
+    """
+    Кэш сжатых вариантов ответов, чтобы повторяющиеся ответы сжимались один раз, а не при каждом запросе.
+    Ключ записи - ключ кэша ответа, если обработчик его передал, иначе хэш исходного тела
+
+    Attributes:
+        compressors (Dict[str, Compressor]): Доступные алгоритмы сжатия
+        cache (Optional[SizedLRUCache]): Кэш сжатых тел (None - кэширование выключено)
+    """
+
+    def __init__(self, compressors: Dict[str, Compressor], max_bytes: int):
+        self.compressors = compressors
+        self.cache: Optional[SizedLRUCache[Tuple[Hashable, str]]] = (
+            SizedLRUCache(max_bytes) if max_bytes > 0 else None
+        )
+
+    def cache_key(
+        self, body: bytes, encoding: str, key: Optional[Hashable] = None
+    ) -> Optional[Tuple[Hashable, str]]:
+        """
+        Args:
+            body (bytes): Исходное тело ответа
+            encoding (str): Кодирование
+            key (Optional[Hashable]): Ключ, однозначно определяющий тело (например, ключ и версия записи
+                кэша ответа). Должен меняться вместе с телом
+
+        Returns:
+            cache_key (Optional[Tuple[Hashable, str]]): Ключ записи кэша, None - вариант не кэшируется
+        """
+        if self.cache is None:
+            return None
+        if key is None:
+            if encoding not in _DIGEST_CACHED_ENCODINGS:
+                return None
+            key = blake2b(body, digest_size=16).digest()
+        return key, encoding
+
+    def cached(self, cache_key: Optional[Tuple[Hashable, str]]) -> Optional[bytes]:
+        return self.cache.get(cache_key) if cache_key is not None else None
+
+    def store(self, cache_key: Optional[Tuple[Hashable, str]], compressed: bytes):
+        if cache_key is not None:
+            self.cache.put(cache_key, compressed)
+
+    def compress(self, body: bytes, encoding: str, key: Optional[Hashable] = None) -> bytes:
+        """
+        Возвращает сжатое тело из кэша или сжимает его и сохраняет в кэш. Кэш не потокобезопасен: при сжатии
+        в пуле потоков в потоке event loop нужно вызывать cached и store, а в пуле - только сам алгоритм сжатия
+
+        Args:
+            body (bytes): Исходное тело ответа
+            encoding (str): Кодирование
+            key (Optional[Hashable]): Ключ, однозначно определяющий тело (см. cache_key)
+
+        Returns:
+            compressed (bytes): Сжатое тело
+        """
+        cache_key = self.cache_key(body, encoding, key)
+        compressed = self.cached(cache_key)
+        if compressed is None:
+            compressed = self.compressors[encoding](body)
+            self.store(cache_key, compressed)
+        return compressed
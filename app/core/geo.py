@@ -0,0 +1,324 @@
+import math
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.sql.elements import ColumnElement
+
+# Средний радиус Земли, км
+EARTH_RADIUS_KM = 6371.0088
+# Длина одного градуса широты, км
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def radius_bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> Tuple[float, float, float, float]:
+    """
+    Возвращает прямоугольник, в который гарантированно попадает круг указанного радиуса. Используется для
+    предварительной фильтрации зданий по индексу координат перед точной проверкой расстояния
+
+    Args:
+        latitude (float): Широта центра
+        longitude (float): Долгота центра
+        radius_km (float): Радиус в километрах
+
+    Returns:
+        box (Tuple[float, float, float, float]): Северо-восточные широта и долгота, юго-западные широта и долгота
+    """
+    delta_latitude = radius_km / KM_PER_DEGREE
+    cos_latitude = math.cos(math.radians(latitude))
+    if cos_latitude * 180 <= delta_latitude or abs(latitude) + delta_latitude >= 90:
+        # Круг захватывает полюс: по долготе ограничить нельзя
+        delta_longitude = 180.0
+    else:
+        delta_longitude = min(delta_latitude / cos_latitude, 180.0)
+    return (
+        min(latitude + delta_latitude, 90.0),
+        longitude + delta_longitude,
+        max(latitude - delta_latitude, -90.0),
+        longitude - delta_longitude,
+    )
+
+
+def haversine_km(
+    latitude: ColumnElement, longitude: ColumnElement, center_latitude: float, center_longitude: float
+) -> ColumnElement:
+    """
+    SQL-выражение расстояния по большому кругу в километрах от колонок координат до точки
+
+    Args:
+        latitude (ColumnElement): Колонка широты
+        longitude (ColumnElement): Колонка долготы
+        center_latitude (float): Широта точки
+        center_longitude (float): Долгота точки
+
+    Returns:
+        distance (ColumnElement): Расстояние в километрах
+    """
+    half_delta_latitude = func.radians(latitude - center_latitude) / 2
+    half_delta_longitude = func.radians(longitude - center_longitude) / 2
+    a = func.power(func.sin(half_delta_latitude), 2) + math.cos(math.radians(center_latitude)) * func.cos(
+        func.radians(latitude)
+    ) * func.power(func.sin(half_delta_longitude), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(func.sqrt(a), 1.0))
+
+
+def polygon_bounding_box(rings: Sequence[Sequence[Tuple[float, float]]]) -> Tuple[float, float, float, float]:
+    """
+    Возвращает прямоугольник, описанный вокруг многоугольника
+
+    Args:
+        rings (Sequence[Sequence[Tuple[float, float]]]): Контуры многоугольника из пар (широта, долгота)
+
+    Returns:
+        box (Tuple[float, float, float, float]): Северо-восточные широта и долгота, юго-западные широта и долгота
+    """
+    latitudes = [latitude for ring in rings for latitude, _ in ring]
+    longitudes = [longitude for ring in rings for _, longitude in ring]
+    return max(latitudes), max(longitudes), min(latitudes), min(longitudes)
+
+
+def points_in_polygon(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    rings: Sequence[Sequence[Tuple[float, float]]],
+    max_pairs: int = 1_000_000,
+) -> np.ndarray:
+    """
+    Векторизованная проверка попадания точек в многоугольник по правилу чет-нечет (луч вдоль параллели).
+    Контуры-дыры передаются вместе с внешним контуром, самопересечения допускаются.
+
+    Точки сортируются по широте, поэтому каждое ребро проверяется только с точками из своей полосы широт:
+    работа пропорциональна числу пар (ребро, точка в его полосе), а не произведению числа ребер на число
+    точек. Пары обрабатываются порциями не больше max_pairs, чтобы ограничить память
+
+    Args:
+        latitudes (np.ndarray): Широты точек
+        longitudes (np.ndarray): Долготы точек
+        rings (Sequence[Sequence[Tuple[float, float]]]): Контуры многоугольника из пар (широта, долгота),
+            замыкать контур повтором первой вершины не обязательно
+        max_pairs (int): Максимальное количество пар (ребро, точка) в одной порции
+
+    Returns:
+        inside (np.ndarray): Булев массив, True для точек внутри многоугольника
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    order = np.argsort(latitudes, kind="stable")
+    sorted_latitudes = latitudes[order]
+    sorted_longitudes = longitudes[order]
+
+    edges = []
+    for ring in rings:
+        vertices = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+        edges.append(np.hstack((vertices, np.roll(vertices, -1, axis=0))))
+    y1, x1, y2, x2 = np.vstack(edges).T
+
+    # Ребро пересекает луч из точки, если широта точки в полуинтервале [min(y1, y2), max(y1, y2)).
+    # Горизонтальные ребра дают пустой полуинтервал и не участвуют в проверке
+    first = np.searchsorted(sorted_latitudes, np.minimum(y1, y2), side="left")
+    last = np.searchsorted(sorted_latitudes, np.maximum(y1, y2), side="left")
+    counts = last - first
+    active = np.flatnonzero(counts)
+    if active.size == 0:
+        return np.zeros(latitudes.shape, dtype=bool)
+    slope = np.zeros_like(y1)
+    slope[active] = (x2[active] - x1[active]) / (y2[active] - y1[active])
+
+    crossings = np.zeros(latitudes.shape, dtype=np.int64)
+    boundaries = np.cumsum(counts[active])
+    start = 0
+    while start < active.size:
+        # Порция ребер, в которой суммарно не больше max_pairs пар (но хотя бы одно ребро)
+        offset = boundaries[start - 1] if start else 0
+        stop = max(int(np.searchsorted(boundaries, offset + max_pairs, side="right")), start + 1)
+        chunk = active[start:stop]
+        chunk_counts = counts[chunk]
+        edge_index = np.repeat(chunk, chunk_counts)
+        chunk_starts = np.cumsum(chunk_counts) - chunk_counts
+        point_index = first[edge_index] + np.arange(edge_index.size) - np.repeat(chunk_starts, chunk_counts)
+        crossing_longitude = x1[edge_index] + (sorted_latitudes[point_index] - y1[edge_index]) * slope[edge_index]
+        crossings += np.bincount(
+            point_index[sorted_longitudes[point_index] < crossing_longitude], minlength=latitudes.size
+        )
+        start = stop
+
+    inside = np.empty(latitudes.shape, dtype=bool)
+    inside[order] = (crossings & 1).astype(bool)
+    return inside
+
+
+def polyline_segment_boxes(polyline: Sequence[Tuple[float, float]], buffer_km: float) -> np.ndarray:
+    """
+    Возвращает для каждого отрезка ломаной прямоугольник, в который попадают все точки не дальше buffer_km
+    от отрезка
+
+    Args:
+        polyline (Sequence[Tuple[float, float]]): Вершины ломаной из пар (широта, долгота)
+        buffer_km (float): Расстояние от ломаной в километрах
+
+    Returns:
+        boxes (np.ndarray): Массив (отрезки x 4): северо-восточные широта и долгота, юго-западные широта и долгота
+    """
+    vertices = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    start, end = vertices[:-1], vertices[1:]
+    north = np.maximum(start[:, 0], end[:, 0])
+    south = np.minimum(start[:, 0], end[:, 0])
+    delta_latitude = buffer_km / KM_PER_DEGREE
+    # Градус долготы короче всего на самой удаленной от экватора широте прямоугольника
+    widest = np.minimum(np.maximum(np.abs(north), np.abs(south)) + delta_latitude, 89.9)
+    delta_longitude = np.minimum(delta_latitude / np.cos(np.radians(widest)), 180.0)
+    return np.column_stack(
+        (
+            np.minimum(north + delta_latitude, 90.0),
+            np.maximum(start[:, 1], end[:, 1]) + delta_longitude,
+            np.maximum(south - delta_latitude, -90.0),
+            np.minimum(start[:, 1], end[:, 1]) - delta_longitude,
+        )
+    )
+
+
+def merge_segment_boxes(
+    polyline: Sequence[Tuple[float, float]], buffer_km: float, max_growth: float = 2.0
+) -> np.ndarray:
+    """
+    Строит прямоугольники для предварительного отбора точек вдоль ломаной, объединяя соседние отрезки, пока
+    площадь общего прямоугольника не больше max_growth площади полосы шириной 2 * buffer_km вдоль них.
+    На плотной ломаной (тысячи коротких отрезков) это сокращает количество прямоугольников в запросе
+    до десятков почти без расширения области поиска
+
+    Args:
+        polyline (Sequence[Tuple[float, float]]): Вершины ломаной из пар (широта, долгота)
+        buffer_km (float): Расстояние от ломаной в километрах
+        max_growth (float): Во сколько раз площадь прямоугольника может превышать площадь полосы
+
+    Returns:
+        boxes (np.ndarray): Прямоугольники в формате polyline_segment_boxes
+    """
+    boxes = polyline_segment_boxes(polyline, buffer_km)
+    vertices = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    scale = np.cos(np.radians(vertices[:, 0].mean()))
+    # Площади в квадратных километрах в локальной проекции
+    lengths = KM_PER_DEGREE * np.hypot(np.diff(vertices[:, 0]), np.diff(vertices[:, 1]) * scale)
+
+    def area(box: np.ndarray) -> float:
+        return (box[0] - box[2]) * (box[1] - box[3]) * KM_PER_DEGREE**2 * scale
+
+    merged = []
+    current, run_length = boxes[0].copy(), lengths[0]
+    for box, length in zip(boxes[1:], lengths[1:]):
+        union = np.concatenate((np.maximum(current[:2], box[:2]), np.minimum(current[2:], box[2:])))
+        strip = (run_length + length + 2 * buffer_km) * 2 * buffer_km
+        if area(union) <= max_growth * strip:
+            current, run_length = union, run_length + length
+        else:
+            merged.append(current)
+            current, run_length = box.copy(), length
+    merged.append(current)
+    return np.array(merged)
+
+
+def distances_to_polyline(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    polyline: Sequence[Tuple[float, float]],
+    max_distance_km: Optional[float] = None,
+    max_pairs: int = 1_000_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Векторизованно считает расстояние от точек до ломаной и положение ближайшей точки ломаной вдоль маршрута.
+    Координаты переводятся в километры в локальной равнопромежуточной проекции с масштабом долготы по широте
+    точки, чего достаточно для расстояний в десятки километров.
+
+    Если задан max_distance_km, каждый отрезок сравнивается только с точками из своего прямоугольника
+    (точки отсортированы по широте, полоса находится бинарным поиском), поэтому работа пропорциональна
+    числу близких пар (точка, отрезок), а не произведению числа точек на число отрезков. Пары обрабатываются
+    порциями не больше max_pairs, чтобы ограничить память
+
+    Args:
+        latitudes (np.ndarray): Широты точек
+        longitudes (np.ndarray): Долготы точек
+        polyline (Sequence[Tuple[float, float]]): Вершины ломаной из пар (широта, долгота)
+        max_distance_km (Optional[float]): Точки дальше этого расстояния не интересуют, для них возвращается inf
+        max_pairs (int): Максимальное количество пар (точка, отрезок) в одной порции
+
+    Returns:
+        result (Tuple[np.ndarray, np.ndarray]): Расстояния до ломаной в километрах и положение ближайшей точки
+            ломаной в километрах от ее начала
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    order = np.argsort(latitudes, kind="stable")
+    sorted_latitudes = latitudes[order]
+    sorted_longitudes = longitudes[order]
+
+    vertices = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    start_latitude, start_longitude = vertices[:-1, 0], vertices[:-1, 1]
+    delta_latitude = vertices[1:, 0] - start_latitude
+    delta_longitude = vertices[1:, 1] - start_longitude
+
+    # Длины отрезков и их начала вдоль маршрута, с масштабом долготы по середине отрезка
+    segment_scale = np.cos(np.radians(start_latitude + delta_latitude / 2))
+    segment_lengths = KM_PER_DEGREE * np.hypot(delta_latitude, delta_longitude * segment_scale)
+    segment_offsets = np.concatenate(([0.0], np.cumsum(segment_lengths)[:-1]))
+
+    if max_distance_km is None:
+        first = np.zeros(len(start_latitude), dtype=np.int64)
+        last = np.full(len(start_latitude), latitudes.size, dtype=np.int64)
+    else:
+        boxes = polyline_segment_boxes(vertices, max_distance_km)
+        first = np.searchsorted(sorted_latitudes, boxes[:, 2], side="left")
+        last = np.searchsorted(sorted_latitudes, boxes[:, 0], side="right")
+    counts = last - first
+
+    distances = np.full(latitudes.size, np.inf)
+    positions = np.zeros(latitudes.size)
+    active = np.flatnonzero(counts)
+    boundaries = np.cumsum(counts[active])
+    chunk_start = 0
+    while chunk_start < active.size:
+        # Порция отрезков, в которой суммарно не больше max_pairs пар (но хотя бы один отрезок)
+        offset = boundaries[chunk_start - 1] if chunk_start else 0
+        chunk_stop = max(int(np.searchsorted(boundaries, offset + max_pairs, side="right")), chunk_start + 1)
+        chunk = active[chunk_start:chunk_stop]
+        chunk_counts = counts[chunk]
+        segment = np.repeat(chunk, chunk_counts)
+        starts = np.cumsum(chunk_counts) - chunk_counts
+        point = first[segment] + np.arange(segment.size) - np.repeat(starts, chunk_counts)
+        if max_distance_km is not None:
+            in_box = (sorted_longitudes[point] >= boxes[segment, 3]) & (sorted_longitudes[point] <= boxes[segment, 1])
+            segment, point = segment[in_box], point[in_box]
+
+        # Вектор отрезка и вектор от начала отрезка до точки в километрах
+        scale = np.cos(np.radians(sorted_latitudes[point]))
+        segment_y = delta_latitude[segment] * KM_PER_DEGREE
+        segment_x = delta_longitude[segment] * KM_PER_DEGREE * scale
+        point_y = (sorted_latitudes[point] - start_latitude[segment]) * KM_PER_DEGREE
+        point_x = (sorted_longitudes[point] - start_longitude[segment]) * KM_PER_DEGREE * scale
+        squared_length = segment_x**2 + segment_y**2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            projection = np.where(
+                squared_length > 0, (point_x * segment_x + point_y * segment_y) / squared_length, 0.0
+            )
+        projection = np.clip(projection, 0.0, 1.0)
+        pair_distances = np.hypot(point_x - projection * segment_x, point_y - projection * segment_y)
+
+        # Ближайший отрезок для каждой точки порции: первая пара каждой точки после сортировки по расстоянию
+        nearest = np.lexsort((pair_distances, point))
+        nearest = nearest[np.flatnonzero(np.diff(point[nearest], prepend=-1))]
+        closer = pair_distances[nearest] < distances[point[nearest]]
+        nearest = nearest[closer]
+        distances[point[nearest]] = pair_distances[nearest]
+        positions[point[nearest]] = (
+            segment_offsets[segment[nearest]] + projection[nearest] * segment_lengths[segment[nearest]]
+        )
+        chunk_start = chunk_stop
+
+    if max_distance_km is not None:
+        distances[distances > max_distance_km] = np.inf
+
+    result_distances = np.empty(latitudes.size)
+    result_positions = np.empty(latitudes.size)
+    result_distances[order] = distances
+    result_positions[order] = positions
+    return result_distances, result_positions
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from time import perf_counter
+from typing import Optional
+from app.core.metrics import Counter, Histogram, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+event_loop_lag = metrics_registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Задержка планирования event loop",
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+event_loop_blocks_total = metrics_registry.register(
+    Counter(
+        "event_loop_blocks_total",
+        "Количество блокировок event loop дольше порога",
+    )
+)
+
+
+class EventLoopMonitor:
+    """
+    Фоновый монитор event loop. Задача в самом loop засыпает на interval и измеряет, насколько позже
+    она проснулась - это задержка, с которой loop успевает обрабатывать готовые колбэки.
+
+    Блокировки дольше block_threshold считаются в метрике. В режиме поиска блокировок отдельный поток
+    следит за пульсом задачи: если loop не отвечает дольше block_threshold, поток снимает стек потока loop
+    через sys._current_frames и пишет его в лог, то есть показывает код, который держит loop прямо во время блокировки
+
+    Attributes:
+        interval (float): Период измерения в секундах
+        block_threshold (float): Порог блокировки в секундах
+        capture_stacks (bool): Включает поток, который снимает стеки при блокировках
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = 100.0,
+        block_threshold_ms: float = 100.0,
+        capture_stacks: bool = False,
+    ):
+        self.interval = interval_ms / 1000
+        self.block_threshold = block_threshold_ms / 1000
+        self.capture_stacks = capture_stacks
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = perf_counter()
+
+    async def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure(), name="event-loop-monitor")
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="event-loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _measure(self):
+        while True:
+            started = perf_counter()
+            await asyncio.sleep(self.interval)
+            self._last_beat = perf_counter()
+            lag = max(self._last_beat - started - self.interval, 0.0)
+            event_loop_lag.observe(lag)
+            if lag >= self.block_threshold:
+                event_loop_blocks_total.inc()
+                if self.capture_stacks:
+                    logger.warning("Event loop был заблокирован на %.1f мс", lag * 1000)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            beat = self._last_beat
+            blocked_for = perf_counter() - beat - self.interval
+            if blocked_for < self.block_threshold or beat == reported_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            reported_beat = beat
+            logger.warning(
+                "Event loop заблокирован больше %.1f мс, стек потока event loop:\n%s",
+                blocked_for * 1000,
+                "".join(traceback.format_stack(frame)),
+            )
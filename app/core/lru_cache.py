@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+
+
+class SizedLRUCache(Generic[KeyType]):
+    """
+    LRU-кэш байтовых значений с ограничением по суммарному размеру. При превышении бюджета вытесняются
+    давно не использованные записи, значения больше всего бюджета не кэшируются
+
+    Attributes:
+        max_bytes (int): Бюджет памяти на значения в байтах
+        entry_overhead (int): Сколько байт бюджета занимает запись сверх значения (ключ, узел словаря). Не дает
+            кэшу с множеством пустых значений расти без ограничений
+        on_evict (Optional[Callable[[KeyType], None]]): Вызывается с ключом каждой записи, вытесненной из-за
+            превышения бюджета, чтобы владелец кэша мог удалить свои данные об этой записи. При pop и clear
+            не вызывается
+        size (int): Занятая часть бюджета в байтах
+        hits (int): Количество попаданий
+        misses (int): Количество промахов
+    """
+
+    def __init__(
+        self, max_bytes: int, entry_overhead: int = 0, on_evict: Optional[Callable[[KeyType], None]] = None
+    ):
+        self.max_bytes = max_bytes
+        self.entry_overhead = entry_overhead
+        self.on_evict = on_evict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[KeyType, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: KeyType) -> bool:
+        return key in self._entries
+
+    def get(self, key: KeyType) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: KeyType, value: bytes):
+        if len(value) + self.entry_overhead > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous) + self.entry_overhead
+        self._entries[key] = value
+        self.size += len(value) + self.entry_overhead
+        while self.size > self.max_bytes:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted) + self.entry_overhead
+            if self.on_evict is not None:
+                self.on_evict(evicted_key)
+
+    def pop(self, key: KeyType) -> Optional[bytes]:
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self.size -= len(value) + self.entry_overhead
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> Tuple[int, int]:
+        """
+        Returns:
+            stats (Tuple[int, int]): Количество попаданий и промахов, в формате MetricsRegistry.register_cache
+        """
+        return self.hits, self.misses
@@ -0,0 +1,281 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Базовый класс метрики в формате Prometheus
+
+    Attributes:
+        name (str): Название метрики
+        documentation (str): Описание метрики
+        label_names (Tuple[str, ...]): Названия меток
+    """
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """
+        Yields:
+            sample (Tuple[str, str, float]): Название сэмпла, отформатированные метки и значение
+        """
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(
+            f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    """
+    Монотонно возрастающий счетчик. Если передан callback, значения вычисляются в момент сбора метрик
+    """
+
+    metric_type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        values = self._callback() if self._callback is not None else self._values
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.label_names, labels), value
+
+
+class Gauge(Metric):
+    """
+    Значение, которое может как расти, так и уменьшаться. Если передан callback, значения вычисляются в момент сбора метрик
+    """
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, labels: LabelValues = ()):
+        self._values[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def samples(self):
+        values = self._callback() if self._callback is not None else self._values
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.label_names, labels), value
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами корзин. Наблюдение стоит один bisect и два сложения
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждого набора меток: счетчики по корзинам (последняя - +Inf) и сумма значений
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def samples(self):
+        bucket_names = self.label_names + ("le",)
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(bucket_names, labels + (_format_value(bound),)),
+                    cumulative,
+                )
+            formatted = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum", formatted, total[0]
+            yield f"{self.name}_count", formatted, cumulative
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик приложения. Метрики хранятся в памяти процесса и отдаются эндпоинтом /metrics
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        cache_labels = ("cache",)
+        self.register(Counter("cache_hits_total", "Количество попаданий в кэш", cache_labels, self._cache_hits))
+        self.register(Counter("cache_misses_total", "Количество промахов кэша", cache_labels, self._cache_misses))
+        self.register(Gauge("cache_hit_ratio", "Доля попаданий в кэш", cache_labels, self._cache_hit_ratio))
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Регистрирует метрику. Повторная регистрация метрики с тем же названием возвращает уже зарегистрированную
+
+        Args:
+            metric (Metric): Метрика
+
+        Returns:
+            metric (Metric): Зарегистрированная метрика
+        """
+        return self._metrics.setdefault(metric.name, metric)
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]):
+        """
+        Подключает кэш к метрикам попаданий
+
+        Args:
+            name (str): Название кэша
+            stats (Callable[[], Tuple[int, int]]): Функция, возвращающая количество попаданий и промахов
+        """
+        self._caches[name] = stats
+
+    def _cache_hits(self) -> Dict[LabelValues, float]:
+        return {(name,): stats()[0] for name, stats in self._caches.items()}
+
+    def _cache_misses(self) -> Dict[LabelValues, float]:
+        return {(name,): stats()[1] for name, stats in self._caches.items()}
+
+    def _cache_hit_ratio(self) -> Dict[LabelValues, float]:
+        ratios = {}
+        for name, stats in self._caches.items():
+            hits, misses = stats()
+            ratios[(name,)] = hits / (hits + misses) if hits + misses else 0.0
+        return ratios
+
+    def render(self) -> str:
+        """
+        Returns:
+            exposition (str): Все метрики в текстовом формате Prometheus
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_request_duration = metrics_registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса",
+        ("method", "route"),
+    )
+)
+http_requests_total = metrics_registry.register(
+    Counter(
+        "http_requests_total",
+        "Количество обработанных HTTP-запросов",
+        ("method", "route", "status"),
+    )
+)
+http_requests_in_progress = metrics_registry.register(
+    Gauge(
+        "http_requests_in_progress",
+        "Количество HTTP-запросов в обработке",
+        ("method", "route"),
+    )
+)
+
+
+def register_pool_metrics(pool):
+    """
+    Подключает метрики пула соединений SQLAlchemy. Значения снимаются с пула в момент сбора метрик
+
+    Args:
+        pool (Pool): Пул соединений движка
+    """
+    metrics_registry.register(
+        Gauge("db_pool_size", "Размер пула соединений", callback=lambda: {(): pool.size()})
+    )
+    metrics_registry.register(
+        Gauge(
+            "db_pool_checked_out",
+            "Количество соединений, выданных из пула",
+            callback=lambda: {(): pool.checkedout()},
+        )
+    )
+    metrics_registry.register(
+        Gauge(
+            "db_pool_checked_in",
+            "Количество свободных соединений в пуле",
+            callback=lambda: {(): pool.checkedin()},
+        )
+    )
+    metrics_registry.register(
+        Gauge(
+            "db_pool_overflow",
+            "Количество соединений сверх размера пула",
+            callback=lambda: {(): pool.overflow()},
+        )
+    )
@@ -0,0 +1,191 @@
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Set, Tuple
+from app.core.change_events import ChangeEvent, ChangeEventBus
+from app.core.lru_cache import SizedLRUCache
+
+# Таблицы, изменения которых меняют сериализованные организации здания: адрес здания, сами организации,
+# их телефоны и виды деятельности (название вида деятельности попадает в ответ)
+TRACKED_TABLES = (
+    "buildings",
+    "activities",
+    "organisations",
+    "organisation_phones",
+    "organisation_actvities",
+)
+
+# Примерный объем ключа и узла словаря записи: пустые здания тоже кэшируются и должны занимать бюджет
+_ENTRY_OVERHEAD = 200
+
+PayloadKey = Tuple[int, Optional[FrozenSet[str]]]
+# Версия данных здания: (поколение всего кэша, версия здания). Меняется при каждом сбросе здания
+PayloadVersion = Tuple[int, int]
+
+
+class BuildingPayloadCache:
+    """
+    Кэш сериализованных организаций по зданиям: JSON-объекты организаций здания через запятую, без скобок
+    массива, для каждого набора запрошенных полей. Ответы из нескольких зданий собираются склейкой фрагментов.
+
+    Кэш работает только при подключении к шине событий (attach) и только пока слушатель уведомлений подписан
+    на канал: записи здания сбрасываются по уведомлениям об изменениях его организаций, их телефонов и видов
+    деятельности, а без подписки сбрасывать их нечему. После переподключения RESYNC очищает кэш целиком. Чтобы запрос, прочитавший данные до
+    изменения, не положил в кэш устаревший фрагмент, запись принимается только если версия здания с начала
+    чтения не изменилась
+
+    Attributes:
+        cache (Optional[SizedLRUCache[PayloadKey]]): Фрагменты по (ID здания, запрошенные поля), None - кэш выключен
+    """
+
+    def __init__(self):
+        self.cache: Optional[SizedLRUCache[PayloadKey]] = None
+        self._listening: Callable[[], bool] = lambda: False
+        self._generation = 0
+        self._versions: Dict[int, int] = {}
+        self._keys: Dict[int, Set[PayloadKey]] = {}
+        self._organizations: Dict[int, Set[int]] = {}
+        self._buildings_by_organization: Dict[int, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache is not None and self._listening()
+
+    def attach(self, bus: ChangeEventBus, max_bytes: int, listening: Callable[[], bool]) -> Callable[[], None]:
+        """
+        Включает кэш и подписывает его на изменения
+
+        Args:
+            bus (ChangeEventBus): Шина событий об изменениях
+            max_bytes (int): Бюджет памяти в байтах
+            listening (Callable[[], bool]): Подписан ли слушатель уведомлений на канал. Пока нет, кэш
+                не выдает и не принимает записи
+
+        Returns:
+            detach (Callable[[], None]): Отписывает и выключает кэш
+        """
+        self.cache = SizedLRUCache(max_bytes, entry_overhead=_ENTRY_OVERHEAD, on_evict=self._on_evict)
+        self._listening = listening
+        unsubscribe = bus.subscribe(self.on_change, tables=TRACKED_TABLES)
+
+        def detach():
+            unsubscribe()
+            self.clear()
+            self.cache = None
+            self._listening = lambda: False
+
+        return detach
+
+    def version(self, building_id: int) -> Optional[PayloadVersion]:
+        """
+        Возвращает текущую версию данных здания, None - кэш выключен или слушатель не подписан. Версию нужно
+        получить до чтения данных из базы и передать в put
+        """
+        if not self.enabled:
+            return None
+        return self._generation, self._versions.get(building_id, 0)
+
+    def get(self, building_id: int, fields: Optional[FrozenSet[str]]) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        return self.cache.get((building_id, fields))
+
+    def put(
+        self,
+        building_id: int,
+        fields: Optional[FrozenSet[str]],
+        version: Optional[PayloadVersion],
+        payload: bytes,
+        organization_ids: Iterable[int],
+    ):
+        """
+        Кладет фрагмент здания в кэш, если данные здания не менялись с получения версии
+
+        Args:
+            building_id (int): ID здания
+            fields (Optional[FrozenSet[str]]): Запрошенные поля, None - все поля
+            version (Optional[PayloadVersion]): Версия здания, полученная до чтения данных
+            payload (bytes): Сериализованные организации здания
+            organization_ids (Iterable[int]): ID организаций здания, по ним сбрасываются записи при изменении
+                телефонов и видов деятельности
+        """
+        if version is None or version != self.version(building_id):
+            return
+        key = (building_id, fields)
+        self.cache.put(key, payload)
+        if key not in self.cache:
+            return
+        self._keys.setdefault(building_id, set()).add(key)
+        organizations = self._organizations.setdefault(building_id, set())
+        for organization_id in organization_ids:
+            organizations.add(organization_id)
+            self._buildings_by_organization[organization_id] = building_id
+
+    def invalidate(self, building_id: int):
+        self._versions[building_id] = self._versions.get(building_id, 0) + 1
+        keys = self._keys.get(building_id, ())
+        if self.cache is not None:
+            for key in keys:
+                self.cache.pop(key)
+        self._forget(building_id)
+
+    def clear(self):
+        self._generation += 1
+        self._versions.clear()
+        self._keys.clear()
+        self._organizations.clear()
+        self._buildings_by_organization.clear()
+        if self.cache is not None:
+            self.cache.clear()
+
+    def stats(self) -> Tuple[int, int]:
+        return self.cache.stats() if self.cache is not None else (0, 0)
+
+    def _on_evict(self, key: PayloadKey):
+        building_id = key[0]
+        keys = self._keys.get(building_id)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            # Последний фрагмент здания вытеснен: его организации больше не нужно отслеживать
+            self._forget(building_id)
+
+    def _forget(self, building_id: int):
+        self._keys.pop(building_id, None)
+        for organization_id in self._organizations.pop(building_id, ()):
+            if self._buildings_by_organization.get(organization_id) == building_id:
+                del self._buildings_by_organization[organization_id]
+
+    def on_change(self, event: ChangeEvent):
+        if event.affects_whole_table or event.table == "activities":
+            self.clear()
+        elif event.table == "buildings":
+            if event.pk is not None:
+                self.invalidate(event.pk)
+        elif event.table == "organisations":
+            for building_id in event.related("building_id"):
+                self.invalidate(building_id)
+            if event.pk is not None:
+                building_id = self._buildings_by_organization.pop(event.pk, None)
+                if building_id is not None:
+                    self.invalidate(building_id)
+        else:
+            # Телефон или вид деятельности организации: если ее здания нет в отображении, фрагментов с этой
+            # организацией в кэше тоже нет
+            for organization_id in event.related("organisation_id"):
+                building_id = self._buildings_by_organization.get(organization_id)
+                if building_id is not None:
+                    self.invalidate(building_id)
+
+
+def compression_key(
+    building_id: int, fields: Optional[FrozenSet[str]], version: Optional[PayloadVersion]
+) -> Optional[Hashable]:
+    """
+    Ключ сжатых вариантов ответа с организациями здания для request.state.compression_key. Ответ
+    однозначно определяется версией здания, поэтому его не нужно хэшировать
+    """
+    if version is None:
+        return None
+    return "building", building_id, fields, version
+
+
+building_payload_cache = BuildingPayloadCache()
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -13,6 +14,45 @@ class ApplicationSettings(BaseSettings):
         DEBUG (bool): Флаг включения режима отладки
         HOST (str): Хост, на котром будет запускаться приложение
         PORT (int): Порт, на котором будет работать приложение
+        WEB_WORKERS (int): Количество процессов-воркеров приложения, между которыми делится бюджет соединений с базой
+        DB_MAX_CONNECTIONS (int): Общий бюджет соединений с базой на все воркеры (должен быть меньше max_connections PostgreSQL)
+        CHANGE_NOTIFICATIONS_ENABLED (bool): Включает получение уведомлений PostgreSQL об изменениях справочников для сброса кэшей воркера
+        WARMUP_ENABLED (bool): Прогревать пул соединений и кэши запросов при старте воркера
+        WARMUP_CONNECTIONS (int): Сколько соединений пула открыть и прогреть при старте воркера
+        BATCH_MAX_REQUESTS (int): Максимальное количество запросов в одном пакетном запросе
+        BATCH_CONCURRENCY (int): Сколько запросов пакета выполняются одновременно (каждый занимает соединение пула)
+        METRICS_ENABLED (bool): Включает сбор метрик и эндпоинт /metrics
+        SQL_TRACING_ENABLED (bool): Включает подсчет SQL-запросов на каждый HTTP-запрос, журнал медленных запросов и поиск N+1
+        SQL_SLOW_QUERY_MS (float): Порог в миллисекундах, начиная с которого запрос попадает в журнал медленных запросов
+        SQL_N_PLUS_ONE_THRESHOLD (int): Сколько выполнений одного и того же запроса за HTTP-запрос считать вероятным N+1
+        PROFILING_TOKEN (Optional[str]): Администраторский токен для заголовка X-Profile, включающего профилирование запроса
+        PROFILING_SAMPLE_RATE (float): Доля запросов, которые профилируются без заголовка (0 - выключено)
+        PROFILING_DIR (str): Каталог, в который сохраняются профили запросов
+        PROFILING_INTERVAL_MS (float): Интервал сэмплирования стека при профилировании в миллисекундах
+        LOOP_MONITOR_ENABLED (bool): Включает измерение задержки event loop
+        LOOP_MONITOR_INTERVAL_MS (float): Период измерения задержки event loop в миллисекундах
+        LOOP_BLOCK_THRESHOLD_MS (float): Порог в миллисекундах, начиная с которого event loop считается заблокированным
+        LOOP_BLOCK_STACKS (bool): Записывать в лог стек кода, блокирующего event loop (режим отладки)
+        COMPRESSION_ENABLED (bool): Включает сжатие ответов gzip, brotli или zstd по заголовку Accept-Encoding
+        COMPRESSION_MINIMUM_SIZE (int): Минимальный размер ответа в байтах, начиная с которого он сжимается
+        COMPRESSION_CACHE_MB (int): Бюджет памяти кэша сжатых вариантов ответов в мегабайтах (0 - без кэша)
+        BUILDING_CACHE_MB (int): Бюджет памяти кэша сериализованных организаций по зданиям в мегабайтах (0 - без кэша).
+            Кэш работает только с CHANGE_NOTIFICATIONS_ENABLED
+        SINGLE_FLIGHT_ENABLED (bool): Объединять одинаковые одновременные вызовы операций сервисов в одно обращение к базе
+        ADMISSION_ENABLED (bool): Включает ограничение одновременных запросов воркера с очередью
+        ADMISSION_CONCURRENCY (Optional[int]): Сколько запросов всех маршрутов воркер обрабатывает одновременно,
+            по умолчанию - размер пула соединений воркера
+        ADMISSION_ROUTE_LIMITS (Dict[str, int]): Более строгие ограничения для отдельных маршрутов внутри общего,
+            JSON {"путь": ограничение}
+        ADMISSION_QUEUE_SIZE (int): Сколько запросов может ждать в общей очереди и в очереди каждого маршрута
+            с отдельным ограничением
+        ADMISSION_QUEUE_TIMEOUT_MS (float): Сколько миллисекунд запрос может ждать в очереди до ответа 503
+        ADMISSION_RETRY_AFTER (int): Значение заголовка Retry-After ответа 503 в секундах
+        RATE_LIMIT_PER_SECOND (float): Сколько запросов в секунду разрешено одному пользователю (0 - без ограничения)
+        RATE_LIMIT_BURST (int): Сколько запросов пользователь может сделать подряд сверх RATE_LIMIT_PER_SECOND
+        STATEMENT_TIMEOUT_MS (int): Ограничение времени одного SQL-запроса в миллисекундах (0 - ограничение сервера)
+        STATEMENT_TIMEOUTS_MS (Dict[str, int]): Ограничения для отдельных маршрутов, JSON {"путь": миллисекунды}
+        CANCEL_ON_DISCONNECT (bool): Прерывать обработку запроса и SQL-запрос, если клиент отключился
 
     """
 
@@ -21,6 +61,41 @@ class ApplicationSettings(BaseSettings):
     DEBUG: bool = Field(alias="DEBUG")
     HOST: str = Field(alias="HOST")
     PORT: int = Field(alias="PORT")
+    WEB_WORKERS: int = Field(default=1, alias="WEB_WORKERS")
+    DB_MAX_CONNECTIONS: int = Field(default=40, alias="DB_MAX_CONNECTIONS")
+    CHANGE_NOTIFICATIONS_ENABLED: bool = Field(default=True, alias="CHANGE_NOTIFICATIONS_ENABLED")
+    WARMUP_ENABLED: bool = Field(default=True, alias="WARMUP_ENABLED")
+    WARMUP_CONNECTIONS: int = Field(default=4, alias="WARMUP_CONNECTIONS")
+    BATCH_MAX_REQUESTS: int = Field(default=20, alias="BATCH_MAX_REQUESTS")
+    BATCH_CONCURRENCY: int = Field(default=4, alias="BATCH_CONCURRENCY")
+    METRICS_ENABLED: bool = Field(default=True, alias="METRICS_ENABLED")
+    SQL_TRACING_ENABLED: bool = Field(default=True, alias="SQL_TRACING_ENABLED")
+    SQL_SLOW_QUERY_MS: float = Field(default=200.0, alias="SQL_SLOW_QUERY_MS")
+    SQL_N_PLUS_ONE_THRESHOLD: int = Field(default=5, alias="SQL_N_PLUS_ONE_THRESHOLD")
+    PROFILING_TOKEN: Optional[str] = Field(default=None, alias="PROFILING_TOKEN")
+    PROFILING_SAMPLE_RATE: float = Field(default=0.0, alias="PROFILING_SAMPLE_RATE")
+    PROFILING_DIR: str = Field(default="profiles", alias="PROFILING_DIR")
+    PROFILING_INTERVAL_MS: float = Field(default=1.0, alias="PROFILING_INTERVAL_MS")
+    LOOP_MONITOR_ENABLED: bool = Field(default=True, alias="LOOP_MONITOR_ENABLED")
+    LOOP_MONITOR_INTERVAL_MS: float = Field(default=100.0, alias="LOOP_MONITOR_INTERVAL_MS")
+    LOOP_BLOCK_THRESHOLD_MS: float = Field(default=100.0, alias="LOOP_BLOCK_THRESHOLD_MS")
+    LOOP_BLOCK_STACKS: bool = Field(default=False, alias="LOOP_BLOCK_STACKS")
+    COMPRESSION_ENABLED: bool = Field(default=True, alias="COMPRESSION_ENABLED")
+    COMPRESSION_MINIMUM_SIZE: int = Field(default=1024, alias="COMPRESSION_MINIMUM_SIZE")
+    COMPRESSION_CACHE_MB: int = Field(default=32, alias="COMPRESSION_CACHE_MB")
+    BUILDING_CACHE_MB: int = Field(default=64, alias="BUILDING_CACHE_MB")
+    SINGLE_FLIGHT_ENABLED: bool = Field(default=True, alias="SINGLE_FLIGHT_ENABLED")
+    ADMISSION_ENABLED: bool = Field(default=True, alias="ADMISSION_ENABLED")
+    ADMISSION_CONCURRENCY: Optional[int] = Field(default=None, alias="ADMISSION_CONCURRENCY")
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = Field(default_factory=dict, alias="ADMISSION_ROUTE_LIMITS")
+    ADMISSION_QUEUE_SIZE: int = Field(default=32, alias="ADMISSION_QUEUE_SIZE")
+    ADMISSION_QUEUE_TIMEOUT_MS: float = Field(default=500.0, alias="ADMISSION_QUEUE_TIMEOUT_MS")
+    ADMISSION_RETRY_AFTER: int = Field(default=1, alias="ADMISSION_RETRY_AFTER")
+    RATE_LIMIT_PER_SECOND: float = Field(default=0.0, alias="RATE_LIMIT_PER_SECOND")
+    RATE_LIMIT_BURST: int = Field(default=20, alias="RATE_LIMIT_BURST")
+    STATEMENT_TIMEOUT_MS: int = Field(default=10000, alias="STATEMENT_TIMEOUT_MS")
+    STATEMENT_TIMEOUTS_MS: Dict[str, int] = Field(default_factory=dict, alias="STATEMENT_TIMEOUTS_MS")
+    CANCEL_ON_DISCONNECT: bool = Field(default=True, alias="CANCEL_ON_DISCONNECT")
 
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="allow")
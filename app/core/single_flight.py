@@ -0,0 +1,147 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+from app.core.metrics import Counter, Gauge, Histogram, metrics_registry
+
+ResultType = TypeVar("ResultType")
+
+single_flight_calls_total = metrics_registry.register(
+    Counter(
+        "single_flight_calls_total",
+        "Количество вызовов операций сервисов через single-flight: leader выполняет запрос, follower ждет его результат",
+        ("operation", "role"),
+    )
+)
+single_flight_retries_total = metrics_registry.register(
+    Counter(
+        "single_flight_retries_total",
+        "Сколько раз ожидающий вызов повторил операцию, потому что выполнявший ее запрос был отменен",
+        ("operation",),
+    )
+)
+single_flight_followers = metrics_registry.register(
+    Histogram(
+        "single_flight_followers",
+        "Сколько вызовов получили результат одного выполнения операции, не считая выполнившего",
+        ("operation",),
+        buckets=(0, 1, 2, 5, 10, 25, 50, 100),
+    )
+)
+
+
+class _LeaderCancelled(Exception):
+    """
+    Выполнявший операцию запрос отменен (клиент отключился, истек таймаут): результата нет, ожидающие
+    вызовы должны выполнить операцию сами
+    """
+
+
+class _Flight:
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вызовов: пока операция с ключом выполняется, повторные вызовы с тем же
+    ключом не обращаются к базе, а ждут и получают ее результат или ошибку. Операция выполняется в сессии
+    запроса, который вызвал ее первым; если этот запрос отменен, один из ожидающих выполняет операцию заново
+    в своей сессии. Отмена ожидающего вызова не влияет на остальных.
+
+    Подходит только для операций чтения, результат которых не изменяется вызывающими: все получают один
+    и тот же объект результата
+
+    Attributes:
+        enabled (bool): Включает объединение, при False вызовы выполняются напрямую
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Tuple[str, Hashable], _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, operation: str, key: Hashable, call: Callable[[], Awaitable[ResultType]]) -> ResultType:
+        """
+        Выполняет операцию или ждет результат уже выполняющейся операции с тем же ключом
+
+        Args:
+            operation (str): Название операции, метка метрик
+            key (Hashable): Аргументы операции, однозначно определяющие результат
+            call (Callable[[], Awaitable[ResultType]]): Выполнение операции
+
+        Returns:
+            result (ResultType): Результат операции
+        """
+        flight_key = (operation, key)
+        while (flight := self._flights.get(flight_key)) is not None:
+            flight.followers += 1
+            single_flight_calls_total.inc((operation, "follower"))
+            try:
+                # shield: отмена ожидающего не должна отменять общий future
+                return await asyncio.shield(flight.future)
+            except _LeaderCancelled:
+                single_flight_retries_total.inc((operation,))
+
+        flight = _Flight(asyncio.get_running_loop().create_future())
+        self._flights[flight_key] = flight
+        single_flight_calls_total.inc((operation, "leader"))
+        try:
+            result = await call()
+        except Exception as error:
+            self._fail(flight, error)
+            raise
+        except BaseException:
+            # Отмена запроса: ожидающие повторят операцию сами
+            self._fail(flight, _LeaderCancelled())
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            del self._flights[flight_key]
+            single_flight_followers.observe(flight.followers, (operation,))
+
+    @staticmethod
+    def _fail(flight: _Flight, error: Exception):
+        flight.future.set_exception(error)
+        # Помечает ошибку полученной: без ожидающих asyncio сообщил бы о ней в лог
+        flight.future.exception()
+
+    def coalesced(self, method: Callable[..., Awaitable[ResultType]]) -> Callable[..., Awaitable[ResultType]]:
+        """
+        Декоратор метода сервиса: одинаковые одновременные вызовы метода объединяются. Ключ - название метода
+        и значения аргументов с учетом значений по умолчанию, поэтому аргументы должны быть хэшируемыми.
+        Вызовы с нехэшируемыми аргументами выполняются напрямую
+        """
+        signature = inspect.signature(method)
+        operation = method.__qualname__
+
+        @functools.wraps(method)
+        async def wrapper(service, *args: Any, **kwargs: Any) -> ResultType:
+            if not self.enabled:
+                return await method(service, *args, **kwargs)
+            bound = signature.bind(service, *args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(bound.arguments.values())[1:]
+            try:
+                hash(key)
+            except TypeError:
+                return await method(service, *args, **kwargs)
+            return await self.run(operation, key, lambda: method(service, *args, **kwargs))
+
+        return wrapper
+
+
+single_flight = SingleFlight()
+
+metrics_registry.register(
+    Gauge(
+        "single_flight_in_flight",
+        "Количество выполняющихся операций, к результату которых могут присоединиться одинаковые вызовы",
+        callback=lambda: {(): len(single_flight)},
+    )
+)
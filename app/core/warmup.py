@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from time import perf_counter
+from typing import Awaitable, Callable, List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import configure_mappers
+
+logger = logging.getLogger(__name__)
+
+StatementWarmer = Callable[[AsyncSession], Awaitable[None]]
+
+
+async def warm_up(engine: AsyncEngine, connections: int, statement_warmers: List[StatementWarmer]):
+    """
+    Прогревает воркер перед приемом трафика: настраивает мапперы, заранее открывает соединения пула
+    и на каждом соединении выполняет основные запросы (кэш скомпилированных запросов и prepared statements
+    asyncpg у каждого соединения свой)
+
+    Args:
+        engine (AsyncEngine): Движок базы
+        connections (int): Сколько соединений открыть заранее (не больше размера пула)
+        statement_warmers (List[StatementWarmer]): Функции, выполняющие запросы в переданной сессии
+    """
+    started = perf_counter()
+    configure_mappers()
+
+    connections = min(connections, engine.pool.size())
+    async with AsyncExitStack() as stack:
+        # Соединения берутся одновременно, иначе пул будет выдавать одно и то же соединение
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+        )
+        for connection in opened:
+            await connection.execute(text("SELECT 1"))
+            async with AsyncSession(bind=connection) as session:
+                for warmer in statement_warmers:
+                    await warmer(session)
+            await connection.rollback()
+
+    logger.info(
+        "Прогрев завершен за %.2f с, открыто соединений: %d",
+        perf_counter() - started,
+        connections,
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+import asyncpg
+from sqlalchemy.engine import make_url
+from app.core.change_events import (
+    CHANGES_CHANNEL,
+    ChangeEvent,
+    ChangeEventBus,
+    ChangeOperation,
+)
+from app.core.metrics import Counter, metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Как часто проверять соединение: без трафика разрыв TCP-соединения может долго оставаться незамеченным
+_HEALTHCHECK_INTERVAL = 30.0
+
+change_notifications_total = metrics_registry.register(
+    Counter(
+        "db_change_notifications_total",
+        "Количество полученных уведомлений об изменениях в базе",
+        ("table", "operation"),
+    )
+)
+
+
+def asyncpg_dsn(sqlalchemy_uri: str) -> str:
+    """
+    Преобразует URI SQLAlchemy (postgresql+asyncpg://...) в DSN для asyncpg.connect
+    """
+    return make_url(sqlalchemy_uri).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class ChangeListener:
+    """
+    Слушает уведомления PostgreSQL об изменениях справочников (триггеры notify_catalog_change) на отдельном
+    соединении asyncpg вне пула и публикует их в шину событий. После каждой подписки, в том числе первой,
+    публикует RESYNC, так как уведомления до подписки и за время разрыва соединения потеряны
+
+    Attributes:
+        dsn (str): DSN для подключения к базе
+        bus (ChangeEventBus): Шина, в которую публикуются события
+        reconnect_delay (float): Начальная пауза перед переподключением в секундах
+    """
+
+    def __init__(self, dsn: str, bus: ChangeEventBus, reconnect_delay: float = 1.0):
+        self.dsn = dsn
+        self.bus = bus
+        self.reconnect_delay = reconnect_delay
+        self._task: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()
+
+    @property
+    def listening(self) -> bool:
+        """
+        Подписан ли слушатель на канал сейчас. Пока нет, изменения в базе не доходят до шины событий
+        """
+        return self._listening.is_set()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="db-change-listener")
+
+    async def wait_listening(self, timeout: Optional[float] = None):
+        """
+        Ждет подписки на канал уведомлений
+
+        Raises:
+            TimeoutError: Если подписка не выполнена за timeout секунд
+        """
+        await asyncio.wait_for(self._listening.wait(), timeout)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            event = ChangeEvent.from_payload(json.loads(payload))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Некорректное уведомление об изменении: %s", payload)
+            return
+        change_notifications_total.inc((event.table or "", event.operation.value))
+        self.bus.publish(event)
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(CHANGES_CHANNEL, self._on_notification)
+                self._listening.set()
+                delay = self.reconnect_delay
+                # До подписки уведомления не принимались, в том числе до первого подключения: данные,
+                # закэшированные за это время, могли устареть
+                self.bus.publish(ChangeEvent(table=None, operation=ChangeOperation.RESYNC))
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), _HEALTHCHECK_INTERVAL)
+                    except TimeoutError:
+                        await connection.execute("SELECT 1")
+                logger.warning("Соединение для уведомлений об изменениях потеряно, переподключение")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as error:
+                logger.warning("Ошибка соединения для уведомлений об изменениях: %s", error)
+            finally:
+                self._listening.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
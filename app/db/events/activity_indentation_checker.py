@@ -1,14 +1,47 @@
-from sqlalchemy import Connection
-from sqlalchemy.orm import object_session
+from sqlalchemy import Connection, select, update, inspect
+from sqlalchemy.orm import object_session, aliased
 from sqlalchemy.exc import IntegrityError
-from ..models.activity_models import Activity
+from ..models.activity_models import Activity, MAX_ACTIVITY_DEPTH
+
+
+def _get_parent_depth(mapper, connection: Connection, target: Activity) -> int:
+    """
+    Возвращает уровень вложенности родителя. Если родитель уже загружен в сессию, то запрос в базу не выполняется
+
+    Args:
+        mapper (Mapper): Маппер Activity
+        connection (Connection): Соединение с базой
+        target (Activity): Вставляемый/обновляемый вид деятельности
+
+    Returns:
+        depth (int): Уровень вложенности родителя
+
+    Raises:
+        IntegrityError: Если родительский вид деятельности не найден
+    """
+    session = object_session(target)
+    if session is not None:
+        parent = session.identity_map.get(
+            mapper.identity_key_from_primary_key((target.parent,))
+        )
+        if parent is not None and parent.depth is not None:
+            return parent.depth
+
+    parent_depth = connection.execute(
+        select(Activity.depth).where(Activity.id == target.parent)
+    ).scalar()
+    if parent_depth is None:
+        raise IntegrityError("Родительский вид деятельности не найден", None, None)
+    return parent_depth
 
 
 def check_activity_indentation_level(
     mapper: Activity, connection: Connection, target: Activity
 ):
     """
-    Проверяет при каждом INSERT/UPDATE в таблицу Activity, что вложенность каталога видов деятельности не превышает трех уровней
+    Проверяет при каждом INSERT/UPDATE в таблицу Activity, что вложенность каталога видов деятельности не превышает трех уровней,
+    и проставляет поле depth по уровню родителя. Для вставки нужно не более одного чтения из базы, обновление без смены родителя
+    не обращается к базе вовсе
 
     Args:
         mapper (Activity): Класс маппера
@@ -16,23 +49,60 @@ def check_activity_indentation_level(
         target (Activity): Сущность, которая была вставлена/обновлена в базе
 
     Raises:
-        IntegrityError: Если превышен уровень допустимой вложенности
+        IntegrityError: Если превышен уровень допустимой вложенности или родитель не найден
     """
 
-    if target.parent is None:
+    state = inspect(target)
+    parent_changed = state.attrs.parent.history.has_changes()
+    if state.persistent and not parent_changed:
         return
-    
-    first_parent, second_parent, unallowed_parent = None, None, None
-    
-    session = object_session(target)
-    if session is None:
-        first_parent = connection.execute("SELECT parent FROM activities WHERE id = %s", (target.parent,)).fetchone()
-        second_parent = connection.execute("SELECT parent FROM activities WHERE id = %s", (first_parent,)).fetchone()
-        unallowed_parent = connection.execute("SELECT parent FROM activities WHERE id = %s", (second_parent, )).fetchone()
-    else:
-        first_parent = session.query(Activity).filter_by(id=target.parent).first()
-        second_parent = session.query(Activity).filter_by(id=first_parent.parent).first()
-        unallowed_parent = session.query(Activity).filter_by(id=second_parent.parent).first()
-
-    if all((first_parent, second_parent, unallowed_parent)):
-            raise IntegrityError("Нарушение уровней вложенности", None, None)
\ No newline at end of file
+
+    if target.id is not None and target.parent == target.id:
+        raise IntegrityError("Цикл в каталоге видов деятельности", None, None)
+
+    depth = 1 if target.parent is None else _get_parent_depth(mapper, connection, target) + 1
+    if depth > MAX_ACTIVITY_DEPTH:
+        raise IntegrityError("Нарушение уровней вложенности", None, None)
+
+    if state.persistent and target.depth is not None and depth != target.depth:
+        _shift_subtree_depth(connection, target, depth - target.depth)
+
+    target.depth = depth
+
+
+def _shift_subtree_depth(connection: Connection, target: Activity, delta: int):
+    """
+    Сдвигает уровень вложенности всех потомков вида деятельности при смене его родителя
+
+    Args:
+        connection (Connection): Соединение с базой
+        target (Activity): Вид деятельности, у которого сменился родитель
+        delta (int): Изменение уровня вложенности
+
+    Raises:
+        IntegrityError: Если новый родитель является потомком вида деятельности, либо потомки выходят за допустимый уровень вложенности
+    """
+    subtree = (
+        select(Activity.id, Activity.depth)
+        .where(Activity.parent == target.id)
+        .cte(name="subtree", recursive=True)
+    )
+    child = aliased(Activity)
+    subtree = subtree.union_all(
+        select(child.id, child.depth).where(child.parent == subtree.c.id)
+    )
+    descendants = connection.execute(select(subtree.c.id, subtree.c.depth)).all()
+    if not descendants:
+        return
+
+    if any(row.id == target.parent for row in descendants):
+        raise IntegrityError("Цикл в каталоге видов деятельности", None, None)
+    if max(row.depth for row in descendants) + delta > MAX_ACTIVITY_DEPTH:
+        raise IntegrityError("Нарушение уровней вложенности", None, None)
+
+    connection.execute(
+        update(Activity)
+        .where(Activity.id.in_([row.id for row in descendants]))
+        .values(depth=Activity.depth + delta)
+    )
+
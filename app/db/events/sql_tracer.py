@@ -0,0 +1,115 @@
+import logging
+import re
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Списки параметров IN (...) разной длины приводятся к одной форме запроса
+_PARAMETER = r"(?:\$\d+|%\(\w+\)s|\?)(?:::\w+)?"
+_PARAMETER_LIST = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})*\s*\)")
+_SENSITIVE_TABLES = ("users",)
+_MAX_PARAMETERS_LENGTH = 500
+
+
+class RequestQueryStats:
+    """
+    SQL-статистика одного HTTP-запроса
+
+    Attributes:
+        count (int): Количество выполненных запросов
+        total_time (float): Суммарное время выполнения запросов в секундах
+        shapes (Dict[str, int]): Количество выполнений для каждой формы запроса
+        repeated (List[str]): Формы запросов, повторившиеся не меньше порога N+1
+    """
+
+    __slots__ = ("count", "total_time", "shapes", "repeated")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Dict[str, int] = {}
+        self.repeated: List[str] = []
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "sql_request_stats", default=None
+)
+
+
+def start_request_trace() -> RequestQueryStats:
+    """
+    Начинает сбор SQL-статистики для текущего запроса (контекста asyncio-задачи)
+
+    Returns:
+        stats (RequestQueryStats): Статистика, которая будет заполняться по мере выполнения запросов
+    """
+    stats = RequestQueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_trace() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAMETER_LIST.sub("(?)", statement)
+
+
+def _format_parameters(statement: str, parameters) -> str:
+    if any(table in statement for table in _SENSITIVE_TABLES):
+        return "<скрыто>"
+    formatted = repr(parameters)
+    if len(formatted) > _MAX_PARAMETERS_LENGTH:
+        formatted = formatted[:_MAX_PARAMETERS_LENGTH] + "..."
+    return formatted
+
+
+def install_sql_tracer(
+    engine: Engine, slow_query_threshold_ms: float, n_plus_one_threshold: int
+):
+    """
+    Подключает трассировку SQL к движку: подсчет запросов и времени в рамках HTTP-запроса,
+    журнал медленных запросов и поиск повторяющихся однотипных запросов (вероятный N+1)
+
+    Args:
+        engine (Engine): Синхронный движок (для асинхронного - AsyncEngine.sync_engine)
+        slow_query_threshold_ms (float): Порог медленного запроса в миллисекундах
+        n_plus_one_threshold (int): Сколько выполнений одного и того же запроса за HTTP-запрос считать вероятным N+1
+    """
+    if hasattr(engine, "_sql_tracer_installed"):
+        return
+    setattr(engine, "_sql_tracer_installed", True)
+    slow_query_threshold = slow_query_threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_started = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - context._trace_started
+
+        if elapsed >= slow_query_threshold:
+            logger.warning(
+                "Медленный SQL-запрос (%.1f мс): %s; параметры: %s",
+                elapsed * 1000,
+                statement,
+                _format_parameters(statement, parameters),
+            )
+
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        stats.count += 1
+        stats.total_time += elapsed
+
+        shape = statement_shape(statement)
+        executions = stats.shapes.get(shape, 0) + 1
+        stats.shapes[shape] = executions
+        if executions == n_plus_one_threshold:
+            stats.repeated.append(shape)
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, String, ForeignKey, Integer, CheckConstraint
 from sqlalchemy.orm import relationship
 from .base_model import Model
 
+MAX_ACTIVITY_DEPTH = 3
+
+
 class Activity(Model):
     """
     Вид деятельности, которым может заниматься организация
@@ -10,16 +13,23 @@ class Activity(Model):
         id (int): ID вида деятельности
         name (str): Название вида деятельности
         parent (ForeignKey(int)): Ссылка на основной вид деятельности для подвида. Все виды деятельности, у которых нет parent, являются основными видами, а те, у которых есть - подвидами
+        depth (int): Уровень вложенности вида деятельности в каталоге (1 - основной вид). Заполняется автоматически по уровню родителя
 
     Examples:
         Пример вида деятельности с подвидами:
             Activity(id=1, name="Еда", parent=None) -> Activity(id=2, name="Молочная продукция", parent=1)
     """
     __tablename__ = "activities"
+    __table_args__ = (
+        CheckConstraint(
+            f"depth BETWEEN 1 AND {MAX_ACTIVITY_DEPTH}", name="ck_activities_depth"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     name = Column(String, unique=True)
     parent = Column(Integer, ForeignKey("activities.id", ondelete="cascade"))
+    depth = Column(Integer, nullable=False, default=1, server_default="1")
 
     sub_activities = relationship(
         "Activity",
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Index, String, Integer, Float
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from .base_model import Model
 
 class Building(Model):
@@ -11,13 +12,25 @@ class Building(Model):
         address (str): Уникальный адрес здания
         latitude (float): Географическая широта, на котрой расположено здание
         longitude (float): Географическая долгота, на которой расположено здание
+        address_search (TSVECTOR): Слова адреса для полнотекстового поиска. Вычисляется базой, не загружается вместе
+            со зданием
     """
     __tablename__ = "buildings"
+    __table_args__ = (
+        Index("ix_buildings_address_search", "address_search", postgresql_using="gin"),
+        Index("ix_buildings_latitude_longitude", "latitude", "longitude"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     address = Column(String, nullable=False)
     latitude = Column(Float)
     longitude = Column(Float)
+    address_search = deferred(
+        Column(
+            TSVECTOR,
+            Computed("to_tsvector('simple', translate(lower(address), 'ё', 'е'))", persisted=True),
+        )
+    )
 
     organisations = relationship("Organisation", backref="building", lazy="selectin")
 
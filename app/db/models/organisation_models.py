@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, Computed, String, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.associationproxy import association_proxy
 from .base_model import Model
@@ -23,7 +23,7 @@ class Organisation(Model):
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     name = Column(String, nullable=False, unique=True)
-    building_id = Column(Integer, ForeignKey("buildings.id"))
+    building_id = Column(Integer, ForeignKey("buildings.id"), index=True)
 
     phones = relationship(
         "OrganisationPhones",
@@ -53,13 +53,17 @@ class OrganisationPhones(Model):
         phone_id (int): Уникальный ID телефона
         organisation_id (int): Внешний ключ к организации, которой принадлежит номер телефона
         phone (String): Номер телефона
+        phone_normalized (String): Номер в формате E.164 (+79001234567). Вычисляется базой функцией normalize_phone
     """
 
     __tablename__ = "organisation_phones"
 
     phone_id = Column(Integer, primary_key=True, autoincrement=True)
-    organisation_id = Column(Integer, ForeignKey("organisations.id"))
+    organisation_id = Column(Integer, ForeignKey("organisations.id"), index=True)
     phone = Column(String, unique=True)
+    phone_normalized = Column(
+        String, Computed("normalize_phone(phone)", persisted=True), unique=True, index=True
+    )
 
     organisation = relationship("Organisation", back_populates="phones")
 
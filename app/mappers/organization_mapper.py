@@ -1,5 +1,5 @@
-from typing import List
-from app.api.models.organisation import Organization
+from typing import AbstractSet, List
+from app.api.models.organisation import Organization, PartialOrganization
 from app.db.models.organisation_models import Organisation, OrganisationActivities, OrganisationPhones
 from app.db.models.activity_models import Activity
 from app.api.models.activity import ActivityModel
@@ -15,6 +15,31 @@ class OrganizationMapper:
         activities = OrganizationActivitiesMapper.convert(db_model.activities)
         return Organization(id = db_model.id, name=db_model.name, address=db_model.building.address, phones=phones, activities=activities)
 
+    @staticmethod
+    def convert_partial(db_model: Organisation, fields: AbstractSet[str]) -> PartialOrganization:
+        """
+        Преобразует организацию, обращаясь только к запрошенным полям: незапрошенные колонки и связи не загружены
+
+        Args:
+            db_model (Organisation): Организация из базы
+            fields (AbstractSet[str]): Запрошенные поля
+
+        Returns:
+            organization (PartialOrganization): Организация с заполненными запрошенными полями
+        """
+        values = {}
+        if "id" in fields:
+            values["id"] = db_model.id
+        if "name" in fields:
+            values["name"] = db_model.name
+        if "address" in fields:
+            values["address"] = db_model.building.address
+        if "phones" in fields:
+            values["phones"] = OrganizationPhonesMapper.convert(db_model.phones)
+        if "activities" in fields:
+            values["activities"] = OrganizationActivitiesMapper.convert(db_model.activities)
+        return PartialOrganization(**values)
+
 class OrganizationPhonesMapper:
     """
     Маппер для преобразования модели телефонов организации в список из строк
@@ -0,0 +1,127 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import aliased
+from .base_service import BaseService
+from app.api.models.activity import ActivityFacet
+from app.core.geo import haversine_km, radius_bounding_box
+from app.db.models.activity_models import Activity
+from app.db.models.building_models import Building
+from app.db.models.organisation_models import Organisation, OrganisationActivities
+from app.exceptions.service_exceptions import ActivityNotFoundError
+
+
+class ActivityService(BaseService):
+    """
+    Сервис для работы с каталогом видов деятельности
+    """
+
+    async def count_organizations_by_activity(
+        self,
+        building_id: Optional[int] = None,
+        square: Optional[Tuple[float, float, float, float]] = None,
+        radius: Optional[Tuple[float, float, float]] = None,
+        activity_id: Optional[int] = None,
+        rollup: bool = False,
+    ) -> List[ActivityFacet]:
+        """
+        Считает организации по видам деятельности одним агрегирующим запросом, без загрузки самих организаций.
+        Фильтры по зданию, области и радиусу объединяются через И
+
+        Args:
+            building_id (Optional[int]): Учитывать только организации из этого здания
+            square (Optional[Tuple[float, float, float, float]]): Прямоугольная область: северо-восточные широта
+                и долгота, юго-западные широта и долгота
+            radius (Optional[Tuple[float, float, float]]): Круг: широта и долгота центра, радиус в километрах
+            activity_id (Optional[int]): Считать только виды деятельности из поддерева этого вида
+            rollup (bool): Засчитывать организацию также всем родительским видам деятельности ее видов.
+                Организация с несколькими подвидами одного вида засчитывается ему один раз
+
+        Returns:
+            facets (List[ActivityFacet]): Виды деятельности с количеством организаций, по убыванию количества.
+                Виды без организаций не возвращаются
+
+        Raises:
+            ActivityNotFoundError: Если указанного вида деятельности не найдено
+        """
+        links = OrganisationActivities
+        group_column = links.activity_id
+        stmt = select(links.organisation_id).select_from(links)
+
+        if rollup:
+            # Пары (вид деятельности, он сам или его предок)
+            ancestors = select(
+                Activity.id.label("activity_id"),
+                Activity.id.label("ancestor_id"),
+                Activity.parent.label("parent"),
+            ).cte(name="activity_ancestors", recursive=True)
+            a_parent = aliased(Activity)
+            ancestors = ancestors.union_all(
+                select(ancestors.c.activity_id, a_parent.id, a_parent.parent).join(
+                    a_parent, a_parent.id == ancestors.c.parent
+                )
+            )
+            stmt = stmt.join(ancestors, ancestors.c.activity_id == links.activity_id)
+            group_column = ancestors.c.ancestor_id
+
+        if activity_id is not None:
+            activity_tree = (
+                select(Activity.id)
+                .where(Activity.id == activity_id)
+                .cte(name="activity_tree", recursive=True)
+            )
+            a_child = aliased(Activity)
+            activity_tree = activity_tree.union_all(
+                select(a_child.id).where(a_child.parent == activity_tree.c.id)
+            )
+            stmt = stmt.where(group_column.in_(select(activity_tree.c.id)))
+
+        if building_id is not None or square is not None or radius is not None:
+            stmt = stmt.join(Organisation, Organisation.id == links.organisation_id)
+            if building_id is not None:
+                stmt = stmt.where(Organisation.building_id == building_id)
+        if square is not None or radius is not None:
+            stmt = stmt.join(Building, Building.id == Organisation.building_id)
+            if square is not None:
+                ne_lat, ne_lon, sw_lat, sw_lon = square
+                stmt = stmt.where(
+                    Building.latitude.between(sw_lat, ne_lat),
+                    Building.longitude.between(sw_lon, ne_lon),
+                )
+            if radius is not None:
+                center_latitude, center_longitude, radius_km = radius
+                ne_lat, ne_lon, sw_lat, sw_lon = radius_bounding_box(
+                    center_latitude, center_longitude, radius_km
+                )
+                stmt = stmt.where(
+                    Building.latitude.between(sw_lat, ne_lat),
+                    Building.longitude.between(sw_lon, ne_lon),
+                    haversine_km(
+                        Building.latitude, Building.longitude, center_latitude, center_longitude
+                    )
+                    <= radius_km,
+                )
+
+        counts = (
+            stmt.with_only_columns(
+                group_column.label("activity_id"),
+                func.count(distinct(links.organisation_id)).label("organizations"),
+            )
+            .group_by(group_column)
+            .subquery("activity_counts")
+        )
+        query = await self.session.execute(
+            select(
+                Activity.id, Activity.name, Activity.parent, Activity.depth, counts.c.organizations
+            )
+            .join(counts, counts.c.activity_id == Activity.id)
+            .order_by(counts.c.organizations.desc(), Activity.id)
+        )
+        facets = [ActivityFacet.model_validate(row, from_attributes=True) for row in query]
+
+        if not facets and activity_id is not None:
+            # Существование вида деятельности проверяется только для пустого результата, чтобы обычный запрос был один
+            exists = await self.session.scalar(select(Activity.id).where(Activity.id == activity_id))
+            if exists is None:
+                raise ActivityNotFoundError()
+
+        return facets
@@ -0,0 +1,87 @@
+import re
+from typing import List, Optional
+from sqlalchemy import func, select
+from .base_service import BaseService
+from app.api.models.building import AddressSearchMode, BuildingSearchResult
+from app.db.models.building_models import Building
+from app.db.models.organisation_models import Organisation
+from app.exceptions.service_exceptions import NoBuildingsFoundError
+
+# Слова адреса - последовательности букв и цифр, как их выделяет конфигурация simple в колонке address_search.
+# Остальные символы (в том числе операторы tsquery) в запрос не попадают
+_ADDRESS_WORD = re.compile(r"[^\W_]+")
+
+
+def address_tsquery(query: str, mode: AddressSearchMode) -> Optional[str]:
+    """
+    Строит текст tsquery для поиска по колонке address_search. Слова нормализуются так же, как в колонке:
+    нижний регистр и ё -> е, каждое слово ищется как начало слова адреса
+
+    Args:
+        query (str): Строка поиска
+        mode (AddressSearchMode): Режим поиска
+
+    Returns:
+        tsquery (Optional[str]): Текст для to_tsquery('simple', ...) или None, если в строке нет слов
+    """
+    words = _ADDRESS_WORD.findall(query.lower().replace("ё", "е"))
+    if not words:
+        return None
+    operator = " & " if mode is AddressSearchMode.PREFIX else " | "
+    return operator.join(f"{word}:*" for word in words)
+
+
+class BuildingService(BaseService):
+    """
+    Сервис для поиска зданий
+    """
+
+    async def search_buildings_by_address(
+        self,
+        query: str,
+        mode: AddressSearchMode = AddressSearchMode.PREFIX,
+        limit: int = 20,
+        with_counts: bool = False,
+    ) -> List[BuildingSearchResult]:
+        """
+        Ищет здания по словам адреса через GIN-индекс по колонке address_search. Порядок слов в запросе не важен,
+        сокращения и номера домов ищутся как обычные слова ("пушкина 57", "москва ул пушк")
+
+        Args:
+            query (str): Строка поиска
+            mode (AddressSearchMode): Режим поиска
+            limit (int): Максимальное количество зданий в ответе
+            with_counts (bool): Посчитать количество организаций в каждом найденном здании
+
+        Returns:
+            buildings (List[BuildingSearchResult]): Здания в порядке релевантности
+
+        Raises:
+            NoBuildingsFoundError: Если не найдено ни одного здания
+        """
+        tsquery_text = address_tsquery(query, mode)
+        if tsquery_text is None:
+            raise NoBuildingsFoundError()
+
+        tsquery = func.to_tsquery("simple", tsquery_text)
+        rank = func.ts_rank(Building.address_search, tsquery)
+        columns = [Building.id, Building.address, Building.latitude, Building.longitude]
+        if with_counts:
+            columns.append(
+                select(func.count(Organisation.id))
+                .where(Organisation.building_id == Building.id)
+                .correlate(Building)
+                .scalar_subquery()
+                .label("organizations")
+            )
+        stmt = (
+            select(*columns)
+            .where(Building.address_search.op("@@")(tsquery))
+            .order_by(rank.desc(), Building.address, Building.id)
+            .limit(limit)
+        )
+        rows = (await self.session.execute(stmt)).mappings().all()
+        if not rows:
+            raise NoBuildingsFoundError()
+
+        return [BuildingSearchResult(**row) for row in rows]
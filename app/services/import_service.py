@@ -0,0 +1,336 @@
+import json
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import text
+from .base_service import BaseService
+from app.core.change_events import CHANGES_CHANNEL, ChangeOperation
+from app.db.models.activity_models import MAX_ACTIVITY_DEPTH
+
+
+@dataclass
+class ImportReport:
+    """
+    Результат массового импорта одной сущности
+
+    Attributes:
+        entity (str): Название импортируемой сущности
+        received (int): Количество прочитанных строк
+        imported (int): Количество вставленных/обновленных строк
+        rejected (int): Количество отклоненных строк (некорректные значения, ненайденные внешние ключи, нарушение вложенности)
+        seconds (float): Время импорта в секундах
+    """
+
+    entity: str
+    received: int = 0
+    imported: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.received / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.entity}: {self.imported}/{self.received} rows in {self.seconds:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/s), rejected {self.rejected}"
+        )
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def _to_str(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value).strip()
+
+
+# Для каждой сущности: колонки staging-таблицы с их типами и преобразователи полей входной записи
+_STAGING_COLUMNS: Dict[str, List[Tuple[str, str, Callable[[Any], Any]]]] = {
+    "buildings": [
+        ("id", "integer", _to_int),
+        ("address", "text", _to_str),
+        ("latitude", "double precision", _to_float),
+        ("longitude", "double precision", _to_float),
+    ],
+    "activities": [
+        ("id", "integer", _to_int),
+        ("name", "text", _to_str),
+        ("parent", "integer", _to_int),
+    ],
+    "organisations": [
+        ("id", "integer", _to_int),
+        ("name", "text", _to_str),
+        ("building_id", "integer", _to_int),
+    ],
+    "organisation_phones": [
+        ("organisation_id", "integer", _to_int),
+        ("phone", "text", _to_str),
+    ],
+    "organisation_actvities": [
+        ("organisation_id", "integer", _to_int),
+        ("activity_id", "integer", _to_int),
+    ],
+}
+
+# Set-based перенос данных из staging-таблиц в целевые. Строки с ненайденными внешними ключами
+# или дубликатами уникальных полей отбрасываются целиком на уровне запроса
+_UPSERT_STATEMENTS: Dict[str, str] = {
+    "buildings": """
+        WITH upserted AS (
+            INSERT INTO buildings (id, address, latitude, longitude)
+            SELECT DISTINCT ON (id) id, address, latitude, longitude
+            FROM staging_buildings
+            WHERE id IS NOT NULL AND address IS NOT NULL
+            ORDER BY id
+            ON CONFLICT (id) DO UPDATE SET
+                address = EXCLUDED.address,
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude
+            RETURNING 1
+        )
+        SELECT count(*) FROM upserted
+    """,
+    # Пакетная проверка вложенности каталога: уровни считаются одним рекурсивным запросом по объединению пакета
+    # и уже существующих видов деятельности, вместо построчной проверки в событиях ORM. Виды деятельности
+    # с ненайденным родителем, в цикле или глубже MAX_ACTIVITY_DEPTH не попадают в tree и отклоняются
+    "activities": f"""
+        WITH RECURSIVE catalog AS (
+            SELECT DISTINCT ON (id) id, name, parent FROM staging_activities
+            WHERE id IS NOT NULL AND name IS NOT NULL
+              AND name NOT IN (
+                  SELECT name FROM staging_activities
+                  WHERE name IS NOT NULL
+                  GROUP BY name HAVING count(DISTINCT id) > 1
+              )
+            ORDER BY id
+        ), merged AS (
+            SELECT id, parent FROM catalog
+            UNION ALL
+            SELECT id, parent FROM activities
+            WHERE id NOT IN (SELECT id FROM catalog)
+        ), tree AS (
+            SELECT id, 1 AS depth FROM merged WHERE parent IS NULL
+            UNION ALL
+            SELECT merged.id, tree.depth + 1
+            FROM merged JOIN tree ON merged.parent = tree.id
+            WHERE tree.depth <= {MAX_ACTIVITY_DEPTH}
+        ), upserted AS (
+            INSERT INTO activities (id, name, parent, depth)
+            SELECT catalog.id, catalog.name, catalog.parent, tree.depth
+            FROM catalog
+            JOIN tree ON tree.id = catalog.id
+            WHERE tree.depth <= {MAX_ACTIVITY_DEPTH}
+              AND NOT EXISTS (
+                  SELECT 1 FROM activities AS existing
+                  WHERE existing.name = catalog.name AND existing.id <> catalog.id
+              )
+            ON CONFLICT (id) DO UPDATE SET
+                name = EXCLUDED.name,
+                parent = EXCLUDED.parent,
+                depth = EXCLUDED.depth
+            RETURNING 1
+        )
+        SELECT count(*) FROM upserted
+    """,
+    "organisations": """
+        WITH upserted AS (
+            INSERT INTO organisations (id, name, building_id)
+            SELECT DISTINCT ON (staged.id) staged.id, staged.name, staged.building_id
+            FROM staging_organisations AS staged
+            LEFT JOIN buildings ON buildings.id = staged.building_id
+            WHERE staged.id IS NOT NULL AND staged.name IS NOT NULL
+              AND staged.name NOT IN (
+                  SELECT name FROM staging_organisations
+                  WHERE name IS NOT NULL
+                  GROUP BY name HAVING count(DISTINCT id) > 1
+              )
+              AND (staged.building_id IS NULL OR buildings.id IS NOT NULL)
+              AND NOT EXISTS (
+                  SELECT 1 FROM organisations AS existing
+                  WHERE existing.name = staged.name AND existing.id <> staged.id
+              )
+            ORDER BY staged.id
+            ON CONFLICT (id) DO UPDATE SET
+                name = EXCLUDED.name,
+                building_id = EXCLUDED.building_id
+            RETURNING 1
+        )
+        SELECT count(*) FROM upserted
+    """,
+    # Телефоны сравниваются по нормализованному номеру: один номер в разных форматах записи - одна строка
+    "organisation_phones": """
+        WITH upserted AS (
+            INSERT INTO organisation_phones (organisation_id, phone)
+            SELECT DISTINCT ON (normalize_phone(staged.phone)) staged.organisation_id, staged.phone
+            FROM staging_organisation_phones AS staged
+            JOIN organisations ON organisations.id = staged.organisation_id
+            WHERE normalize_phone(staged.phone) IS NOT NULL
+            ORDER BY normalize_phone(staged.phone)
+            ON CONFLICT (phone_normalized) DO UPDATE SET
+                organisation_id = EXCLUDED.organisation_id,
+                phone = EXCLUDED.phone
+            RETURNING 1
+        )
+        SELECT count(*) FROM upserted
+    """,
+    "organisation_actvities": """
+        WITH upserted AS (
+            INSERT INTO organisation_actvities (organisation_id, activity_id)
+            SELECT DISTINCT staged.organisation_id, staged.activity_id
+            FROM staging_organisation_actvities AS staged
+            JOIN organisations ON organisations.id = staged.organisation_id
+            JOIN activities ON activities.id = staged.activity_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM organisation_actvities AS existing
+                WHERE existing.organisation_id = staged.organisation_id
+                  AND existing.activity_id = staged.activity_id
+            )
+            RETURNING 1
+        )
+        SELECT count(*) FROM upserted
+    """,
+}
+
+# Пересчет уровней вложенности уже существующих видов деятельности, если импорт сменил родителя у их предков.
+# Выход за допустимый уровень нарушит ck_activities_depth и откатит импорт целиком
+_POST_IMPORT_STATEMENTS: Dict[str, str] = {
+    "activities": f"""
+        WITH RECURSIVE tree AS (
+            SELECT id, 1 AS depth FROM activities WHERE parent IS NULL
+            UNION ALL
+            SELECT activities.id, tree.depth + 1
+            FROM activities JOIN tree ON activities.parent = tree.id
+            WHERE tree.depth <= {MAX_ACTIVITY_DEPTH}
+        )
+        UPDATE activities SET depth = tree.depth
+        FROM tree
+        WHERE activities.id = tree.id AND activities.depth <> tree.depth
+    """,
+}
+
+# Таблицы, в которые ID приходят из файлов, поэтому после импорта нужно сдвинуть последовательности
+_SEQUENCES = {
+    "buildings": "id",
+    "activities": "id",
+    "organisations": "id",
+}
+
+IMPORT_ORDER = (
+    "buildings",
+    "activities",
+    "organisations",
+    "organisation_phones",
+    "organisation_actvities",
+)
+
+
+class BulkImportService(BaseService):
+    """
+    Сервис массового импорта справочных данных через COPY во временные staging-таблицы
+    и последующий set-based upsert в целевые таблицы
+    """
+
+    async def import_records(
+        self, entity: str, records: Iterable[Dict[str, Any]]
+    ) -> ImportReport:
+        """
+        Импортирует поток записей одной сущности в рамках одной транзакции
+
+        Args:
+            entity (str): Целевая таблица (одна из IMPORT_ORDER)
+            records (Iterable[Dict[str, Any]]): Поток записей, ключи совпадают с названиями колонок
+
+        Returns:
+            report (ImportReport): Статистика импорта
+
+        Raises:
+            ValueError: Если передана неизвестная сущность
+        """
+        if entity not in _STAGING_COLUMNS:
+            raise ValueError(f"Unknown entity {entity}")
+
+        columns = _STAGING_COLUMNS[entity]
+        staging_table = f"staging_{entity}"
+        report = ImportReport(entity=entity)
+        started = perf_counter()
+
+        # Вместо уведомления на каждую строку после импорта отправляется одно уведомление о таблице целиком
+        await self.session.execute(text("SELECT set_config('app.suppress_notify', 'on', true)"))
+
+        column_definitions = ", ".join(f"{name} {sql_type}" for name, sql_type, _ in columns)
+        await self.session.execute(text(f"DROP TABLE IF EXISTS {staging_table}"))
+        await self.session.execute(
+            text(f"CREATE TEMP TABLE {staging_table} ({column_definitions}) ON COMMIT DROP")
+        )
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            staging_table,
+            records=self._convert_records(records, columns, report),
+            columns=[name for name, _, _ in columns],
+        )
+        await self.session.execute(text(f"ANALYZE {staging_table}"))
+
+        imported = await self.session.execute(text(_UPSERT_STATEMENTS[entity]))
+        report.imported = imported.scalar()
+        report.rejected = report.received - report.imported
+
+        if entity in _POST_IMPORT_STATEMENTS:
+            await self.session.execute(text(_POST_IMPORT_STATEMENTS[entity]))
+
+        if entity in _SEQUENCES:
+            key = _SEQUENCES[entity]
+            await self.session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{entity}', '{key}'), "
+                    f"(SELECT COALESCE(max({key}), 0) + 1 FROM {entity}), false)"
+                )
+            )
+
+        await self.session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {
+                "channel": CHANGES_CHANNEL,
+                "payload": json.dumps({"table": entity, "op": ChangeOperation.BULK.value}),
+            },
+        )
+        await self.session.commit()
+        report.seconds = perf_counter() - started
+        return report
+
+    @staticmethod
+    def _convert_records(
+        records: Iterable[Dict[str, Any]],
+        columns: List[Tuple[str, str, Callable[[Any], Any]]],
+        report: ImportReport,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        Преобразует записи в кортежи для COPY, пропуская строки с некорректными значениями
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Поток записей
+            columns (List[Tuple[str, str, Callable[[Any], Any]]]): Описание колонок staging-таблицы
+            report (ImportReport): Отчет, в котором считается количество прочитанных строк
+
+        Yields:
+            row (Tuple[Any, ...]): Строка для COPY
+        """
+        for record in records:
+            report.received += 1
+            try:
+                yield tuple(convert(record.get(name)) for name, _, convert in columns)
+            except (TypeError, ValueError):
+                continue
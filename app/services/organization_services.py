@@ -1,8 +1,12 @@
-from typing import List, Optional
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload, aliased
-from geopy.distance import geodesic
-from app.api.models.organisation import Organization
+from collections import defaultdict
+from typing import AbstractSet, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from sqlalchemy import Float, Integer, String, and_, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import aliased, joinedload, lazyload, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+from pydantic import TypeAdapter
+from app.api.models.organisation import Organization, PartialOrganization
 from .base_service import BaseService
 from app.db.models.organisation_models import (
     Organisation,
@@ -11,6 +15,15 @@ from app.db.models.organisation_models import (
 )
 from app.db.models.activity_models import Activity
 from app.db.models.building_models import Building
+from app.core.geo import (
+    distances_to_polyline,
+    merge_segment_boxes,
+    points_in_polygon,
+    polygon_bounding_box,
+    radius_bounding_box,
+)
+from app.core.payload_cache import building_payload_cache
+from app.core.single_flight import single_flight
 from app.mappers.organization_mapper import OrganizationMapper
 from app.exceptions.service_exceptions import (
     BuildingWithNoOrganizationsError,
@@ -22,18 +35,113 @@ from app.exceptions.service_exceptions import (
 )
 
 
+OrganizationResult = Union[Organization, PartialOrganization]
+
+
+def organization_loader_options(
+    fields: Optional[AbstractSet[str]] = None, building_loaded: bool = False
+) -> List[LoaderOption]:
+    """
+    Строит опции загрузки организации под запрошенные поля: загружаются только нужные колонки,
+    а незапрошенные связи (телефоны, виды деятельности, здание) не загружаются отдельными запросами
+
+    Args:
+        fields (Optional[AbstractSet[str]]): Запрошенные поля, None - все поля
+        building_loaded (bool): Организации загружаются из уже загруженного здания, адрес берется из identity map
+
+    Returns:
+        options (List[LoaderOption]): Опции для select(Organisation).options(...) или для вложенной загрузки организаций
+    """
+    if fields is None:
+        options = [
+            selectinload(Organisation.phones),
+            selectinload(Organisation.organisation_activities).selectinload(
+                OrganisationActivities.activity
+            ),
+        ]
+        if not building_loaded:
+            options.append(selectinload(Organisation.building))
+        return options
+
+    columns = [Organisation.id]
+    if "name" in fields:
+        columns.append(Organisation.name)
+    if "address" in fields:
+        columns.append(Organisation.building_id)
+    options = [load_only(*columns)]
+
+    if "phones" in fields:
+        options.append(selectinload(Organisation.phones))
+    else:
+        options.append(lazyload(Organisation.phones))
+
+    if "activities" in fields:
+        options.append(
+            selectinload(Organisation.organisation_activities).selectinload(
+                OrganisationActivities.activity
+            )
+        )
+    else:
+        options.append(lazyload(Organisation.organisation_activities))
+
+    if "address" in fields and not building_loaded:
+        options.append(
+            joinedload(Organisation.building).options(
+                load_only(Building.address), lazyload(Building.organisations)
+            )
+        )
+    else:
+        options.append(lazyload(Organisation.building))
+
+    return options
+
+
+def convert_organizations(
+    organizations: Sequence[Organisation], fields: Optional[AbstractSet[str]] = None
+) -> List[OrganizationResult]:
+    if fields is None:
+        return [OrganizationMapper.convert(instance) for instance in organizations]
+    return [OrganizationMapper.convert_partial(instance, fields) for instance in organizations]
+
+
+_organizations_adapter = TypeAdapter(List[Organization])
+_partial_organizations_adapter = TypeAdapter(List[PartialOrganization])
+
+
+def serialize_organizations(
+    organizations: Sequence[Organisation], fields: Optional[AbstractSet[str]] = None
+) -> bytes:
+    """
+    Сериализует организации в JSON-объекты через запятую без скобок массива, как их сериализует
+    ответ эндпоинта с response_model_exclude_unset. Фрагменты нескольких зданий склеиваются join_payloads
+    """
+    converted = convert_organizations(organizations, fields)
+    if fields is None:
+        return _organizations_adapter.dump_json(converted)[1:-1]
+    return _partial_organizations_adapter.dump_json(converted, exclude_unset=True)[1:-1]
+
+
+def join_payloads(payloads: Sequence[bytes]) -> bytes:
+    """
+    Собирает JSON-массив организаций из фрагментов serialize_organizations, пустые фрагменты пропускаются
+    """
+    return b"[" + b",".join(payload for payload in payloads if payload) + b"]"
+
+
 class OrganizationService(BaseService):
+    @single_flight.coalesced
     async def get_organizations_from_specific_building(
-        self, building_id: int
-    ) -> List[Organization]:
+        self, building_id: int, fields: Optional[AbstractSet[str]] = None
+    ) -> List[OrganizationResult]:
         """
         Возвращает список организаций, расположенных в определенном здании
 
         Args:
             building_id (int): ID здания
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
 
         Returns:
-            organizations (List[Organization]): Список организаций, находящихся в этом здании
+            organizations (List[OrganizationResult]): Список организаций, находящихся в этом здании
 
         Raises:
             BuildingNotFoundException: Если указанного здания не найдено
@@ -44,10 +152,7 @@ class OrganizationService(BaseService):
             .where(Building.id == building_id)
             .options(
                 selectinload(Building.organisations).options(
-                    selectinload(Organisation.phones),
-                    selectinload(Organisation.organisation_activities).selectinload(
-                        OrganisationActivities.activity
-                    ),
+                    *organization_loader_options(fields, building_loaded=True)
                 )
             )
         )
@@ -62,21 +167,97 @@ class OrganizationService(BaseService):
                 f"Building {building_id} has no organizations"
             )
 
-        return [
-            OrganizationMapper.convert(instance) for instance in building.organisations
-        ]
+        return convert_organizations(building.organisations, fields)
+
+    @single_flight.coalesced
+    async def get_organizations_payload_from_building(
+        self, building_id: int, fields: Optional[FrozenSet[str]] = None
+    ) -> bytes:
+        """
+        Возвращает организации здания сериализованным JSON-массивом из кэша организаций по зданиям
+
+        Args:
+            building_id (int): ID здания
+            fields (Optional[FrozenSet[str]]): Запрошенные поля организаций, None - все поля
 
+        Returns:
+            payload (bytes): JSON-массив организаций, как в ответе get_organizations_from_specific_building
+
+        Raises:
+            BuildingNotFoundException: Если указанного здания не найдено
+            BuildingWithNoOrganizationsError: Если в указанном здании нет организаций
+        """
+        payload = (await self.get_buildings_payloads([building_id], fields))[0]
+        if not payload:
+            building = await self.session.scalar(select(Building.id).where(Building.id == building_id))
+            if building is None:
+                raise BuildingNotFoundException(f"Building with id {building_id} not found")
+            raise BuildingWithNoOrganizationsError(f"Building {building_id} has no organizations")
+
+        return join_payloads([payload])
+
+    async def get_buildings_payloads(
+        self, building_ids: Sequence[int], fields: Optional[FrozenSet[str]] = None
+    ) -> List[bytes]:
+        """
+        Возвращает сериализованные организации каждого здания (фрагменты serialize_organizations). Фрагменты
+        берутся из кэша организаций по зданиям, организации отсутствующих в кэше зданий загружаются одним запросом
+
+        Args:
+            building_ids (Sequence[int]): ID зданий
+            fields (Optional[FrozenSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            payloads (List[bytes]): Фрагменты в порядке зданий, для зданий без организаций - пустые
+        """
+        payloads: Dict[int, bytes] = {}
+        versions = {}
+        for building_id in building_ids:
+            payload = building_payload_cache.get(building_id, fields)
+            if payload is not None:
+                payloads[building_id] = payload
+            elif building_id not in versions:
+                versions[building_id] = building_payload_cache.version(building_id)
+
+        if versions:
+            ids = bindparam("building_ids", list(versions), type_=ARRAY(Integer))
+            stmt = (
+                select(Organisation.building_id, Organisation)
+                .where(Organisation.building_id == any_(ids))
+                .order_by(Organisation.id)
+                .options(*organization_loader_options(fields))
+            )
+            organizations = defaultdict(list)
+            for building_id, organization in (await self.session.execute(stmt)).all():
+                organizations[building_id].append(organization)
+
+            for building_id, version in versions.items():
+                building_organizations = organizations.get(building_id, [])
+                payload = serialize_organizations(building_organizations, fields)
+                payloads[building_id] = payload
+                building_payload_cache.put(
+                    building_id,
+                    fields,
+                    version,
+                    payload,
+                    [organization.id for organization in building_organizations],
+                )
+
+        return [payloads[building_id] for building_id in building_ids]
+
+    @single_flight.coalesced
     async def get_organizations_by_activity_id(
-        self, activity_id: int
-    ) -> List[Organization]:
+        self, activity_id: int, fields: Optional[AbstractSet[str]] = None
+    ) -> List[OrganizationResult]:
         """
         Возвращает список организаций, занимающихся указанным видом деятельности
 
         Args:
             activity_id (int): ID Вида деятельности
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
 
         Returns:
-            organizations (List[Organization]): Список организаций, занимающихся указанным видом деятельности
+            organizations (List[OrganizationResult]): Список организаций, занимающихся указанным видом деятельности
 
         Raises:
             NoOrganizationsFoundError: Если не найдено организаций, занимающихся указанным видом деятельности
@@ -86,13 +267,7 @@ class OrganizationService(BaseService):
             select(Organisation)
             .join(Organisation.organisation_activities)
             .where(OrganisationActivities.activity_id == activity_id)
-            .options(
-                selectinload(Organisation.phones),
-                selectinload(Organisation.organisation_activities).selectinload(
-                    OrganisationActivities.activity
-                ),
-                selectinload(Organisation.building),
-            )
+            .options(*organization_loader_options(fields))
             .distinct()
         )
 
@@ -101,17 +276,21 @@ class OrganizationService(BaseService):
         if not organizations:
             raise NoOrganizationsFoundError()
 
-        return [OrganizationMapper.convert(instance) for instance in organizations]
+        return convert_organizations(organizations, fields)
 
-    async def search_organization_by_name(self, name: str) -> List[Organization]:
+    @single_flight.coalesced
+    async def search_organization_by_name(
+        self, name: str, fields: Optional[AbstractSet[str]] = None
+    ) -> List[OrganizationResult]:
         """
         Ищет организации по совпадению по имени
 
         Args:
             name (str): Название, по котором необходимо искать
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
 
         Returns:
-            organizations (List[Organization]): Список организаций
+            organizations (List[OrganizationResult]): Список организаций
 
         Raises:
             NoOrganizationsFoundError: Если не найдено организаций, подходящих под условия
@@ -119,13 +298,7 @@ class OrganizationService(BaseService):
         stmt = (
             select(Organisation)
             .where(Organisation.name.ilike(f"%{name}%"))
-            .options(
-                selectinload(Organisation.phones),
-                selectinload(Organisation.organisation_activities).selectinload(
-                    OrganisationActivities.activity
-                ),
-                selectinload(Organisation.building),
-            )
+            .options(*organization_loader_options(fields))
         )
 
         result = await self.session.execute(stmt)
@@ -133,17 +306,21 @@ class OrganizationService(BaseService):
         if not organizations:
             raise NoOrganizationsFoundError()
 
-        return [OrganizationMapper.convert(instance) for instance in organizations]
+        return convert_organizations(organizations, fields)
 
-    async def get_organization_by_id(self, organization_id: int) -> Organization:
+    @single_flight.coalesced
+    async def get_organization_by_id(
+        self, organization_id: int, fields: Optional[AbstractSet[str]] = None
+    ) -> OrganizationResult:
         """
         Возвращает информацию об организации по ее ID
 
         Args:
             organization_id (int): ID организации
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организации, None - все поля
 
         Returns:
-            out (Organization): Информация об организации
+            out (OrganizationResult): Информация об организации
 
         Raises:
             OrganizationNotFoundError: Если организация не найдена
@@ -151,44 +328,101 @@ class OrganizationService(BaseService):
         stmt = (
             select(Organisation)
             .where(Organisation.id == organization_id)
-            .options(
-                selectinload(Organisation.phones),
-                selectinload(Organisation.organisation_activities).selectinload(
-                    OrganisationActivities.activity
-                ),
-                selectinload(Organisation.building),
-            )
+            .options(*organization_loader_options(fields))
         )
         result = await self.session.execute(stmt)
         organization = result.scalar()
         if not organization:
             raise OrganizationNotFoundError()
 
-        return OrganizationMapper.convert(organization)
+        return convert_organizations([organization], fields)[0]
+
+    @single_flight.coalesced
+    async def get_organization_by_phone(
+        self, phone: str, fields: Optional[AbstractSet[str]] = None
+    ) -> OrganizationResult:
+        """
+        Возвращает организацию по номеру телефона в любом формате записи. Номер нормализуется той же функцией
+        normalize_phone, которой заполнена колонка phone_normalized, поэтому поиск - одно обращение к ее индексу
+
+        Args:
+            phone (str): Номер телефона
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организации, None - все поля
+
+        Returns:
+            out (OrganizationResult): Информация об организации
+
+        Raises:
+            OrganizationNotFoundError: Если организации с таким номером не найдено
+        """
+        stmt = (
+            select(Organisation)
+            .join(OrganisationPhones, OrganisationPhones.organisation_id == Organisation.id)
+            .where(OrganisationPhones.phone_normalized == func.normalize_phone(phone))
+            .options(*organization_loader_options(fields))
+        )
+        result = await self.session.execute(stmt)
+        organization = result.scalar()
+        if not organization:
+            raise OrganizationNotFoundError()
+
+        return convert_organizations([organization], fields)[0]
+
+    async def get_organizations_by_phones(
+        self, phones: Sequence[str], fields: Optional[AbstractSet[str]] = None
+    ) -> List[Tuple[str, Optional[OrganizationResult]]]:
+        """
+        Ищет организации по нескольким номерам телефонов одним запросом
+
+        Args:
+            phones (Sequence[str]): Номера телефонов в любом формате записи
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            organizations (List[Tuple[str, Optional[OrganizationResult]]]): Пары (номер из запроса, организация
+                или None, если организации с таким номером нет) в порядке номеров в запросе
+        """
+        requested = (
+            func.unnest(bindparam("phones", list(phones), type_=ARRAY(String)))
+            .table_valued("phone", with_ordinality="position", name="requested")
+            .render_derived()
+        )
+        stmt = (
+            select(requested.c.phone, Organisation)
+            .select_from(requested)
+            .outerjoin(
+                OrganisationPhones,
+                OrganisationPhones.phone_normalized == func.normalize_phone(requested.c.phone),
+            )
+            .outerjoin(Organisation, Organisation.id == OrganisationPhones.organisation_id)
+            .order_by(requested.c.position)
+            .options(*organization_loader_options(fields))
+        )
+        rows = (await self.session.execute(stmt)).all()
+        converted = iter(
+            convert_organizations([row.Organisation for row in rows if row.Organisation is not None], fields)
+        )
+        return [(row.phone, next(converted) if row.Organisation is not None else None) for row in rows]
 
+    @single_flight.coalesced
     async def search_organizations_with_activities(
-        self, activity_id: int
-    ) -> List[Organization]:
+        self, activity_id: int, fields: Optional[AbstractSet[str]] = None
+    ) -> List[OrganizationResult]:
         """
         Возвращает список организаций, которые занимаются указанными видами деятельности (включая дочерние виды деятельности)
 
         Args:
             activity_id (int): Вид деятельности
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
 
         Returns:
-            organizations (List[Organization]): Список организаций
+            organizations (List[OrganizationResult]): Список организаций
 
         Raises:
             ActivityNotFoundError: Не найдено указанного вида деятельности
             NoOrganizationsFoundError: Не найдено организаций, которые имеют указанные виды деятельности
         """
 
-        check_query = await self.session.execute(
-            select(Activity.id).where(Activity.id == activity_id)
-        )
-        if not check_query.scalar():
-            raise ActivityNotFoundError()
-
         activity_tree = (
             select(Activity.id)
             .where(Activity.id == activity_id)
@@ -199,17 +433,21 @@ class OrganizationService(BaseService):
             select(a_child.id).where(a_child.parent == activity_tree.c.id)
         )
 
+        # Поддерево выбирается отдельным запросом: для рекурсивного CTE планировщик не знает количество строк
+        # и выбирает полный просмотр organisation_actvities даже для листового вида деятельности,
+        # а по массиву ID он использует индекс по activity_id
+        activity_ids = (await self.session.execute(select(activity_tree.c.id))).scalars().all()
+        if not activity_ids:
+            raise ActivityNotFoundError()
+
         stmt = (
             select(Organisation)
             .join(Organisation.organisation_activities)
-            .where(OrganisationActivities.activity_id.in_(select(activity_tree.c.id)))
-            .options(
-                selectinload(Organisation.phones),
-                selectinload(Organisation.organisation_activities).selectinload(
-                    OrganisationActivities.activity
-                ),
-                selectinload(Organisation.building),
+            .where(
+                OrganisationActivities.activity_id
+                == any_(bindparam("activity_ids", activity_ids, type_=ARRAY(Integer)))
             )
+            .options(*organization_loader_options(fields))
             .distinct()
         )
 
@@ -219,7 +457,35 @@ class OrganizationService(BaseService):
         if not organizations:
             raise NoOrganizationsFoundError()
 
-        return [OrganizationMapper.convert(organization) for organization in organizations]
+        return convert_organizations(organizations, fields)
+
+    async def warm_up(self):
+        """
+        Выполняет все запросы сервиса на реальной организации, чтобы при старте заполнить кэш скомпилированных
+        запросов SQLAlchemy и кэш prepared statements соединения asyncpg. Ничего не делает на пустой базе
+        """
+        sample = (
+            await self.session.execute(
+                select(
+                    Organisation.id,
+                    Organisation.name,
+                    Organisation.building_id,
+                    OrganisationActivities.activity_id,
+                )
+                .join(Organisation.organisation_activities)
+                .where(Organisation.building_id.isnot(None))
+                .limit(1)
+            )
+        ).first()
+        if sample is None:
+            return
+
+        await self.get_organization_by_id(sample.id)
+        await self.get_organizations_from_specific_building(sample.building_id)
+        await self.get_organizations_payload_from_building(sample.building_id)
+        await self.get_organizations_by_activity_id(sample.activity_id)
+        await self.search_organizations_with_activities(sample.activity_id)
+        await self.search_organization_by_name(sample.name)
 
 
 class LocationService(BaseService):
@@ -241,9 +507,24 @@ class LocationService(BaseService):
         Returns:
             buildings (Optional[List[Building]]): Список зданий в указанном радиусе
         """
+        # geopy нужен только здесь, поэтому импортируется при первом поиске, а не при старте приложения
+        from geopy.distance import geodesic
+
         center_point = (center_latitude, center_longitude)
-        stmt = select(Building).where(
-            Building.latitude.isnot(None), Building.longitude.isnot(None)
+        # Прямоугольник считается на сфере, а расстояние - на эллипсоиде, где градус широты у экватора
+        # короче на ~0.6%: запас в 1% не дает потерять здания у границы круга
+        ne_lat, ne_lon, sw_lat, sw_lon = radius_bounding_box(
+            center_latitude, center_longitude, radius_km * 1.01
+        )
+        stmt = (
+            select(Building)
+            .where(
+                Building.latitude.isnot(None),
+                Building.longitude.isnot(None),
+                Building.latitude.between(sw_lat, ne_lat),
+                Building.longitude.between(sw_lon, ne_lon),
+            )
+            .options(lazyload(Building.organisations))
         )
         query = await self.session.execute(stmt)
         buildings = query.scalars().all()
@@ -277,20 +558,168 @@ class LocationService(BaseService):
             buildings (Optional[List[Building]]): Список зданий в указанной области
         """
 
-        stmt = select(Building).where(
-            Building.latitude.isnot(None),
-            Building.longitude.isnot(None),
-            Building.latitude.between(sw_lat, ne_lat),
-            Building.longitude.between(sw_lon, ne_lon),
+        stmt = (
+            select(Building)
+            .where(
+                Building.latitude.isnot(None),
+                Building.longitude.isnot(None),
+                Building.latitude.between(sw_lat, ne_lat),
+                Building.longitude.between(sw_lon, ne_lon),
+            )
+            .options(lazyload(Building.organisations))
         )
 
         query = await self.session.execute(stmt)
         result = query.scalars().all()
         return result
 
+    async def __get_organizations_from_buildings(
+        self, building_ids: Sequence[int], fields: Optional[AbstractSet[str]] = None
+    ) -> List[OrganizationResult]:
+        """
+        Загружает организации из нескольких зданий одним запросом (плюс запросы selectin для связей),
+        а не отдельным запросом на каждое здание
+
+        Args:
+            building_ids (Sequence[int]): ID зданий, порядок зданий сохраняется в результате
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            organizations (List[OrganizationResult]): Организации из указанных зданий
+        """
+        # ID передаются одним параметром-массивом: запрос не зависит от количества зданий и не упирается
+        # в ограничение на число параметров
+        ids = bindparam("building_ids", list(building_ids), type_=ARRAY(Integer))
+        stmt = (
+            select(Organisation)
+            .where(Organisation.building_id == any_(ids))
+            .order_by(func.array_position(ids, Organisation.building_id), Organisation.id)
+            .options(*organization_loader_options(fields))
+        )
+        query = await self.session.execute(stmt)
+        organizations = query.scalars().all()
+        return convert_organizations(organizations, fields)
+
+    async def get_organizations_in_polygon(
+        self,
+        rings: Sequence[Sequence[Tuple[float, float]]],
+        fields: Optional[AbstractSet[str]] = None,
+    ) -> List[OrganizationResult]:
+        """
+        Возвращает список организаций в многоугольнике. Здания отбираются в базе по описанному прямоугольнику,
+        затем координаты кандидатов проверяются векторизованно, а организации найденных зданий загружаются одним запросом
+
+        Args:
+            rings (Sequence[Sequence[Tuple[float, float]]]): Внешний контур многоугольника и контуры дыр
+                из пар (широта, долгота)
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            organizations (List[OrganizationResult]): Список организаций в многоугольнике
+
+        Raises:
+            NoBuildingsFoundError: Если в многоугольнике не найдено зданий
+            NoOrganizationsFoundError: Если в многоугольнике не найдено организаций
+        """
+        ne_lat, ne_lon, sw_lat, sw_lon = polygon_bounding_box(rings)
+        query = await self.session.execute(
+            select(Building.id, Building.latitude, Building.longitude)
+            .where(
+                Building.latitude.between(sw_lat, ne_lat),
+                Building.longitude.between(sw_lon, ne_lon),
+            )
+            .order_by(Building.id)
+        )
+        candidates = query.all()
+        if not candidates:
+            raise NoBuildingsFoundError()
+
+        building_ids, latitudes, longitudes = zip(*candidates)
+        inside = points_in_polygon(np.array(latitudes), np.array(longitudes), rings)
+        buildings_ids = np.asarray(building_ids)[inside].tolist()
+        if not buildings_ids:
+            raise NoBuildingsFoundError()
+
+        result = await self.__get_organizations_from_buildings(buildings_ids, fields)
+        if not result:
+            raise NoOrganizationsFoundError()
+
+        return result
+
+    async def get_organizations_along_route(
+        self,
+        route: Sequence[Tuple[float, float]],
+        buffer_km: float,
+        fields: Optional[AbstractSet[str]] = None,
+    ) -> List[OrganizationResult]:
+        """
+        Возвращает список организаций в зданиях не дальше buffer_km от маршрута, в порядке следования вдоль маршрута.
+        Здания-кандидаты отбираются одним запросом по прямоугольникам вокруг каждого отрезка маршрута, затем
+        расстояние до маршрута считается векторизованно, а организации найденных зданий загружаются одним запросом
+
+        Args:
+            route (Sequence[Tuple[float, float]]): Вершины маршрута из пар (широта, долгота)
+            buffer_km (float): Максимальное расстояние от маршрута в километрах
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            organizations (List[OrganizationResult]): Список организаций вдоль маршрута без повторов
+
+        Raises:
+            NoBuildingsFoundError: Если вдоль маршрута не найдено зданий
+            NoOrganizationsFoundError: Если вдоль маршрута не найдено организаций
+        """
+        boxes = merge_segment_boxes(route, buffer_km)
+        # Прямоугольники передаются массивами и разворачиваются в таблицу unnest: текст запроса не зависит
+        # от их количества
+        segment_boxes = (
+            func.unnest(
+                *(
+                    bindparam(name, boxes[:, column].tolist(), type_=ARRAY(Float))
+                    for column, name in enumerate(("ne_lat", "ne_lon", "sw_lat", "sw_lon"))
+                )
+            )
+            .table_valued("ne_lat", "ne_lon", "sw_lat", "sw_lon", name="segment_boxes")
+            .render_derived()
+        )
+        query = await self.session.execute(
+            select(Building.id, Building.latitude, Building.longitude)
+            .join(
+                segment_boxes,
+                and_(
+                    Building.latitude.between(segment_boxes.c.sw_lat, segment_boxes.c.ne_lat),
+                    Building.longitude.between(segment_boxes.c.sw_lon, segment_boxes.c.ne_lon),
+                ),
+            )
+            .distinct()
+        )
+        candidates = query.all()
+        if not candidates:
+            raise NoBuildingsFoundError()
+
+        building_ids, latitudes, longitudes = zip(*candidates)
+        distances, positions = distances_to_polyline(
+            np.array(latitudes), np.array(longitudes), route, max_distance_km=buffer_km
+        )
+        nearby = np.flatnonzero(np.isfinite(distances))
+        if nearby.size == 0:
+            raise NoBuildingsFoundError()
+
+        buildings_ids = np.asarray(building_ids)[nearby[np.argsort(positions[nearby], kind="stable")]].tolist()
+        result = await self.__get_organizations_from_buildings(buildings_ids, fields)
+        if not result:
+            raise NoOrganizationsFoundError()
+
+        return result
+
+    @single_flight.coalesced
     async def get_organizations_in_radius(
-        self, center_latitude: float, center_longitude: float, radius_km: float
-    ) -> List[Organization]:
+        self,
+        center_latitude: float,
+        center_longitude: float,
+        radius_km: float,
+        fields: Optional[AbstractSet[str]] = None,
+    ) -> List[OrganizationResult]:
         """
         Возвращает список организаций в указанном радиусе
 
@@ -298,9 +727,10 @@ class LocationService(BaseService):
             center_latitude (float): Географическая ширина указанной точки
             center_longitude (float): Географическая долгота указанной точки
             radius_km (float): Радиус поиска в километрах
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
 
         Returns:
-            organizations (List[Organization]): Список организаций в указанном радиусе
+            organizations (List[OrganizationResult]): Список организаций в указанном радиусе
 
         Raises:
             NoBuildingsFoundError: Если в указанном радиусе не найдено зданий
@@ -310,29 +740,24 @@ class LocationService(BaseService):
         buildings = await self.__get_buildings_within_range(
             center_latitude, center_longitude, radius_km
         )
-        result: List[Organization] = []
         if not buildings:
             raise NoBuildingsFoundError()
 
-        buildings_ids = [building.id for building in buildings]
-        organization_service = OrganizationService(self.session)
-        for building_id in buildings_ids:
-            try:
-                organizations = await organization_service.get_organizations_from_specific_building(
-                    building_id
-                )
-                result.extend(organizations)
-            except BuildingWithNoOrganizationsError:
-                continue
-
+        result = await self.__get_organizations_from_buildings([building.id for building in buildings], fields)
         if not result:
             raise NoOrganizationsFoundError()
 
         return result
 
+    @single_flight.coalesced
     async def get_organizations_in_square(
-        self, ne_lat: float, ne_lon: float, sw_lat: float, sw_lon: float
-    ) -> List[Organization]:
+        self,
+        ne_lat: float,
+        ne_lon: float,
+        sw_lat: float,
+        sw_lon: float,
+        fields: Optional[AbstractSet[str]] = None,
+    ) -> List[OrganizationResult]:
         """
         Возвращает список организаций в указанной прямоугольной области на карте
 
@@ -341,9 +766,10 @@ class LocationService(BaseService):
             ne_lon (float): Серверо-восточная долгота
             sw_lat (float): Юго-западная широта
             sw_lon (float): Юго-западная долгота
+            fields (Optional[AbstractSet[str]]): Запрошенные поля организаций, None - все поля
 
         Returns:
-            organization (List[Organization]): Список организаций в указанной области
+            organization (List[OrganizationResult]): Список организаций в указанной области
 
         Raises:
             NoBuildingsFoundError: Если в указанной области не найдено зданий
@@ -351,23 +777,88 @@ class LocationService(BaseService):
         """
 
         buildings = await self.__get_building_in_square(ne_lat, ne_lon, sw_lat, sw_lon)
-        result: List[Organization] = []
         if not buildings:
             raise NoBuildingsFoundError()
 
-        organization_service = OrganizationService(self.session)
-
-        buildings_ids = [building.id for building in buildings]
-        for building_id in buildings_ids:
-            try:
-                organizations = await organization_service.get_organizations_from_specific_building(
-                    building_id
-                )
-                result.extend(organizations)
-            except BuildingWithNoOrganizationsError:
-                continue
-
+        result = await self.__get_organizations_from_buildings([building.id for building in buildings], fields)
         if not result:
             raise NoOrganizationsFoundError()
 
         return result
+
+    @single_flight.coalesced
+    async def get_organizations_payload_in_radius(
+        self,
+        center_latitude: float,
+        center_longitude: float,
+        radius_km: float,
+        fields: Optional[FrozenSet[str]] = None,
+    ) -> bytes:
+        """
+        Возвращает организации в указанном радиусе сериализованным JSON-массивом, собранным из кэша
+        организаций по зданиям
+
+        Args:
+            center_latitude (float): Географическая ширина указанной точки
+            center_longitude (float): Географическая долгота указанной точки
+            radius_km (float): Радиус поиска в километрах
+            fields (Optional[FrozenSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            payload (bytes): JSON-массив организаций, как в ответе get_organizations_in_radius
+
+        Raises:
+            NoBuildingsFoundError: Если в указанном радиусе не найдено зданий
+            NoOrganizationsFoundError: Если в указанном радиусе не найдено организаций
+        """
+        buildings = await self.__get_buildings_within_range(
+            center_latitude, center_longitude, radius_km
+        )
+        if not buildings:
+            raise NoBuildingsFoundError()
+
+        return await self.__get_buildings_payload(buildings, fields)
+
+    @single_flight.coalesced
+    async def get_organizations_payload_in_square(
+        self,
+        ne_lat: float,
+        ne_lon: float,
+        sw_lat: float,
+        sw_lon: float,
+        fields: Optional[FrozenSet[str]] = None,
+    ) -> bytes:
+        """
+        Возвращает организации в указанной прямоугольной области сериализованным JSON-массивом, собранным
+        из кэша организаций по зданиям
+
+        Args:
+            ne_lat (float): Серверо-восточная широта
+            ne_lon (float): Серверо-восточная долгота
+            sw_lat (float): Юго-западная широта
+            sw_lon (float): Юго-западная долгота
+            fields (Optional[FrozenSet[str]]): Запрошенные поля организаций, None - все поля
+
+        Returns:
+            payload (bytes): JSON-массив организаций, как в ответе get_organizations_in_square
+
+        Raises:
+            NoBuildingsFoundError: Если в указанной области не найдено зданий
+            NoOrganizationsFoundError: Если в указанной области не найдено организаций
+        """
+        buildings = await self.__get_building_in_square(ne_lat, ne_lon, sw_lat, sw_lon)
+        if not buildings:
+            raise NoBuildingsFoundError()
+
+        return await self.__get_buildings_payload(buildings, fields)
+
+    async def __get_buildings_payload(
+        self, buildings: Sequence[Building], fields: Optional[FrozenSet[str]] = None
+    ) -> bytes:
+        payloads = await OrganizationService(self.session).get_buildings_payloads(
+            [building.id for building in buildings], fields
+        )
+        if not any(payloads):
+            raise NoOrganizationsFoundError()
+
+        return join_payloads(payloads)
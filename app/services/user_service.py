@@ -56,7 +56,7 @@ class UserService(BaseService):
             raise IncorrectCredentialsError()
         
         new_user = User(login=login, password=User.hash_user_password(password))
-        await self.session.add(new_user)
+        self.session.add(new_user)
         await self.session.commit()
         return new_user.token
         
\ No newline at end of file
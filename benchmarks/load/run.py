@@ -0,0 +1,385 @@
+"""
+Нагрузочный тест всех эндпоинтов API
+
+Поднимает приложение из main.py (benchmarks/load/server.py) поверх локальной базы, заполненной
+синтетическими данными, и прогоняет заданную смесь запросов с заданной конкурентностью.
+Результат (p50/p95/p99, RPS, количество SQL-запросов на HTTP-запрос) сохраняется в JSON
+
+Пример:
+    uv run --group bench python -m benchmarks.load.run --generate 20000 --concurrency 32 \\
+        --requests 5000 --output bench_results/$(git rev-parse --short HEAD).json
+
+    uv run --group bench python -m benchmarks.load.run --compare bench_results/old.json \\
+        --output bench_results/new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+from sqlalchemy import text
+from app.api.dependencies.db_dependency import AsyncSessionLocal
+from app.cli.generate_dataset import DatasetConfig, generate_dataset
+from app.api.middlewares.sql_tracing_middleware import QUERY_COUNT_HEADER
+
+DEFAULT_MIX = "auth=1,building=3,id=5,name=2,activity=2,subtree=2,radius=1,square=2"
+
+
+@dataclass
+class Fixtures:
+    """
+    Параметры запросов, выбранные из данных в базе
+    """
+
+    login: str
+    password: str
+    token: str = ""
+    building_ids: List[int] = field(default_factory=list)
+    organisation_ids: List[int] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    activity_ids: List[int] = field(default_factory=list)
+    points: List[Tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class RouteStats:
+    """
+    Накопленная статистика по одному сценарию
+    """
+
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+
+    def record(self, latency: float, status: int, queries: Optional[int]):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if queries is not None:
+            self.queries.append(queries)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        if not self.latencies:
+            return {"requests": 0, "errors": self.errors}
+        if len(self.latencies) > 1:
+            centiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        else:
+            # quantiles требует хотя бы два значения, единственный замер - это и есть все перцентили
+            centiles = self.latencies * 99
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "rps": len(self.latencies) / elapsed,
+            "latency_ms": {
+                "mean": statistics.fmean(self.latencies) * 1000,
+                "p50": centiles[49] * 1000,
+                "p95": centiles[94] * 1000,
+                "p99": centiles[98] * 1000,
+                "max": max(self.latencies) * 1000,
+            },
+            "db_queries_per_request": statistics.fmean(self.queries) if self.queries else None,
+        }
+
+
+Scenario = Callable[[random.Random, Fixtures], Tuple[str, str, Dict[str, Any]]]
+
+# Сценарий -> (метод, путь, параметры запроса)
+SCENARIOS: Dict[str, Scenario] = {
+    "auth": lambda rnd, f: (
+        "POST", "/auth/token", {"json": {"login": f.login, "password": f.password}}
+    ),
+    "building": lambda rnd, f: (
+        "GET", "/buildings/get_organizations_from_building",
+        {"params": {"building_id": rnd.choice(f.building_ids)}},
+    ),
+    "id": lambda rnd, f: (
+        "GET", "/organizations/get_organization_by_id",
+        {"params": {"organization_id": rnd.choice(f.organisation_ids)}},
+    ),
+    "name": lambda rnd, f: (
+        "GET", "/organizations/search_organization_by_name",
+        {"params": {"name": rnd.choice(f.names)}},
+    ),
+    "activity": lambda rnd, f: (
+        "GET", "/organizations/get_organization_by_activity_id",
+        {"params": {"activity_id": rnd.choice(f.activity_ids)}},
+    ),
+    "subtree": lambda rnd, f: (
+        "GET", "/organizations/search_organization_with_activities",
+        {"params": {"activity_id": rnd.choice(f.activity_ids)}},
+    ),
+    "radius": lambda rnd, f: (
+        "GET", "/organizations/get_organizations_within_radius",
+        _radius_params(rnd, f),
+    ),
+    "square": lambda rnd, f: (
+        "GET", "/organizations/get_organizations_within_square",
+        _square_params(rnd, f),
+    ),
+}
+
+RADIUS_KM = 0.5
+SQUARE_HALF_SIZE_DEG = 0.005
+
+
+def _radius_params(rnd: random.Random, fixtures: Fixtures) -> Dict[str, Any]:
+    latitude, longitude = rnd.choice(fixtures.points)
+    return {"params": {"center_lan": latitude, "center_lon": longitude, "radius_km": RADIUS_KM}}
+
+
+def _square_params(rnd: random.Random, fixtures: Fixtures) -> Dict[str, Any]:
+    latitude, longitude = rnd.choice(fixtures.points)
+    return {
+        "params": {
+            "ne_lat": latitude + SQUARE_HALF_SIZE_DEG,
+            "ne_lon": longitude + SQUARE_HALF_SIZE_DEG,
+            "sw_lat": latitude - SQUARE_HALF_SIZE_DEG,
+            "sw_lon": longitude - SQUARE_HALF_SIZE_DEG,
+        }
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def load_fixtures(sample_size: int, seed: int) -> Fixtures:
+    """
+    Выбирает параметры запросов из базы. Выборка детерминирована для одинаковых данных и seed
+    """
+    fixtures = Fixtures(login=f"bench-{uuid.uuid4().hex[:12]}", password=uuid.uuid4().hex)
+    order = f"md5(id::text || '{seed}')"
+    async with AsyncSessionLocal() as session:
+        buildings = await session.execute(
+            text(
+                f"SELECT id, latitude, longitude FROM buildings "
+                f"WHERE latitude IS NOT NULL AND longitude IS NOT NULL "
+                f"ORDER BY {order} LIMIT :limit"
+            ),
+            {"limit": sample_size},
+        )
+        for row in buildings:
+            fixtures.building_ids.append(row.id)
+            fixtures.points.append((row.latitude, row.longitude))
+
+        organisations = await session.execute(
+            text(f"SELECT id, name FROM organisations ORDER BY {order} LIMIT :limit"),
+            {"limit": sample_size},
+        )
+        for row in organisations:
+            fixtures.organisation_ids.append(row.id)
+            fixtures.names.append(row.name)
+
+        activities = await session.execute(text("SELECT id FROM activities ORDER BY id"))
+        fixtures.activity_ids = list(activities.scalars())
+
+    if not (fixtures.building_ids and fixtures.organisation_ids and fixtures.activity_ids):
+        raise SystemExit("База пуста: заполните ее через --generate или app.cli.generate_dataset")
+    return fixtures
+
+
+async def authenticate(client: httpx.AsyncClient, fixtures: Fixtures):
+    response = await client.post(
+        "/auth/register", params={"login": fixtures.login, "password": fixtures.password}
+    )
+    response.raise_for_status()
+    fixtures.token = response.json()["token"]
+    client.headers["Authorization"] = f"Bearer {fixtures.token}"
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    fixtures: Fixtures,
+    mix: Dict[str, float],
+    concurrency: int,
+    total_requests: int,
+    seed: int,
+) -> Tuple[Dict[str, RouteStats], float]:
+    """
+    Прогоняет total_requests запросов в concurrency параллельных воркерах
+
+    Returns:
+        result (Tuple[Dict[str, RouteStats], float]): Статистика по сценариям и общее время прогона
+    """
+    stats = {name: RouteStats() for name in mix}
+    names = list(mix)
+    cumulative = []
+    total_weight = 0.0
+    for name in names:
+        total_weight += mix[name]
+        cumulative.append(total_weight)
+    remaining = total_requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining
+        rnd = random.Random(f"{seed}:{worker_id}")
+        while remaining > 0:
+            remaining -= 1
+            name = rnd.choices(names, cum_weights=cumulative)[0]
+            method, path, kwargs = SCENARIOS[name](rnd, fixtures)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+            except httpx.HTTPError:
+                stats[name].errors += 1
+                continue
+            latency = time.perf_counter() - started
+            queries = response.headers.get(QUERY_COUNT_HEADER.decode())
+            stats[name].record(latency, response.status_code, int(queries) if queries else None)
+            if response.status_code >= 500:
+                stats[name].errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    header = f"{'route':<10}{'req':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}{'err':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, route in {**report["routes"], "total": report["total"]}.items():
+        if not route.get("requests"):
+            continue
+        latency = route["latency_ms"]
+        queries = route["db_queries_per_request"]
+        line = (
+            f"{name:<10}{route['requests']:>8}{route['rps']:>10.1f}{latency['p50']:>10.1f}"
+            f"{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+            f"{queries if queries is not None else float('nan'):>8.1f}{route['errors']:>6}"
+        )
+        if baseline:
+            previous = baseline["routes"].get(name) if name != "total" else baseline["total"]
+            if previous and previous.get("requests"):
+                delta = lambda key: (latency[key] / previous["latency_ms"][key] - 1) * 100
+                line += f"   p50 {delta('p50'):+.0f}%  p95 {delta('p95'):+.0f}%  rps {(route['rps'] / previous['rps'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+def _wait_for_server(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("Сервер завершился при запуске")
+        try:
+            if httpx.get(f"{base_url}/healthcheck", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("Сервер не запустился")
+
+
+async def benchmark(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    if args.generate:
+        async with AsyncSessionLocal() as session:
+            for item in await generate_dataset(
+                session, DatasetConfig(buildings=args.generate, seed=args.seed), truncate=True
+            ):
+                print(item)
+
+    fixtures = await load_fixtures(args.sample_size, args.seed)
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await authenticate(client, fixtures)
+        if args.warmup:
+            await run_load(client, fixtures, mix, args.concurrency, args.warmup, args.seed + 1)
+        stats, elapsed = await run_load(
+            client, fixtures, mix, args.concurrency, args.requests, args.seed
+        )
+
+    total = RouteStats()
+    for route in stats.values():
+        total.latencies.extend(route.latencies)
+        total.queries.extend(route.queries)
+        total.errors += route.errors
+        for status, count in route.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": base_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "mix": mix,
+            "seed": args.seed,
+            "elapsed_s": elapsed,
+        },
+        "routes": {name: route.summary(elapsed) for name, route in stats.items()},
+        "total": total.summary(elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API")
+    parser.add_argument("--base-url", help="Адрес уже запущенного приложения. Если не указан, приложение запускается автоматически")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Веса сценариев, по умолчанию {DEFAULT_MIX}")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--sample-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--generate", type=int, default=0, help="Перед тестом пересоздать синтетические данные с указанным количеством зданий")
+    parser.add_argument("--output", type=Path, help="Файл для сохранения результата в JSON")
+    parser.add_argument("--compare", type=Path, help="JSON с результатом предыдущего прогона для сравнения")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load.server", "--port", str(args.port)],
+            env=os.environ.copy(),
+        )
+        _wait_for_server(base_url, process)
+
+    try:
+        report = asyncio.run(benchmark(args, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Запуск приложения из main.py для нагрузочного тестирования. К каждому ответу добавляются
+заголовки с количеством SQL-запросов и временем в базе, собранные SQLTracingMiddleware
+"""
+import argparse
+import uvicorn
+from main import app
+from app.api.middlewares.sql_tracing_middleware import SQLTracingMiddleware
+
+
+def expose_query_headers():
+    """
+    Включает заголовки SQL-статистики независимо от DEBUG. Стек middleware собирается при первом запросе,
+    поэтому достаточно поменять параметры до запуска сервера
+    """
+    for middleware in app.user_middleware:
+        if middleware.cls is SQLTracingMiddleware:
+            middleware.kwargs["expose_headers"] = True
+            return
+    raise RuntimeError("Трассировка SQL выключена (SQL_TRACING_ENABLED=false)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    expose_query_headers()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
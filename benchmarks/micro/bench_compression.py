@@ -0,0 +1,38 @@
+"""
+Микробенчмарки сжатия ответов: время CPU на сжатие списка организаций типичных размеров каждым алгоритмом.
+Степень сжатия и сэкономленные байты попадают в extra_info отчета pytest-benchmark
+"""
+from typing import List
+import pytest
+from pydantic import TypeAdapter
+from app.api.models.organisation import Organization
+from app.core.compression import CompressedVariants, available_compressors
+from app.mappers.organization_mapper import OrganizationMapper
+
+_organizations_adapter = TypeAdapter(List[Organization])
+_compressors = available_compressors()
+
+
+@pytest.fixture(scope="module", params=[10, 100, 1000], ids=lambda size: f"{size}orgs")
+def payload(request, organisations) -> bytes:
+    models = [OrganizationMapper.convert(item) for item in organisations[: request.param]]
+    return _organizations_adapter.dump_json(models)
+
+
+@pytest.mark.parametrize("encoding", list(_compressors))
+def bench_compress(benchmark, payload, encoding):
+    compressed = benchmark(_compressors[encoding], payload)
+    benchmark.extra_info["original_bytes"] = len(payload)
+    benchmark.extra_info["compressed_bytes"] = len(compressed)
+    benchmark.extra_info["bytes_saved"] = len(payload) - len(compressed)
+    benchmark.extra_info["ratio"] = round(len(compressed) / len(payload), 3)
+    assert len(compressed) < len(payload)
+
+
+@pytest.mark.parametrize("key", [None, ("building", 1, 1)], ids=["digest", "key"])
+@pytest.mark.parametrize("encoding", list(_compressors))
+def bench_compress_cached(benchmark, payload, encoding, key):
+    variants = CompressedVariants(_compressors, max_bytes=16 * 1024 * 1024)
+    variants.compress(payload, encoding, key)
+    compressed = benchmark(variants.compress, payload, encoding, key)
+    assert len(compressed) < len(payload)
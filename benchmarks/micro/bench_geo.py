@@ -0,0 +1,46 @@
+"""
+Микробенчмарки геопоиска в LocationService
+"""
+import math
+import numpy as np
+import pytest
+from app.core.geo import distances_to_polyline, points_in_polygon
+from app.services.organization_services import LocationService
+from conftest import CompilingSession
+
+
+def bench_buildings_within_radius(benchmark, buildings, event_loop_runner):
+    service = LocationService(CompilingSession(buildings))
+    result = benchmark(
+        lambda: event_loop_runner(
+            service._LocationService__get_buildings_within_range(55.75, 37.61, 5.0)
+        )
+    )
+    assert result
+
+
+@pytest.mark.parametrize("vertices", [4, 500, 5000])
+def bench_points_in_polygon(benchmark, buildings, vertices):
+    latitudes = np.array([building.latitude for building in buildings])
+    longitudes = np.array([building.longitude for building in buildings])
+    # Звездообразный контур вокруг центра Москвы
+    angles = [2 * math.pi * index / vertices for index in range(vertices)]
+    polygon = [
+        (55.75 + 0.1 * math.sin(angle) * (1 + 0.3 * math.sin(9 * angle)), 37.61 + 0.15 * math.cos(angle))
+        for angle in angles
+    ]
+    inside = benchmark(points_in_polygon, latitudes, longitudes, [polygon])
+    assert 0 < inside.sum() < len(buildings)
+
+
+@pytest.mark.parametrize("points", [10, 1000])
+def bench_distances_to_route(benchmark, buildings, points):
+    latitudes = np.array([building.latitude for building in buildings])
+    longitudes = np.array([building.longitude for building in buildings])
+    # Извилистый маршрут через центр Москвы
+    route = [
+        (55.65 + 0.2 * index / points, 37.45 + 0.3 * index / points + 0.01 * math.sin(index / 10))
+        for index in range(points + 1)
+    ]
+    distances, positions = benchmark(distances_to_polyline, latitudes, longitudes, route, max_distance_km=1.0)
+    assert distances.min() < 0.5 and positions.max() > 0
@@ -0,0 +1,46 @@
+"""
+Микробенчмарки маппера и pydantic-моделей организаций
+"""
+from typing import List
+from pydantic import TypeAdapter
+from app.api.models.organisation import Organization
+from app.mappers.organization_mapper import OrganizationMapper
+from app.services.organization_services import join_payloads, serialize_organizations
+
+_organizations_adapter = TypeAdapter(List[Organization])
+
+
+def bench_mapper_convert_batch(benchmark, organisations):
+    result = benchmark(lambda: [OrganizationMapper.convert(item) for item in organisations])
+    assert len(result) == len(organisations)
+
+
+def bench_organization_construction(benchmark, organisations):
+    payloads = [OrganizationMapper.convert(item).model_dump() for item in organisations]
+    result = benchmark(lambda: [Organization(**payload) for payload in payloads])
+    assert len(result) == len(payloads)
+
+
+def bench_organization_validation(benchmark, organisations):
+    payloads = [OrganizationMapper.convert(item).model_dump() for item in organisations]
+    result = benchmark(_organizations_adapter.validate_python, payloads)
+    assert len(result) == len(payloads)
+
+
+def bench_organization_serialization(benchmark, organisations):
+    models = [OrganizationMapper.convert(item) for item in organisations]
+    result = benchmark(_organizations_adapter.dump_json, models)
+    assert result.startswith(b"[")
+
+
+def bench_organization_payload_serialization(benchmark, organisations):
+    # Организации по 5 в здании, как во фрагментах кэша организаций по зданиям
+    buildings = [organisations[index : index + 5] for index in range(0, len(organisations), 5)]
+    result = benchmark(lambda: join_payloads([serialize_organizations(items) for items in buildings]))
+    assert len(_organizations_adapter.validate_json(result)) == len(organisations)
+
+
+def bench_organization_payload_assembly(benchmark, organisations):
+    payloads = [serialize_organizations(organisations[index : index + 5]) for index in range(0, len(organisations), 5)]
+    result = benchmark(join_payloads, payloads)
+    assert len(_organizations_adapter.validate_json(result)) == len(organisations)
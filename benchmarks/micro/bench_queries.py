@@ -0,0 +1,36 @@
+"""
+Микробенчмарки построения и компиляции SQL-запросов OrganizationService
+"""
+import pytest
+from app.services.organization_services import OrganizationService
+from app.exceptions.service_exceptions import (
+    BuildingNotFoundException,
+    NoOrganizationsFoundError,
+    OrganizationNotFoundError,
+    ActivityNotFoundError,
+)
+from conftest import CompilingSession
+
+_CALLS = {
+    "get_organizations_from_specific_building": ((1,), BuildingNotFoundException),
+    "get_organizations_by_activity_id": ((1,), NoOrganizationsFoundError),
+    "search_organization_by_name": (("Вектор",), NoOrganizationsFoundError),
+    "get_organization_by_id": ((1,), OrganizationNotFoundError),
+    "search_organizations_with_activities": ((1,), ActivityNotFoundError),
+}
+
+
+@pytest.mark.parametrize("method", list(_CALLS))
+def bench_statement_build_and_compile(benchmark, event_loop_runner, method):
+    args, expected_error = _CALLS[method]
+    session = CompilingSession()
+    service = OrganizationService(session)
+
+    async def call():
+        try:
+            await getattr(service, method)(*args)
+        except expected_error:
+            pass
+
+    benchmark(lambda: event_loop_runner(call()))
+    assert session.statements
@@ -0,0 +1,45 @@
+"""
+Проверка микробенчмарков на регрессии относительно базовой линии в benchmarks/micro/.baselines
+
+Пример:
+    # сравнить с последней сохраненной базовой линией, код возврата не 0 при замедлении больше порога
+    uv run --group bench python -m benchmarks.micro.compare
+
+    # сохранить базовую линию на этой машине (например, на main), в репозиторий она не попадает
+    uv run --group bench python -m benchmarks.micro.compare --save
+"""
+import argparse
+import sys
+from pathlib import Path
+import pytest
+
+MICRO_DIR = Path(__file__).resolve().parent
+BASELINES_DIR = MICRO_DIR / ".baselines"
+BASELINE_NAME = "baseline"
+# Медиана устойчивее среднего к единичным выбросам на общей машине
+DEFAULT_THRESHOLD = "median:15%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение микробенчмарков с базовой линией")
+    parser.add_argument("--save", action="store_true", help="Сохранить результат как новую базовую линию")
+    parser.add_argument(
+        "--threshold",
+        default=DEFAULT_THRESHOLD,
+        help=f"Допустимое замедление в формате --benchmark-compare-fail, по умолчанию {DEFAULT_THRESHOLD}",
+    )
+    args, pytest_args = parser.parse_known_args()
+
+    options = ["-c", str(MICRO_DIR / "pytest.ini"), f"--benchmark-storage=file://{BASELINES_DIR}"]
+    if args.save:
+        options.append(f"--benchmark-save={BASELINE_NAME}")
+    else:
+        if not any(BASELINES_DIR.glob(f"*/*_{BASELINE_NAME}.json")):
+            raise SystemExit("Базовая линия не найдена: сохраните ее через --save")
+        options += ["--benchmark-compare", f"--benchmark-compare-fail={args.threshold}"]
+
+    sys.exit(pytest.main(options + pytest_args + [str(MICRO_DIR)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Общие данные для микробенчмарков. Все объекты создаются в памяти, база данных не нужна
+"""
+import asyncio
+import random
+from typing import List
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.db.models.activity_models import Activity
+from app.db.models.building_models import Building
+from app.db.models.organisation_models import (
+    Organisation,
+    OrganisationActivities,
+    OrganisationPhones,
+)
+
+BATCH_SIZE = 1000
+BUILDINGS_COUNT = 10_000
+
+
+class _EmptyResult:
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+    def scalar(self):
+        return None
+
+    def __init__(self, rows=()):
+        self._rows = list(rows)
+
+
+class CompilingSession:
+    """
+    Заменитель AsyncSession: компилирует каждый запрос под диалект asyncpg и возвращает заранее заданные строки.
+    Позволяет измерять построение и компиляцию запросов сервисов без обращения к базе
+    """
+
+    dialect = postgresql.asyncpg.dialect()
+
+    def __init__(self, rows=()):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement.compile(dialect=self.dialect))
+        return _EmptyResult(self.rows)
+
+    async def scalar(self, statement, *args, **kwargs):
+        self.statements.append(statement.compile(dialect=self.dialect))
+        return None
+
+
+@pytest.fixture(scope="session")
+def activities() -> List[Activity]:
+    return [Activity(id=index, name=f"Вид деятельности {index}", depth=1) for index in range(1, 301)]
+
+
+@pytest.fixture(scope="session")
+def organisations(activities) -> List[Organisation]:
+    rnd = random.Random(42)
+    result = []
+    for index in range(1, BATCH_SIZE + 1):
+        building = Building(id=index, address=f"г. Москва, ул. Ленина, д. {index}", latitude=55.75, longitude=37.61)
+        organisation = Organisation(id=index, name=f"ООО «Вектор» №{index}", building=building)
+        organisation.phones = [
+            OrganisationPhones(phone_id=index * 3 + phone, phone=f"+7 (900) {index:03d}-{phone:02d}-00")
+            for phone in range(rnd.randint(1, 3))
+        ]
+        organisation.organisation_activities = [
+            OrganisationActivities(activity=activity)
+            for activity in rnd.sample(activities, rnd.randint(1, 3))
+        ]
+        result.append(organisation)
+    return result
+
+
+@pytest.fixture(scope="session")
+def buildings() -> List[Building]:
+    rnd = random.Random(42)
+    return [
+        Building(
+            id=index,
+            address=f"г. Москва, ул. Ленина, д. {index}",
+            latitude=55.75 + rnd.gauss(0, 0.1),
+            longitude=37.61 + rnd.gauss(0, 0.15),
+        )
+        for index in range(1, BUILDINGS_COUNT + 1)
+    ]
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
@@ -0,0 +1,109 @@
+"""
+Проверка планов запросов OrganizationService, LocationService и BuildingService. Каждый вызов выполняется
+на локальной базе, для всех выполненных им SELECT-запросов строится EXPLAIN (FORMAT JSON) и проверяется,
+что большие таблицы читаются по индексам, оценка стоимости каждого запроса не превышает порога вызова,
+а количество запросов - порога вызова.
+
+Пороги подобраны на наборе данных app.cli.generate_dataset с 20 000 зданий и покрывают просмотр по индексу
+с запасом в несколько раз, полный просмотр любой большой таблицы стоит дороже
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Tuple, Type
+import pytest
+from app.services.base_service import BaseService
+from app.services.building_service import BuildingService
+from app.services.organization_services import LocationService, OrganizationService
+from conftest import Samples, explain_call
+
+# Таблицы, полный просмотр которых считается регрессией. activities - справочник из сотен строк,
+# для него планировщик законно выбирает полный просмотр
+LARGE_TABLES = frozenset({"buildings", "organisations", "organisation_phones", "organisation_actvities"})
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    """
+    Вызов сервиса и ожидания к планам его запросов
+
+    Attributes:
+        service (Type[BaseService]): Сервис
+        method (str): Метод сервиса
+        args (Callable[[Samples], Tuple]): Аргументы вызова из данных базы
+        max_cost (float): Порог оценки стоимости каждого запроса вызова
+        max_statements (int): Сколько SELECT-запросов может выполнить вызов. Ловит запросы в цикле по зданиям
+            или организациям (N+1), у каждого из которых план по отдельности хороший
+    """
+
+    service: Type[BaseService]
+    method: str
+    args: Callable[[Samples], Tuple[Any, ...]]
+    max_cost: float
+    max_statements: int
+
+
+def _square(samples: Samples, delta: float = 0.01) -> Tuple[float, float, float, float]:
+    return (
+        samples.latitude + delta,
+        samples.longitude + delta,
+        samples.latitude - delta,
+        samples.longitude - delta,
+    )
+
+
+def _triangle(samples: Samples, delta: float = 0.01):
+    return [
+        [
+            (samples.latitude - delta, samples.longitude - delta),
+            (samples.latitude + delta, samples.longitude - delta),
+            (samples.latitude + delta, samples.longitude + delta),
+        ]
+    ]
+
+
+_CASES = [
+    PlanCase(OrganizationService, "get_organizations_from_specific_building", lambda s: (s.building_id,), 100, 5),
+    PlanCase(OrganizationService, "get_organizations_payload_from_building", lambda s: (s.building_id,), 100, 5),
+    PlanCase(OrganizationService, "get_buildings_payloads", lambda s: ([s.building_id],), 100, 5),
+    PlanCase(OrganizationService, "get_organizations_by_activity_id", lambda s: (s.activity_id,), 1000, 5),
+    PlanCase(OrganizationService, "search_organization_by_name", lambda s: (s.organization_name,), 500, 5),
+    PlanCase(OrganizationService, "get_organization_by_id", lambda s: (s.organization_id,), 50, 5),
+    PlanCase(OrganizationService, "get_organization_by_phone", lambda s: (s.phone,), 50, 5),
+    PlanCase(OrganizationService, "get_organizations_by_phones", lambda s: ([s.phone, "+70000000000"],), 50, 5),
+    PlanCase(OrganizationService, "search_organizations_with_activities", lambda s: (s.activity_id,), 1000, 6),
+    PlanCase(LocationService, "get_organizations_in_radius", lambda s: (s.latitude, s.longitude, 1.0), 1000, 6),
+    PlanCase(LocationService, "get_organizations_in_square", _square, 1000, 6),
+    PlanCase(LocationService, "get_organizations_payload_in_radius", lambda s: (s.latitude, s.longitude, 1.0), 1000, 6),
+    PlanCase(LocationService, "get_organizations_payload_in_square", _square, 1000, 6),
+    PlanCase(LocationService, "get_organizations_in_polygon", lambda s: (_triangle(s),), 1000, 6),
+    PlanCase(
+        LocationService,
+        "get_organizations_along_route",
+        lambda s: ([(s.latitude - 0.01, s.longitude - 0.01), (s.latitude + 0.01, s.longitude + 0.01)], 0.5),
+        1000,
+        6,
+    ),
+    PlanCase(BuildingService, "search_buildings_by_address", lambda s: (s.address,), 500, 1),
+]
+
+
+@pytest.mark.parametrize("case", _CASES, ids=lambda case: f"{case.service.__name__}.{case.method}")
+def check_query_plans(event_loop_runner, recorder, samples, case):
+    args = case.args(samples)
+    statements = event_loop_runner(
+        explain_call(recorder, lambda session: getattr(case.service(session), case.method)(*args))
+    )
+    assert statements, "Вызов не выполнил ни одного запроса"
+    assert len(statements) <= case.max_statements, (
+        f"Вызов выполнил {len(statements)} запросов, порог {case.max_statements}:\n"
+        + "\n".join(statement.sql for statement in statements)
+    )
+    for statement in statements:
+        seq_scans = {
+            relation
+            for node_type, relation, _ in statement.scans()
+            if node_type == "Seq Scan" and relation in LARGE_TABLES
+        }
+        assert not seq_scans, f"Полный просмотр {', '.join(sorted(seq_scans))}: {statement.describe()}"
+        assert statement.total_cost <= case.max_cost, (
+            f"Оценка стоимости выше порога {case.max_cost}: {statement.describe()}"
+        )
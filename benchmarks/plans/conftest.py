@@ -0,0 +1,241 @@
+"""
+Общие данные для проверки планов запросов. Нужна локальная база с синтетическими данными: их создает
+app.cli.generate_dataset или опция --generate. Перед проверками обновляется статистика планировщика (VACUUM ANALYZE)
+"""
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.dependencies.db_dependency import AsyncSessionLocal, _engine
+from app.cli.generate_dataset import DatasetConfig, generate_dataset
+from app.exceptions.service_exceptions import (
+    ActivityNotFoundError,
+    BuildingNotFoundException,
+    BuildingWithNoOrganizationsError,
+    NoBuildingsFoundError,
+    NoOrganizationsFoundError,
+    OrganizationNotFoundError,
+)
+
+# На меньшем наборе данных планировщик выбирает полный просмотр таблиц независимо от индексов
+MIN_BUILDINGS = 10_000
+
+# Ошибки сервисов о пустом результате: запросы при этом выполнены, и их планы проверяются как обычно
+EXPECTED_SERVICE_ERRORS = (
+    ActivityNotFoundError,
+    BuildingNotFoundException,
+    BuildingWithNoOrganizationsError,
+    NoBuildingsFoundError,
+    NoOrganizationsFoundError,
+    OrganizationNotFoundError,
+)
+
+VACUUMED_TABLES = ("buildings", "activities", "organisations", "organisation_phones", "organisation_actvities")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--generate",
+        type=int,
+        default=0,
+        help="Перед проверкой пересоздать синтетические данные с указанным количеством зданий (очищает таблицы)",
+    )
+    parser.addoption("--seed", type=int, default=42, help="Зерно генератора синтетических данных")
+
+
+@dataclass(frozen=True)
+class Samples:
+    """
+    Аргументы запросов сервисов, взятые из базы. Выбираются детерминированно, поэтому на одном и том же
+    наборе данных (одинаковые --generate и --seed) планы сравнимы между коммитами
+
+    Attributes:
+        building_id (int): Здание с организациями
+        latitude (float): Широта этого здания
+        longitude (float): Долгота этого здания
+        organization_id (int): Организация в этом здании
+        organization_name (str): Ее название
+        phone (str): Ее телефон
+        activity_id (int): Вид деятельности этой организации с медианным количеством организаций
+        address (str): Адрес здания
+    """
+
+    building_id: int
+    latitude: float
+    longitude: float
+    organization_id: int
+    organization_name: str
+    phone: str
+    activity_id: int
+    address: str
+
+
+@dataclass
+class ExplainedStatement:
+    """
+    SQL-запрос, выполненный сервисом, и его план
+
+    Attributes:
+        sql (str): Текст запроса
+        plan (Dict[str, Any]): Корневой узел EXPLAIN (FORMAT JSON)
+    """
+
+    sql: str
+    plan: Dict[str, Any]
+
+    @property
+    def total_cost(self) -> float:
+        return self.plan["Total Cost"]
+
+    def scans(self) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """
+        Yields:
+            scan (Tuple[str, str, Optional[str]]): Тип узла, таблица и индекс каждого просмотра таблицы в плане
+        """
+        nodes = [self.plan]
+        while nodes:
+            node = nodes.pop()
+            if "Relation Name" in node:
+                yield node["Node Type"], node["Relation Name"], node.get("Index Name")
+            nodes.extend(node.get("Plans", ()))
+
+    def describe(self) -> str:
+        scans = ", ".join(
+            f"{node_type} {relation}" + (f" ({index})" if index else "") for node_type, relation, index in self.scans()
+        )
+        return f"cost={self.total_cost:.1f} [{scans}]\n{self.sql}"
+
+
+class StatementRecorder:
+    """
+    Запоминает запросы, которые выполняет движок, с параметрами в том виде, в котором они уходят в asyncpg
+    """
+
+    def __init__(self):
+        self.statements: List[Tuple[str, Any]] = []
+        self.recording = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording:
+            self.statements.append((statement, parameters))
+
+
+async def explain_call(
+    recorder: StatementRecorder, call: Callable[[AsyncSession], Awaitable[Any]]
+) -> List[ExplainedStatement]:
+    """
+    Выполняет вызов сервиса в отдельной сессии и возвращает планы всех выполненных им SELECT-запросов.
+    Ошибки сервиса о пустом результате (EXPECTED_SERVICE_ERRORS) не прерывают проверку: план важен и для пустого
+    результата. Остальные ошибки пробрасываются
+    """
+    recorder.statements.clear()
+    async with AsyncSessionLocal() as session:
+        recorder.recording = True
+        try:
+            await call(session)
+        except EXPECTED_SERVICE_ERRORS:
+            pass
+        finally:
+            recorder.recording = False
+
+        explained = []
+        connection = await session.connection()
+        for statement, parameters in list(recorder.statements):
+            if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                continue
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            explained.append(ExplainedStatement(statement, plan[0]["Plan"]))
+        return explained
+
+
+async def _load_samples(generate: int, seed: int) -> Samples:
+    async with AsyncSessionLocal() as session:
+        if generate:
+            await generate_dataset(session, DatasetConfig(buildings=generate, seed=seed), truncate=True)
+
+        buildings = (await session.execute(text("SELECT count(*) FROM buildings"))).scalar()
+        if buildings < MIN_BUILDINGS:
+            pytest.skip(
+                f"В базе {buildings} зданий, нужно не меньше {MIN_BUILDINGS}: "
+                "заполните ее через --generate или app.cli.generate_dataset"
+            )
+
+        # Только что вставленные строки GIN-индексы держат в списке ожидания, и до VACUUM оценка стоимости
+        # просмотра по ним так завышена, что планировщик выбирает полный просмотр таблицы. VACUUM не выполняется
+        # внутри транзакции
+        async with _engine.connect() as connection:
+            autocommit = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for table in VACUUMED_TABLES:
+                await autocommit.execute(text(f"VACUUM ANALYZE {table}"))
+
+        # Вид деятельности с медианным количеством организаций: у самых популярных видов организаций так много,
+        # что полный просмотр organisations для них - правильный план
+        activity_id = (
+            await session.execute(
+                text(
+                    "SELECT a.id FROM activities a "
+                    "JOIN organisation_actvities oa ON oa.activity_id = a.id "
+                    "GROUP BY a.id ORDER BY count(*), a.id "
+                    "OFFSET (SELECT count(DISTINCT activity_id) / 2 FROM organisation_actvities) LIMIT 1"
+                )
+            )
+        ).scalar()
+        organization = (
+            await session.execute(
+                text(
+                    "SELECT o.id, o.name, b.id AS building_id, b.latitude, b.longitude, b.address "
+                    "FROM organisations o JOIN buildings b ON b.id = o.building_id "
+                    "WHERE b.latitude IS NOT NULL AND b.longitude IS NOT NULL "
+                    "AND EXISTS (SELECT FROM organisation_phones p WHERE p.organisation_id = o.id) "
+                    "AND EXISTS ("
+                    "SELECT FROM organisation_actvities oa WHERE oa.organisation_id = o.id AND oa.activity_id = :activity"
+                    ") "
+                    "ORDER BY o.id LIMIT 1"
+                ),
+                {"activity": activity_id},
+            )
+        ).one()
+        phone = (
+            await session.execute(
+                text("SELECT phone FROM organisation_phones WHERE organisation_id = :id ORDER BY phone_id LIMIT 1"),
+                {"id": organization.id},
+            )
+        ).scalar()
+
+    return Samples(
+        building_id=organization.building_id,
+        latitude=organization.latitude,
+        longitude=organization.longitude,
+        organization_id=organization.id,
+        organization_name=organization.name,
+        phone=phone,
+        activity_id=activity_id,
+        address=organization.address,
+    )
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.run_until_complete(_engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def samples(request, event_loop_runner) -> Samples:
+    return event_loop_runner(_load_samples(request.config.getoption("generate"), request.config.getoption("seed")))
+
+
+@pytest.fixture(scope="session")
+def recorder() -> Iterator[StatementRecorder]:
+    recorder = StatementRecorder()
+    event.listen(_engine.sync_engine, "before_cursor_execute", recorder)
+    yield recorder
+    event.remove(_engine.sync_engine, "before_cursor_execute", recorder)
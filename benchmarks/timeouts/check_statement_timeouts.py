@@ -0,0 +1,124 @@
+"""
+Проверка ограничения времени SQL-запросов (STATEMENT_TIMEOUT_MS, STATEMENT_TIMEOUTS_MS) и отмены запросов
+при отключении клиента (DisconnectMiddleware) на локальной базе. Медленный запрос - pg_sleep, которым
+подменяется метод сервиса: по нему же проверяется, что на сервере не остается выполняемых запросов
+"""
+import asyncio
+from time import perf_counter
+from typing import List
+import pytest
+from sqlalchemy import text
+from app.api.dependencies.db_dependency import STATEMENT_TIMEOUT_DETAIL, _engine
+from app.core.settings import app_settings
+from app.services.organization_services import OrganizationService
+from conftest import SLOW_QUERY, SLOW_QUERY_SECONDS, active_slow_queries, pooled_statement_timeout
+from main import app
+
+# Ограничение времени маршрутов в проверках
+ROUTE_TIMEOUT_MS = 200
+
+
+async def _slow_query(self, *args, **kwargs):
+    await self.session.execute(text(SLOW_QUERY))
+    return []
+
+
+@pytest.fixture
+def slow_search(monkeypatch):
+    monkeypatch.setattr(OrganizationService, "search_organization_by_name", _slow_query)
+
+
+@pytest.fixture
+def route_timeouts(monkeypatch):
+    monkeypatch.setattr(
+        app_settings,
+        "STATEMENT_TIMEOUTS_MS",
+        {"/organizations/search_organization_by_name": ROUTE_TIMEOUT_MS, "/batch": ROUTE_TIMEOUT_MS},
+    )
+
+
+def check_route_timeout_returns_503(event_loop_runner, database, client, slow_search, route_timeouts):
+    started = perf_counter()
+    response = event_loop_runner(client.get("/organizations/search_organization_by_name", params={"name": "a"}))
+    elapsed = perf_counter() - started
+
+    assert response.status_code == 503, response.text
+    assert response.json() == {"detail": STATEMENT_TIMEOUT_DETAIL}
+    assert response.headers.get("retry-after")
+    assert elapsed < SLOW_QUERY_SECONDS / 2, f"Запрос не прерван по statement_timeout: {elapsed:.2f} с"
+    assert event_loop_runner(pooled_statement_timeout()) == database.default_statement_timeout
+    assert _engine.pool.checkedout() == 0
+
+
+def check_batch_timeout_keeps_siblings(event_loop_runner, database, client, slow_search, route_timeouts):
+    response = event_loop_runner(
+        client.post(
+            "/batch",
+            json={
+                "requests": [
+                    {"id": "slow", "operation": "search_organization_by_name", "params": {"name": "a"}},
+                    {
+                        "id": "fast",
+                        "operation": "get_organization_by_id",
+                        "params": {"organization_id": database.organization_id},
+                    },
+                ]
+            },
+        )
+    )
+
+    assert response.status_code == 200, response.text
+    slow, fast = response.json()["results"]
+    assert slow == {"id": "slow", "status": 503, "detail": STATEMENT_TIMEOUT_DETAIL}
+    assert fast["id"] == "fast" and fast["status"] == 200, fast
+    assert event_loop_runner(pooled_statement_timeout()) == database.default_statement_timeout
+    assert _engine.pool.checkedout() == 0
+
+
+async def _disconnect_during_slow_query(delay: float) -> List[str]:
+    sent: List[str] = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(delay)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message["type"])
+
+    path = "/organizations/search_organization_by_name"
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"name=a",
+        "root_path": "",
+        "headers": [(b"host", b"checks")],
+        "client": ("127.0.0.1", 1),
+        "server": ("checks", 80),
+        "state": {},
+    }
+    await app(scope, receive, send)
+    return sent
+
+
+@pytest.mark.skipif(not app_settings.CANCEL_ON_DISCONNECT, reason="CANCEL_ON_DISCONNECT выключен")
+def check_disconnect_cancels_query(event_loop_runner, database, authorized_app, slow_search):
+    started = perf_counter()
+    sent = event_loop_runner(_disconnect_during_slow_query(0.3))
+    elapsed = perf_counter() - started
+
+    assert "http.response.start" not in sent, sent
+    assert elapsed < SLOW_QUERY_SECONDS / 2, f"Обработка не прервана после отключения клиента: {elapsed:.2f} с"
+    assert _engine.pool.checkedout() == 0
+    # Отмену сервер обрабатывает асинхронно, даем ему немного времени
+    event_loop_runner(asyncio.sleep(0.2))
+    assert event_loop_runner(active_slow_queries()) == 0
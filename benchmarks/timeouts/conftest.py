@@ -0,0 +1,97 @@
+"""
+Общие данные для проверки ограничения времени SQL-запросов и отмены запросов при отключении клиента. Нужна
+локальная база PostgreSQL из SQLALCHEMY_DB_URI с примененными миграциями, без нее проверки пропускаются.
+Авторизация в проверках отключена: пользователь в базе не нужен
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Iterator
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.api.dependencies.auth_dependency import require_bearer_auth
+from app.api.dependencies.db_dependency import _engine
+from app.api.dependencies.rate_limit_dependency import enforce_rate_limit
+from main import app
+
+# Длительность медленного запроса: заметно больше и ограничений времени в проверках, и их бюджета ожидания
+SLOW_QUERY_SECONDS = 5
+SLOW_QUERY = f"SELECT pg_sleep({SLOW_QUERY_SECONDS})"
+
+
+@dataclass(frozen=True)
+class Database:
+    """
+    Состояние базы до проверок
+
+    Attributes:
+        default_statement_timeout (str): statement_timeout нового соединения (SHOW statement_timeout)
+        organization_id (int): Существующая организация
+    """
+
+    default_statement_timeout: str
+    organization_id: int
+
+
+async def _inspect_database() -> Database:
+    try:
+        async with _engine.connect() as connection:
+            default_statement_timeout = (await connection.execute(text("SHOW statement_timeout"))).scalar()
+            organization_id = (await connection.execute(text("SELECT min(id) FROM organisations"))).scalar()
+    except (OSError, SQLAlchemyError) as error:
+        pytest.skip(f"База данных недоступна: {error}")
+    if organization_id is None:
+        pytest.skip("В базе нет организаций: заполните ее через app.cli.generate_dataset")
+    return Database(default_statement_timeout, organization_id)
+
+
+async def active_slow_queries() -> int:
+    """
+    Returns:
+        count (int): Сколько медленных запросов сейчас выполняется на сервере
+    """
+    async with _engine.connect() as connection:
+        return (
+            await connection.execute(
+                text("SELECT count(*) FROM pg_stat_activity WHERE query = :query AND state = 'active'"),
+                {"query": SLOW_QUERY},
+            )
+        ).scalar()
+
+
+async def pooled_statement_timeout() -> str:
+    """
+    Returns:
+        statement_timeout (str): statement_timeout соединения, выданного пулом
+    """
+    async with _engine.connect() as connection:
+        return (await connection.execute(text("SHOW statement_timeout"))).scalar()
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.run_until_complete(_engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def database(event_loop_runner) -> Database:
+    return event_loop_runner(_inspect_database())
+
+
+@pytest.fixture(scope="session")
+def authorized_app(database) -> Iterator[None]:
+    app.dependency_overrides[require_bearer_auth] = lambda: "timeouts"
+    app.dependency_overrides[enforce_rate_limit] = lambda: None
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(event_loop_runner, authorized_app) -> Iterator[httpx.AsyncClient]:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://checks")
+    yield client
+    event_loop_runner(client.aclose())
@@ -0,0 +1,46 @@
+"""
+Конфигурация production-запуска: gunicorn с воркерами uvicorn
+
+Пример:
+    uv run gunicorn -c gunicorn.conf.py main:app
+
+Приложение импортируется в мастер-процессе до форка (preload_app), поэтому воркеры стартуют быстро и делят
+память с мастером. Пул соединений каждого воркера получает свою долю бюджета DB_MAX_CONNECTIONS.
+SIGHUP мягко перезапускает воркеры: новые поднимаются до остановки старых, старые дообрабатывают
+запросы в течение graceful_timeout
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+
+def _default_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+workers = int(os.environ.get("WEB_WORKERS") or _default_workers())
+# Настройки приложения читаются при preload уже после этого файла, поэтому движок базы в мастере
+# создается с пулом, рассчитанным на итоговое количество воркеров
+os.environ["WEB_WORKERS"] = str(workers)
+
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+preload_app = True
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("WEB_TIMEOUT", "60"))
+keepalive = 5
+# Периодический перезапуск воркеров со случайным разбросом, чтобы они не перезапускались одновременно
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = None
+loglevel = "info"
+
+
+def post_fork(server, worker):
+    # Соединения пула, открытые в мастере до форка, не должны использоваться несколькими процессами
+    from app.api.dependencies.db_dependency import _engine
+
+    _engine.sync_engine.dispose(close=False)
@@ -1,15 +1,49 @@
-from fastapi import FastAPI, Depends
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
-from sqlalchemy import event
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
 from app.core.settings import app_settings
 from app.api.views.building_views import building_router
 from app.api.views.organization_views import organizations_router
 from app.api.views.auth_views import auth_router
+from app.api.views.batch_views import batch_router
 from app.api.dependencies.auth_dependency import require_bearer_auth
+from app.api.dependencies.db_dependency import (
+    STATEMENT_TIMEOUT_DETAIL,
+    _engine,
+    _max_overflow,
+    _pool_size,
+    is_statement_timeout,
+)
+from app.api.dependencies.rate_limit_dependency import enforce_rate_limit
+from app.api.middlewares.admission_middleware import AdmissionMiddleware
+from app.api.middlewares.compression_middleware import CompressionMiddleware
+from app.api.middlewares.disconnect_middleware import DisconnectMiddleware
+from app.api.middlewares.metrics_middleware import MetricsMiddleware
+from app.api.middlewares.profiling_middleware import ProfilingMiddleware, profiler_available
+from app.api.middlewares.sql_tracing_middleware import SQLTracingMiddleware
+from app.core.change_events import change_event_bus
+from app.core.loop_monitor import EventLoopMonitor
+from app.core.metrics import metrics_registry, register_pool_metrics
+from app.core.payload_cache import building_payload_cache
+from app.core.single_flight import single_flight
+from app.core.warmup import warm_up
+from app.db.change_listener import ChangeListener, asyncpg_dsn
 from app.db.models.activity_models import Activity
 from app.db.events.activity_indentation_checker import (
     check_activity_indentation_level,
 )
+from app.db.events.sql_tracer import install_sql_tracer
+from app.services.organization_services import OrganizationService
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд при старте воркера ждать подписки на уведомления об изменениях
+_CHANGE_LISTENER_START_TIMEOUT = 5.0
 
 
 if not hasattr(Activity, "_indentation_event_registered"):
@@ -17,22 +51,161 @@ if not hasattr(Activity, "_indentation_event_registered"):
     event.listen(Activity, "before_update", check_activity_indentation_level)
     setattr(Activity, "_indentation_event_registered", True)
 
-app = FastAPI(debug=app_settings.DEBUG, title="Organizations")
+single_flight.enabled = app_settings.SINGLE_FLIGHT_ENABLED
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor = None
+    if app_settings.LOOP_MONITOR_ENABLED:
+        loop_monitor = EventLoopMonitor(
+            interval_ms=app_settings.LOOP_MONITOR_INTERVAL_MS,
+            block_threshold_ms=app_settings.LOOP_BLOCK_THRESHOLD_MS,
+            capture_stacks=app_settings.LOOP_BLOCK_STACKS,
+        )
+        await loop_monitor.start()
+    change_listener = None
+    detach_payload_cache = None
+    if app_settings.CHANGE_NOTIFICATIONS_ENABLED:
+        change_listener = ChangeListener(
+            asyncpg_dsn(app_settings.SQLALCHEMY_DB_URI), change_event_bus
+        )
+        # Кэш подписывается до запуска слушателя, чтобы не пропустить изменения между заполнением и подпиской.
+        # Пока слушатель не подписан на канал (база недоступна, переподключение), кэш не используется
+        if app_settings.BUILDING_CACHE_MB > 0:
+            detach_payload_cache = building_payload_cache.attach(
+                change_event_bus,
+                app_settings.BUILDING_CACHE_MB * 1024 * 1024,
+                listening=lambda: change_listener.listening,
+            )
+            metrics_registry.register_cache("building_payloads", building_payload_cache.stats)
+        await change_listener.start()
+        try:
+            # Изменения до подписки не сбрасывают кэши воркера, поэтому трафик принимается после нее. Ожидание
+            # ограничено: без уведомлений воркер работает, а слушатель продолжает переподключаться в фоне
+            await change_listener.wait_listening(_CHANGE_LISTENER_START_TIMEOUT)
+        except TimeoutError:
+            logger.warning("Подписка на уведомления об изменениях не выполнена при старте, повтор в фоне")
+    if app_settings.WARMUP_ENABLED:
+        try:
+            await warm_up(
+                _engine,
+                connections=app_settings.WARMUP_CONNECTIONS,
+                statement_warmers=[lambda session: OrganizationService(session).warm_up()],
+            )
+        except (OSError, SQLAlchemyError):
+            # Без прогрева приложение работает, просто первые запросы будут медленнее
+            logger.exception("Не удалось прогреть приложение")
+    try:
+        yield
+    finally:
+        if change_listener is not None:
+            await change_listener.stop()
+        if detach_payload_cache is not None:
+            detach_payload_cache()
+        if loop_monitor is not None:
+            await loop_monitor.stop()
+
+
+app = FastAPI(debug=app_settings.DEBUG, title="Organizations", lifespan=lifespan)
+
+
+@app.exception_handler(DBAPIError)
+async def statement_timeout_handler(request: Request, error: DBAPIError):
+    if not is_statement_timeout(error):
+        raise error
+    return JSONResponse(
+        {"detail": STATEMENT_TIMEOUT_DETAIL},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(app_settings.ADMISSION_RETRY_AFTER)},
+    )
+
 
 app.include_router(auth_router, prefix="/auth")
 
-app.include_router(
-    building_router, prefix="/buildings", dependencies=[Depends(require_bearer_auth)]
-)
-app.include_router(
-    organizations_router,
-    prefix="/organizations",
-    dependencies=[Depends(require_bearer_auth)],
-)
+# Ограничение частоты проверяется после авторизации, по пользователю из require_bearer_auth
+_authorized = [Depends(require_bearer_auth), Depends(enforce_rate_limit)]
+
+app.include_router(building_router, prefix="/buildings", dependencies=_authorized)
+app.include_router(organizations_router, prefix="/organizations", dependencies=_authorized)
+app.include_router(batch_router, prefix="/batch", dependencies=_authorized)
+
+if app_settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=app_settings.COMPRESSION_MINIMUM_SIZE,
+        cache_bytes=app_settings.COMPRESSION_CACHE_MB * 1024 * 1024,
+    )
+
+if app_settings.SQL_TRACING_ENABLED:
+    install_sql_tracer(
+        _engine.sync_engine,
+        slow_query_threshold_ms=app_settings.SQL_SLOW_QUERY_MS,
+        n_plus_one_threshold=app_settings.SQL_N_PLUS_ONE_THRESHOLD,
+    )
+    app.add_middleware(SQLTracingMiddleware, expose_headers=app_settings.DEBUG)
+
+if app_settings.ADMISSION_ENABLED:
+    # Внутри MetricsMiddleware, чтобы отклоненные запросы попадали в метрики, и снаружи всего, что обращается к базе
+    app.add_middleware(
+        AdmissionMiddleware,
+        router=app.router,
+        # Общее ограничение всех маршрутов: запросы воркера вместе не берут больше соединений, чем есть в пуле
+        concurrency=app_settings.ADMISSION_CONCURRENCY or _pool_size + _max_overflow,
+        route_limits=app_settings.ADMISSION_ROUTE_LIMITS,
+        # Пакетный запрос держит до BATCH_CONCURRENCY соединений одновременно
+        route_weights={"/batch": app_settings.BATCH_CONCURRENCY},
+        queue_size=app_settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout=app_settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+        retry_after=app_settings.ADMISSION_RETRY_AFTER,
+    )
+
+if app_settings.CANCEL_ON_DISCONNECT:
+    # Снаружи контроля нагрузки, чтобы отключение клиента освобождало и место в очереди маршрута
+    app.add_middleware(DisconnectMiddleware, router=app.router)
+
+if app_settings.METRICS_ENABLED:
+    register_pool_metrics(_engine.pool)
+    app.add_middleware(MetricsMiddleware, router=app.router)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(
+            metrics_registry.render(), media_type="text/plain; version=0.0.4"
+        )
+
+if app_settings.PROFILING_TOKEN or app_settings.PROFILING_SAMPLE_RATE > 0:
+    if profiler_available():
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=app_settings.PROFILING_TOKEN,
+            sample_rate=app_settings.PROFILING_SAMPLE_RATE,
+            output_dir=app_settings.PROFILING_DIR,
+            interval_ms=app_settings.PROFILING_INTERVAL_MS,
+        )
+    else:
+        # Профилирование отладочное: без pyinstrument воркер должен запуститься, а не упасть при сборке middleware
+        logger.warning("Профилирование выключено: не установлен pyinstrument (uv sync --group profiling)")
 
 @app.get("/healthcheck")
 async def healthcheck():
     return {"health": "ok"}
 
+
+@app.get("/healthcheck/ready")
+async def readiness_check():
+    # Запросы обслуживаются только после завершения lifespan (прогрева), поэтому проверяется только база
+    try:
+        async with _engine.connect() as connection:
+            await asyncio.wait_for(connection.execute(text("SELECT 1")), timeout=2)
+    except (OSError, SQLAlchemyError, TimeoutError):
+        return JSONResponse({"ready": False, "reason": "database"}, status_code=503)
+    return {"ready": True}
+
 if __name__ == "__main__":
-    uvicorn.run(app=app, host=app_settings.HOST, port=app_settings.PORT, log_level="debug")
+    uvicorn.run(
+        app=app,
+        host=app_settings.HOST,
+        port=app_settings.PORT,
+        log_level="debug" if app_settings.DEBUG else "info",
+    )
@@ -0,0 +1,209 @@
+"""
+Проверки ConcurrencyLimiter и AdmissionMiddleware без базы данных
+"""
+import asyncio
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.api.middlewares.admission_middleware import AdmissionMiddleware
+from app.core.admission import ConcurrencyLimiter
+
+
+async def _yield():
+    # Несколько итераций цикла событий: ожидающие задачи успевают обработать переданные места
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_weighted_queue_is_fifo():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=4, queue_size=8, queue_timeout=1.0)
+        assert await limiter.acquire(3) is None
+        admitted = []
+
+        async def request(name, weight):
+            assert await limiter.acquire(weight) is None
+            admitted.append(name)
+
+        heavy = asyncio.create_task(request("heavy", 2))
+        await _yield()
+        light = asyncio.create_task(request("light", 1))
+        await _yield()
+        # Легкому запросу места хватает, но он стоит в очереди за тяжелым
+        assert admitted == [] and limiter.queued == 2
+
+        limiter.release(3)
+        await asyncio.gather(heavy, light)
+        assert admitted == ["heavy", "light"]
+        assert limiter.active == 3 and limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_weight_is_capped_at_limit():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=2, queue_size=8, queue_timeout=0.1)
+        assert await limiter.acquire(5) is None
+        assert limiter.active == 2
+        limiter.release(5)
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_is_rejected():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=1.0)
+        assert await limiter.acquire() is None
+        waiter = asyncio.create_task(limiter.acquire())
+        await _yield()
+        assert await limiter.acquire() == "queue_full"
+        limiter.release()
+        assert await waiter is None
+
+    asyncio.run(scenario())
+
+
+def test_timeout_leaves_no_waiter():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=8, queue_timeout=0.05)
+        assert await limiter.acquire() is None
+        assert await limiter.acquire() == "queue_timeout"
+        assert limiter.queued == 0 and limiter.active == 1
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_head_admits_next_waiter():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=4, queue_size=8, queue_timeout=1.0)
+        assert await limiter.acquire(3) is None
+        heavy = asyncio.create_task(limiter.acquire(2, timeout=0.05))
+        await _yield()
+        light = asyncio.create_task(limiter.acquire(1))
+        assert await heavy == "queue_timeout"
+        # После ухода первого в очереди легкий запрос получает место, не дожидаясь освобождения
+        assert await asyncio.wait_for(light, 0.5) is None
+        assert limiter.active == 4 and limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_removed():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=8, queue_timeout=1.0)
+        assert await limiter.acquire() is None
+        waiter = asyncio.create_task(limiter.acquire())
+        await _yield()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.queued == 0
+        limiter.release()
+        assert limiter.active == 0
+        assert await limiter.acquire() is None
+
+    asyncio.run(scenario())
+
+
+def test_cancel_after_grant_passes_slot_on():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=8, queue_timeout=1.0)
+        assert await limiter.acquire() is None
+        first = asyncio.create_task(limiter.acquire())
+        await _yield()
+        second = asyncio.create_task(limiter.acquire())
+        await _yield()
+        # Место передается первому ожидающему, но его задача отменяется раньше, чем успевает его принять
+        limiter.release()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert await asyncio.wait_for(second, 0.5) is None
+        assert limiter.active == 1 and limiter.queued == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def _app(release: asyncio.Event) -> Starlette:
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("slow")
+
+    async def fast(request):
+        return PlainTextResponse("fast")
+
+    return Starlette(routes=[Route("/slow", slow), Route("/fast", fast)])
+
+
+async def _get(app, path: str) -> int:
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+    }
+    await app(scope, receive, send)
+    return status
+
+
+def test_routes_share_worker_limit():
+    async def scenario():
+        release = asyncio.Event()
+        inner = _app(release)
+        middleware = AdmissionMiddleware(inner, inner.router, concurrency=1, queue_timeout=0.05)
+
+        slow = asyncio.create_task(_get(middleware, "/slow"))
+        await _yield()
+        # Другой маршрут ждет места в общем ограничении и получает 503 по истечении очереди
+        assert await _get(middleware, "/fast") == 503
+        release.set()
+        assert await slow == 200
+        assert await _get(middleware, "/fast") == 200
+        assert middleware.limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_route_limit_and_weight_apply_inside_worker_limit():
+    async def scenario():
+        release = asyncio.Event()
+        inner = _app(release)
+        middleware = AdmissionMiddleware(
+            inner,
+            inner.router,
+            concurrency=4,
+            route_limits={"/slow": 3},
+            route_weights={"/slow": 2},
+            queue_timeout=0.05,
+        )
+
+        slow = asyncio.create_task(_get(middleware, "/slow"))
+        await _yield()
+        assert middleware.limiter.active == 2
+        # Второму /slow не хватает мест в ограничении маршрута, /fast помещается в общее
+        assert await _get(middleware, "/slow") == 503
+        assert await _get(middleware, "/fast") == 200
+        release.set()
+        assert await slow == 200
+        assert middleware.limiter.active == 0 and middleware.route_limiters["/slow"].active == 0
+
+    asyncio.run(scenario())